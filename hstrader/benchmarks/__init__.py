@@ -0,0 +1,4 @@
+"""Benchmarks of the hot paths of the sdk: the decoding of the websocket messages, the price truncation,
+the dispatch of the messages to the handlers, the deserialization of the lists and the http calls to a local
+mock server. Run them with python -m benchmarks from this directory, see python -m benchmarks --help.
+"""
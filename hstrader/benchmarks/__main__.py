@@ -0,0 +1,51 @@
+import argparse
+import contextlib
+import sys
+from hstrader import __version__
+from .cases import get_benchmarks
+from .runner import find_regressions, format_table, read_results, run_all, write_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure the hot paths of the sdk, run from the directory holding the hstrader package",
+    )
+    parser.add_argument("-k", "--filter", help="only run the benchmarks whose name contains this text")
+    parser.add_argument(
+        "-t", "--time", type=float, default=1.0, help="seconds spent timing each benchmark (default 1)"
+    )
+    parser.add_argument("-o", "--json", help="write the results to this json file")
+    parser.add_argument("-c", "--compare", help="compare the results to a json file written by a previous run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="with --compare, fail when a benchmark is slower by more than this ratio (default 0.1)",
+    )
+    parser.add_argument("-l", "--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    baseline = read_results(args.compare) if args.compare else None
+    with contextlib.ExitStack() as stack:
+        benchmarks = get_benchmarks(stack)
+        if args.filter:
+            benchmarks = [b for b in benchmarks if args.filter in b.name]
+        if args.list:
+            print("\n".join(b.name for b in benchmarks))
+            return 0
+        results = run_all(benchmarks, args.time, out=sys.stderr)
+
+    print(format_table(results, baseline))
+    if args.json:
+        write_results(args.json, results, __version__)
+    if baseline is not None:
+        slower = find_regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"\nslower than {args.compare}: {', '.join(slower)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import contextlib
+import json
+from typing import Callable, List
+from hstrader import Config, HsTrader
+from hstrader.mock import MockServer
+from hstrader.services import WebSocketService
+from hstrader.services.utils import (
+    PriceAdjuster,
+    apply_spread,
+    deserialize_summary,
+    deserialize_tick,
+    truncate_float,
+)
+from hstrader.models import (
+    BaseResponse,
+    CrtOrder,
+    Event,
+    Order,
+    Position,
+    Resolution,
+    Symbol,
+)
+from .runner import Benchmark
+
+TICK = b"1,1.08123,1.08133,1.08500,1.07900,1.08123,1.08000,125,1792334182"
+TICK_OUT_OF_FEED = b"7,0.65123,0.65133,0.65500,0.64900,0.65123,0.65000,125,1792334182"
+
+# the size of the lists deserialized, a usual account and the symbols of a usual broker
+LIST_SIZE = 100
+SUMMARY_POSITIONS = 10
+
+
+def _summary(positions: int) -> str:
+    fields = ["summary", "24100099", "100007.30", "0.00", "100010.20", "150.00"]
+    fields += ["99860.20", "66673.47%", "2.90"]
+    for i in range(positions):
+        fields += [str(240910344 + i), f"{i * 0.29:.2f}"]
+    return ",".join(fields)
+
+
+def _order(id: int) -> dict:
+    return {
+        "id": id,
+        "symbol_id": id % 8 + 1,
+        "type": 1,
+        "side": id % 2,
+        "volume": 0.1,
+        "order_price": 1.075,
+        "stop_loss": 1.07,
+        "take_profit": 1.09,
+        "comment": "",
+        "status": 1,
+        "filled_volume": 0.0,
+        "contract_size": 100000,
+        "expiration_policy": 0,
+        "fill_policy": 0,
+        "created_at": 1792334182,
+        "updated_at": 1792334182,
+    }
+
+
+def _position(id: int) -> dict:
+    return {
+        "id": id,
+        "symbol_id": id % 8 + 1,
+        "side": id % 2,
+        "volume": 0.1,
+        "open_price": 1.08123,
+        "stop_loss": 1.07,
+        "take_profit": 1.09,
+        "comment": "",
+        "contract_size": 100000,
+        "status": 0,
+        "profit": 1.25,
+        "created_at": 1792334182,
+        "updated_at": 1792334182,
+    }
+
+
+def _symbols(count: int) -> List[dict]:
+    """the symbols of the mock server, with a spread so it's applied to the prices"""
+    symbols = list(MockServer(symbols=count).symbols.values())
+    return [dict(s, spread=2, spread_balance=1) for s in symbols]
+
+
+def _response(data: List[dict]) -> BaseResponse:
+    return BaseResponse(success=True, code=200, data=data, error="", message="")
+
+
+def _drive(coroutine):
+    """run a coroutine which never waits to its end without an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+    coroutine.close()
+    raise RuntimeError("the coroutine is waiting, it needs an event loop")
+
+
+def _websocket_service(feed: List[int] = None) -> WebSocketService:
+    """a websocket service receiving messages without a connection, with a handler for each event"""
+    config = Config(url="localhost", session_id="session", access_token="token")
+    config.set_symbols([Symbol(**s) for s in _symbols(8)])
+    service = WebSocketService(config)
+    service.register_handler(Event.MARKET, lambda tick: None)
+    service.register_handler(Event.SUMMARY, lambda summary: None)
+    service.register_handler(Event.ORDER, lambda order, status: None)
+    if feed is not None:
+        service._WebSocketService__set_feed_symbols(frozenset(feed))
+    return service
+
+
+def _model_benchmarks() -> List[Benchmark]:
+    summary = _summary(SUMMARY_POSITIONS)
+    symbol = Symbol(**_symbols(1)[0])
+    adjuster = PriceAdjuster(symbol)
+    return [
+        Benchmark("deserialize_tick", lambda: deserialize_tick(TICK)),
+        Benchmark(
+            f"deserialize_summary[{SUMMARY_POSITIONS} positions]",
+            lambda: deserialize_summary(summary),
+        ),
+        Benchmark("truncate_float", lambda: truncate_float(1.0812345678, 5)),
+        Benchmark("PriceAdjuster.truncate", lambda: adjuster.truncate(1.0812345678)),
+        # apply_spread changes the symbol, a copy is made on each call
+        Benchmark("apply_spread", lambda: apply_spread(symbol.model_copy())),
+    ]
+
+
+def _dispatch_benchmarks() -> List[Benchmark]:
+    service = _websocket_service()
+    filtered = _websocket_service(feed=[1])
+    on_message = service._WebSocketService__on_message
+    on_filtered = filtered._WebSocketService__on_message
+    order = json.dumps({"type": "order_update", "payload": _order(1)})
+    summary = _summary(SUMMARY_POSITIONS)
+    return [
+        Benchmark("on_message[tick]", lambda: _drive(on_message(TICK))),
+        Benchmark(
+            "on_message[tick out of the feed]",
+            lambda: _drive(on_filtered(TICK_OUT_OF_FEED)),
+        ),
+        Benchmark("on_message[order]", lambda: _drive(on_message(order))),
+        Benchmark("on_message[summary]", lambda: _drive(on_message(summary))),
+    ]
+
+
+def _deserialize_list_benchmarks() -> List[Benchmark]:
+    lists = [
+        (Order, _response([_order(i) for i in range(LIST_SIZE)])),
+        (Position, _response([_position(i) for i in range(LIST_SIZE)])),
+        (Symbol, _response(_symbols(LIST_SIZE))),
+    ]
+    benchmarks = []
+    for model, response in lists:
+        name = f"deserialize_list[{model.__name__} x{LIST_SIZE}"
+        benchmarks.append(
+            Benchmark(name + "]", _bind(response.deserialize_list, model, False))
+        )
+        benchmarks.append(
+            Benchmark(name + ", trusted]", _bind(response.deserialize_list, model, True))
+        )
+    return benchmarks
+
+
+def _bind(f: Callable, *args) -> Callable:
+    return lambda: f(*args)
+
+
+def _http_benchmarks(stack: contextlib.ExitStack) -> List[Benchmark]:
+    """the calls of the client to a mock server on localhost, it's started by the first of them"""
+    clients: List[HsTrader] = []
+
+    def client() -> HsTrader:
+        if not clients:
+            server = stack.enter_context(MockServer(symbols=LIST_SIZE, summary_interval=None))
+            clients.append(server.client())
+            stack.callback(clients[0].close)
+            for i in range(LIST_SIZE // 2):
+                clients[0].create_order(
+                    CrtOrder(symbol=i % 8 + 1, volume=0.1, side="buy", type="market", order_price=0)
+                )
+        return clients[0]
+
+    return [
+        Benchmark("http[get_account]", lambda: clients[0].get_account(), setup=client),
+        Benchmark(
+            f"http[get_positions x{LIST_SIZE // 2}]",
+            lambda: clients[0].get_positions(),
+            setup=client,
+        ),
+        Benchmark(
+            f"http[get_symbols x{LIST_SIZE}]",
+            lambda: clients[0].get_symbols(),
+            setup=client,
+        ),
+        Benchmark(
+            "get_market_history[300 bars]",
+            lambda: clients[0].get_market_history(1, resolution=Resolution.M1, count_back=300),
+            setup=client,
+        ),
+    ]
+
+
+def get_benchmarks(stack: contextlib.ExitStack) -> List[Benchmark]:
+    """get every benchmark of the sdk, in the order they are run
+
+    Args:
+        stack (contextlib.ExitStack): closes the mock server and the client of the http benchmarks once they're done
+
+    Returns:
+        List[Benchmark]: the benchmarks
+    """
+    return (
+        _model_benchmarks()
+        + _dispatch_benchmarks()
+        + _deserialize_list_benchmarks()
+        + _http_benchmarks(stack)
+    )
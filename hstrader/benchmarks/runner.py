@@ -0,0 +1,270 @@
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Union
+
+# a batch times enough calls to last at least this long, so the timer overhead doesn't show in the throughput
+_MIN_BATCH_TIME = 20e-6
+
+
+class Result(NamedTuple):
+    """The measures of a benchmark. ops_per_sec is measured on batches of calls. The latencies are percentiles of
+    calls timed one by one in microseconds, less the overhead of the timer, samples is the number of these calls.
+    alloc_bytes is the peak of the memory allocated by one call.
+    """
+
+    name: str
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes: int
+    samples: int
+    batch: int
+    timer_overhead_ns: int
+
+
+class Benchmark(NamedTuple):
+    """A function to measure, setup is called once before and teardown once after the measures"""
+
+    name: str
+    func: Callable[[], any]
+    setup: Union[Callable[[], any], None] = None
+    teardown: Union[Callable[[], any], None] = None
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _calibrate(func: Callable[[], any]) -> int:
+    """get the number of calls timed together in a batch"""
+    batch = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(batch):
+            func()
+        if time.perf_counter() - started >= _MIN_BATCH_TIME or batch >= 1 << 20:
+            return batch
+        batch *= 2
+
+
+def _timer_overhead() -> int:
+    """get the median time in nanoseconds taken by timing nothing"""
+    timer = time.perf_counter_ns
+    overheads = []
+    for _ in range(1000):
+        started = timer()
+        overheads.append(timer() - started)
+    overheads.sort()
+    return overheads[len(overheads) // 2]
+
+
+def _time_calls(func: Callable[[], any], duration: float, overhead: int) -> List[float]:
+    """time the calls one by one for the duration, at least 100 and at most 100000 of them
+
+    Returns:
+        List[float]: the sorted times of the calls in seconds, less the overhead of the timer
+    """
+    timer = time.perf_counter_ns
+    times = []
+    deadline = timer() + int(duration * 1e9)
+    while len(times) < 100000:
+        started = timer()
+        func()
+        ended = timer()
+        times.append(max(0, ended - started - overhead) / 1e9)
+        if ended >= deadline and len(times) >= 100:
+            break
+    times.sort()
+    return times
+
+
+def _measure_allocations(func: Callable[[], any], runs: int = 20) -> int:
+    """get the median of the peak memory allocated by a call, tracemalloc is restarted for each call
+    so the peak is the one of the call alone"""
+    peaks = []
+    for _ in range(runs):
+        tracemalloc.start()
+        try:
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    peaks.sort()
+    return peaks[len(peaks) // 2]
+
+
+def run_benchmark(benchmark: Benchmark, duration: float = 1.0, warmup: float = 0.1) -> Result:
+    """Measure a benchmark with the garbage collector disabled. The throughput is measured on batches of a calibrated
+    number of calls so the timer doesn't show in the fast functions. The latencies are measured on calls timed one
+    by one so their tail isn't averaged away. Then the allocations are measured with tracemalloc
+
+    Args:
+        benchmark (Benchmark): the benchmark to run
+        duration (float, optional): the seconds spent timing the batches, and half of it timing the single calls.
+            Defaults to 1.
+        warmup (float, optional): the seconds spent calling the function before timing it. Defaults to 0.1.
+
+    Returns:
+        Result: the measures of the benchmark
+    """
+    func = benchmark.func
+    if benchmark.setup is not None:
+        benchmark.setup()
+    try:
+        deadline = time.perf_counter() + warmup
+        while time.perf_counter() < deadline:
+            func()
+
+        batch = _calibrate(func)
+        overhead = _timer_overhead()
+        batches = 0
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            deadline = started + duration
+            while True:
+                for _ in range(batch):
+                    func()
+                batches += 1
+                now = time.perf_counter()
+                if now >= deadline and batches >= 10:
+                    break
+            elapsed = now - started
+            samples = _time_calls(func, duration / 2, overhead)
+        finally:
+            if enabled:
+                gc.enable()
+
+        alloc_bytes = _measure_allocations(func)
+    finally:
+        if benchmark.teardown is not None:
+            benchmark.teardown()
+
+    return Result(
+        name=benchmark.name,
+        ops_per_sec=batches * batch / elapsed,
+        p50_us=_percentile(samples, 50) * 1e6,
+        p99_us=_percentile(samples, 99) * 1e6,
+        alloc_bytes=alloc_bytes,
+        samples=len(samples),
+        batch=batch,
+        timer_overhead_ns=overhead,
+    )
+
+
+def format_table(results: List[Result], baseline: Dict[str, dict] = None) -> str:
+    """Format the results as a table, with the change of the ops/sec from the baseline if any
+
+    Args:
+        results (List[Result]): the results to format
+        baseline (Dict[str, dict], optional): the results of a previous run by name, as read by read_results
+
+    Returns:
+        str: the table
+    """
+    header = f"{'benchmark':<40} {'ops/sec':>12} {'p50 us':>10} {'p99 us':>10} {'alloc B':>10}"
+    if baseline is not None:
+        header += f" {'change':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        line = (
+            f"{r.name:<40} {r.ops_per_sec:>12,.0f} {r.p50_us:>10.2f} {r.p99_us:>10.2f} {r.alloc_bytes:>10}"
+        )
+        if baseline is not None:
+            previous = baseline.get(r.name)
+            if previous is None or not previous.get("ops_per_sec"):
+                line += f" {'new':>8}"
+            else:
+                line += f" {r.ops_per_sec / previous['ops_per_sec'] - 1:>+8.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def find_regressions(
+    results: List[Result], baseline: Dict[str, dict], threshold: float = 0.1
+) -> List[str]:
+    """get the benchmarks slower than in the baseline by more than the threshold
+
+    Args:
+        results (List[Result]): the results of the run
+        baseline (Dict[str, dict]): the results of a previous run by name, as read by read_results
+        threshold (float, optional): the tolerated slowdown, 0.1 for 10%. Defaults to 0.1.
+
+    Returns:
+        List[str]: the names of the slower benchmarks
+    """
+    slower = []
+    for r in results:
+        previous = baseline.get(r.name)
+        if previous and previous.get("ops_per_sec"):
+            if r.ops_per_sec < previous["ops_per_sec"] * (1 - threshold):
+                slower.append(r.name)
+    return slower
+
+
+def write_results(path: str, results: List[Result], version: str):
+    """Write the results to a json file along with what they were measured on
+
+    Args:
+        path (str): the json file
+        results (List[Result]): the results
+        version (str): the version of the sdk measured
+    """
+    data = {
+        "version": version,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": int(time.time()),
+        "results": [r._asdict() for r in results],
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def read_results(path: str) -> Dict[str, dict]:
+    """Read the results written by write_results
+
+    Args:
+        path (str): the json file
+
+    Raises:
+        ValueError: if the file holds no results
+
+    Returns:
+        Dict[str, dict]: the results by name
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or "results" not in data:
+        raise ValueError(f"{path} is not a file of benchmark results")
+    return {r["name"]: r for r in data["results"]}
+
+
+def run_all(
+    benchmarks: List[Benchmark], duration: float = 1.0, out=sys.stdout
+) -> List[Result]:
+    """Run the benchmarks one after the other, the name of each one is printed before it runs
+
+    Args:
+        benchmarks (List[Benchmark]): the benchmarks to run
+        duration (float, optional): the seconds spent timing each benchmark. Defaults to 1.
+        out (optional): where the progress is printed, None to print nothing. Defaults to stdout.
+
+    Returns:
+        List[Result]: the results in the order of the benchmarks
+    """
+    results = []
+    for benchmark in benchmarks:
+        if out is not None:
+            print(f"running {benchmark.name}...", file=out, flush=True)
+        results.append(run_benchmark(benchmark, duration))
+    return results
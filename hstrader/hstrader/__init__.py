@@ -1,2 +1,2 @@
 from .hstrader import HsTrader, __version__
-from .config import Config, Strategy
+from .config import Config, Strategy, TickDelivery, Overflow, Priority
@@ -1 +1 @@
-from .config import Config, Strategy
+from .config import Config, Strategy, TickDelivery, Overflow, Priority
@@ -1,7 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 import os
+import threading
 from enum import IntEnum
-from typing import Dict, List
+from typing import Dict, List, Optional
 from ..models import Symbol
 
 
@@ -18,6 +19,45 @@ class Strategy(IntEnum):
     HTTP = 2
 
 
+class TickDelivery(IntEnum):
+    """TickDelivery determines how the ticks are passed to the market handler
+
+    ALL: every tick is passed to the handler as soon as it's received
+    CONFLATE: only the latest tick of each symbol is kept until the handler is free to take it
+    QUEUE: the ticks are kept in a bounded queue until the handler is free to take them
+    """
+
+    ALL = 0
+    CONFLATE = 1
+    QUEUE = 2
+
+
+class Overflow(IntEnum):
+    """Overflow determines what a bounded queue does when it's full
+
+    DROP_OLDEST: the oldest item is dropped to make room for the new one
+    DROP_NEWEST: the new item is dropped
+    """
+
+    DROP_OLDEST = 0
+    DROP_NEWEST = 1
+
+
+class Priority(IntEnum):
+    """Priority determines the order in which the messages waiting for the rate limiter are sent
+
+    CRITICAL: the messages reducing the risk, canceling an order or closing a position
+    ORDER: the messages creating or updating orders and positions
+    NORMAL: the other requests, e.g. getting the account or the market history
+    FEED: the messages starting or stopping the market feed
+    """
+
+    CRITICAL = 0
+    ORDER = 1
+    NORMAL = 2
+    FEED = 3
+
+
 class Config(BaseModel):
     """Config is a class that holds the configuration for the client about the server and the communication and logging
 
@@ -26,6 +66,45 @@ class Config(BaseModel):
         timeout (int, optional): the timeout for the http requests. Defaults to 5.
         log_path (str, optional): the path of the log file. Defaults to "./logs/vertexfx.log".
         strategy (Strategy, optional): the strategy to use for the communication with the server. Defaults to Strategy.AUTO.
+        secure (bool, optional): connect with https and wss, disable it for a local server without tls,
+            e.g. the mock server. Defaults to True.
+        pool_connections (int, optional): the number of host connection pools kept by the http session. Defaults to 10.
+        pool_maxsize (int, optional): the maximum number of keep-alive connections kept per host,
+            also the number of async http requests running at the same time. Defaults to 10.
+        pool_block (bool, optional): block when all the connections of a host are in use instead of opening a new one. Defaults to False.
+        keep_alive (bool, optional): reuse the http connections between requests. Defaults to True.
+        raw_ticks (bool, optional): pass RawTick tuples to the market handlers instead of validated Tick models. Defaults to False.
+        tick_delivery (TickDelivery, optional): how the ticks are passed to the market handler when it's slower than the feed,
+            the ticks skipped are counted in their dropped field. Defaults to TickDelivery.ALL.
+        tick_queue_size (int, optional): the maximum number of ticks waiting for the handler with TickDelivery.QUEUE. Defaults to 1000.
+        tick_overflow (Overflow, optional): which tick is dropped when the queue is full. Defaults to Overflow.DROP_OLDEST.
+        tick_window_capacity (int, optional): the number of ticks kept per symbol by the tick window, 32 bytes per tick. Defaults to 10000.
+        trusted_payloads (bool, optional): build the orders, positions, deals, symbols and bars received from the server
+            without validating them, only the enums and the times are converted, the models built by the user are still
+            validated. Defaults to False.
+        handler_workers (int, optional): the number of workers of the pools running the handlers dispatched
+            to threads or processes, None lets the pools pick it. Defaults to None.
+        handler_queue_size (int, optional): the maximum number of calls of a dispatched handler waiting for the previous
+            call of the same key, None for no limit. Defaults to 1000.
+        handler_overflow (Overflow, optional): which call is dropped when the calls of a key reach handler_queue_size.
+            Defaults to Overflow.DROP_OLDEST.
+        server_feed_filter (bool, optional): send the symbols of the market feed to the server so it only sends their ticks,
+            otherwise the ticks of the other symbols are dropped by the client before being decoded. Defaults to False.
+        rate_limit (float, optional): the maximum number of http requests and websocket messages sent per second,
+            the messages over the limit wait their turn by Priority, None disables the limit. Defaults to None.
+            With a limit, the blocking http methods must not be called from an inline handler, they would block the
+            event loop while its messages wait for the limiter, a RuntimeError is raised then, use the async methods.
+        rate_limit_burst (int, optional): the number of messages that can be sent at once before the limit applies.
+            Defaults to rate_limit.
+        symbols_cache_path (str, optional): the file where the symbols are saved, when set the client starts with the saved
+            symbols and refreshes them in the background instead of waiting for the server. Defaults to None.
+        history_cache_path (str, optional): the directory where the cached market history is stored. Defaults to None.
+        state_history_size (int, optional): the number of finished orders, of closed positions and of deals kept by
+            the mirror of track_state, None keeps them all. Defaults to 1000.
+        reconnect (bool, optional): reopen the websocket connection automatically when it drops. Defaults to False.
+        reconnect_max_attempts (int, optional): give up after this many failed reconnection attempts in a row, None retries forever. Defaults to None.
+        reconnect_min_delay (float, optional): the delay in seconds before the first reconnection attempt, doubled on every failure. Defaults to 0.5.
+        reconnect_max_delay (float, optional): the maximum delay in seconds between two reconnection attempts. Defaults to 30.
     """
 
     timeout: int
@@ -33,6 +112,32 @@ class Config(BaseModel):
     disable_logging: bool
     url: str
 
+    secure: bool = True
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    pool_block: bool = False
+    keep_alive: bool = True
+    raw_ticks: bool = False
+    tick_delivery: TickDelivery = TickDelivery.ALL
+    tick_queue_size: int = 1000
+    tick_overflow: Overflow = Overflow.DROP_OLDEST
+    tick_window_capacity: int = 10000
+    trusted_payloads: bool = False
+    handler_workers: Optional[int] = None
+    handler_queue_size: Optional[int] = 1000
+    handler_overflow: Overflow = Overflow.DROP_OLDEST
+    server_feed_filter: bool = False
+    rate_limit: Optional[float] = None
+    rate_limit_burst: Optional[int] = None
+    history_cache_path: Optional[str] = None
+    symbols_cache_path: Optional[str] = None
+    state_history_size: Optional[int] = 1000
+
+    reconnect: bool = False
+    reconnect_max_attempts: Optional[int] = None
+    reconnect_min_delay: float = 0.5
+    reconnect_max_delay: float = 30
+
     account_id: int = None
     access_token: str = None
     refresh_token: str = None
@@ -42,6 +147,16 @@ class Config(BaseModel):
 
     symbols: Dict[int, Symbol] = {}
 
+    _session = PrivateAttr(default=None)
+    _executor = PrivateAttr(default=None)
+    _handler_threads = PrivateAttr(default=None)
+    _handler_processes = PrivateAttr(default=None)
+    _adjusters: dict = PrivateAttr(default_factory=dict)
+    _symbols_lock = PrivateAttr(default_factory=threading.Lock)
+    _symbols_sequence: int = PrivateAttr(default=0)
+    _symbols_updated: dict = PrivateAttr(default_factory=dict)
+    _rate_limiter = PrivateAttr(default=None)
+
     def __init__(
         self,
         url: str,
@@ -88,13 +203,34 @@ class Config(BaseModel):
             raise ValueError("You need to login first to get the token")
         return self.access_token
 
-    def set_symbols(self, symbols: List[Symbol]) -> None:
+    def get_symbols_sequence(self) -> int:
+        """get the sequence of the symbol updates, taken before requesting the symbols and given to set_symbols
+        so the symbols set in the meantime are not overwritten
+
+        Returns:
+            int: the number of symbols set so far
+        """
+        return self._symbols_sequence
+
+    def set_symbols(self, symbols: List[Symbol], since: int = None) -> None:
         """set the symbols
 
         Args:
             symbols (List[Symbol]): the symbols
+            since (int, optional): the sequence from get_symbols_sequence when the symbols were requested,
+                the symbols set by set_symbol after it are kept. Defaults to None, every symbol is replaced.
         """
-        self.symbols = {symbol.id: symbol for symbol in symbols}
+        with self._symbols_lock:
+            replaced = {symbol.id: symbol for symbol in symbols}
+            updated = {}
+            if since is not None:
+                for symbol_id, sequence in self._symbols_updated.items():
+                    if sequence > since and symbol_id in self.symbols:
+                        replaced[symbol_id] = self.symbols[symbol_id]
+                        updated[symbol_id] = sequence
+            self.symbols = replaced
+            self._symbols_updated = updated
+            self._adjusters = {}
 
     def set_symbol(self, symbol: Symbol) -> None:
         """set the symbol
@@ -103,7 +239,14 @@ class Config(BaseModel):
             symbol (Symbol): the symbol
         """
         if symbol is not None and symbol.id != 0:
-            self.symbols[symbol.id] = symbol
+            with self._symbols_lock:
+                self._symbols_sequence += 1
+                self._symbols_updated[symbol.id] = self._symbols_sequence
+                self.symbols[symbol.id] = symbol
+                # the adjusters are copied so an adjuster of the previous symbol being cached goes to the old dict
+                adjusters = dict(self._adjusters)
+                adjusters.pop(symbol.id, None)
+                self._adjusters = adjusters
 
     def get_symbols(self) -> List[Symbol]:
         """get the symbols
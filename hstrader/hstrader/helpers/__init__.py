@@ -1,3 +1,10 @@
 
-from .http import HttpClient
+from .http import HttpClient, get_session, get_executor, run_async, close_session
 from .ws import WebSocketClient
+from .history_store import HistoryStore
+from .queues import ConflatingQueue, BoundedQueue
+from .dispatch import Dispatcher, get_handler_executor, close_handler_executors
+from .tick_window import TickWindow, TickRing, WindowTick
+from .candles import CandleAggregator, bar_start, bar_end
+from .rate_limit import RateLimiter, LaneMetrics, get_rate_limiter
+from .recorder import FrameRecorder, Frame, read_frames
@@ -0,0 +1,224 @@
+import datetime as dt
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+from ..models import Bar, HistoryTick, MarketType, Resolution
+
+# the length of the resolutions of a fixed length in seconds
+_SECONDS = {
+    Resolution.M1: 60,
+    Resolution.M5: 5 * 60,
+    Resolution.M15: 15 * 60,
+    Resolution.M30: 30 * 60,
+    Resolution.H1: 60 * 60,
+    Resolution.H4: 4 * 60 * 60,
+    Resolution.D1: 24 * 60 * 60,
+    Resolution.W1: 7 * 24 * 60 * 60,
+}
+
+# the weeks start on monday, the epoch was a thursday
+_WEEK_OFFSET = 4 * 24 * 60 * 60
+
+
+def bar_start(resolution: Resolution, time: int) -> int:
+    """get the start of the bar of a resolution containing a time, in utc
+
+    Args:
+        resolution (Resolution): the resolution of the bar
+        time (int): the time as an epoch
+
+    Returns:
+        int: the time the bar starts at as an epoch
+    """
+    if resolution == Resolution.MN1:
+        date = dt.datetime.fromtimestamp(time, dt.timezone.utc)
+        return int(
+            dt.datetime(date.year, date.month, 1, tzinfo=dt.timezone.utc).timestamp()
+        )
+    seconds = _SECONDS[resolution]
+    if resolution == Resolution.W1:
+        return time - (time - _WEEK_OFFSET) % seconds
+    return time - time % seconds
+
+
+def bar_end(resolution: Resolution, start: int) -> int:
+    """get the time the next bar starts at
+
+    Args:
+        resolution (Resolution): the resolution of the bar
+        start (int): the time the bar starts at as an epoch
+
+    Returns:
+        int: the time the next bar starts at as an epoch
+    """
+    if resolution == Resolution.MN1:
+        date = dt.datetime.fromtimestamp(start, dt.timezone.utc)
+        year, month = (
+            (date.year + 1, 1) if date.month == 12 else (date.year, date.month + 1)
+        )
+        return int(dt.datetime(year, month, 1, tzinfo=dt.timezone.utc).timestamp())
+    return start + _SECONDS[resolution]
+
+
+class CandleAggregator:
+    """Builds OHLCV bars of several resolutions from the ticks of the market feed, keeps the bar being built
+    and the last closed bars of every symbol and resolution, a bar is closed by the first tick of the next one
+
+    Args:
+        resolutions (List[Resolution], optional): the resolutions to build. Defaults to all of them.
+        type (MarketType, optional): the price the bars are built from. Defaults to MarketType.BID.
+        history (int, optional): the number of closed bars kept per symbol and resolution. Defaults to 500.
+        on_close (Callable, optional): called with every bar closed. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        resolutions: List[Union[Resolution, str]] = None,
+        type: Union[MarketType, str] = MarketType.BID,
+        history: int = 500,
+        on_close: Callable[[Bar], any] = None,
+    ):
+        self.resolutions = [Resolution(r) for r in (resolutions or list(Resolution))]
+        self.type = MarketType(type)
+        self.history = history
+        self.on_close = on_close
+        # the bar being built as [time, end, open, high, low, close, volume]
+        self.__current: Dict[Tuple[int, Resolution], list] = {}
+        self.__closed: Dict[Tuple[int, Resolution], deque] = {}
+
+    def on_tick(self, tick: any):
+        """Add a tick received from the market feed to the bars of its symbol
+
+        Args:
+            tick (RawTick | Tick): the tick, a Tick time is converted to an epoch
+        """
+        time = tick.time
+        if not isinstance(time, int):
+            time = int(time.timestamp())
+        price = tick.bid if self.type == MarketType.BID else tick.ask
+        symbol_id = tick.symbol_id
+        for resolution in self.resolutions:
+            key = (symbol_id, resolution)
+            bar = self.__current.get(key)
+            if bar is not None and bar[0] <= time < bar[1]:
+                if price > bar[3]:
+                    bar[3] = price
+                elif price < bar[4]:
+                    bar[4] = price
+                bar[5] = price
+                bar[6] += 1
+                continue
+            if bar is not None and time < bar[0]:
+                # a late tick of a closed bar
+                continue
+            if bar is not None:
+                self.__close(key, bar)
+            start = bar_start(resolution, time)
+            end = bar_end(resolution, start)
+            self.__current[key] = [start, end, price, price, price, price, 1]
+
+    def seed(
+        self,
+        symbol_id: int,
+        resolution: Union[Resolution, str],
+        bars: Iterable[Union[HistoryTick, Bar, tuple]],
+    ):
+        """Start the bars of a symbol from its market history so there is no gap before the first ticks,
+        the last bar becomes the bar being built, the previous ones are kept as closed bars without being emitted
+
+        Args:
+            symbol_id (int): the id of the symbol
+            resolution (Resolution | str): the resolution of the bars
+            bars (Iterable[HistoryTick | Bar | tuple]): the bars ordered by time, history ticks or
+                (time, open, high, low, close, volume) tuples with time as an epoch
+        """
+        resolution = Resolution(resolution)
+        key = (symbol_id, resolution)
+        closed = self.__get_closed(key)
+        closed.clear()
+        previous = None
+        for item in bars:
+            if isinstance(item, Bar):
+                time, values = item.time, item[3:]
+            elif isinstance(item, HistoryTick):
+                time = item.time
+                values = (item.open, item.high, item.low, item.close, item.volume)
+            else:
+                time, values = item[0], tuple(item[1:6])
+            if not isinstance(time, int):
+                time = int(time.timestamp())
+            if previous is not None:
+                closed.append(self.__to_bar(key, previous))
+            previous = [time, bar_end(resolution, time), *values]
+        if previous is not None:
+            self.__current[key] = previous
+
+    def current(
+        self, symbol_id: int, resolution: Union[Resolution, str]
+    ) -> Union[Bar, None]:
+        """get the bar being built
+
+        Args:
+            symbol_id (int): the id of the symbol
+            resolution (Resolution | str): the resolution of the bar
+
+        Returns:
+            Bar | None: the bar, None if no tick was received for the symbol
+        """
+        bar = self.__current.get((symbol_id, Resolution(resolution)))
+        if bar is None:
+            return None
+        return self.__to_bar((symbol_id, Resolution(resolution)), bar)
+
+    def closed(
+        self, symbol_id: int, resolution: Union[Resolution, str], n: int = None
+    ) -> List[Bar]:
+        """get the last closed bars
+
+        Args:
+            symbol_id (int): the id of the symbol
+            resolution (Resolution | str): the resolution of the bars
+            n (int, optional): how many bars to get. Defaults to None for all the bars kept.
+
+        Returns:
+            List[Bar]: the bars ordered by time
+        """
+        closed = self.__closed.get((symbol_id, Resolution(resolution)))
+        if not closed:
+            return []
+        if n is None or n >= len(closed):
+            return list(closed)
+        return list(closed)[len(closed) - n :]
+
+    def close_expired(self, now: int = None) -> List[Bar]:
+        """close the bars whose period is over without waiting for the next tick, e.g. on a quiet market
+
+        Args:
+            now (int, optional): the current time as an epoch. Defaults to the current time.
+
+        Returns:
+            List[Bar]: the bars closed
+        """
+        now = int(dt.datetime.now(dt.timezone.utc).timestamp()) if now is None else now
+        closed = []
+        for key, bar in list(self.__current.items()):
+            if bar[1] <= now:
+                del self.__current[key]
+                closed.append(self.__close(key, bar))
+        return closed
+
+    def __close(self, key: Tuple[int, Resolution], bar: list) -> Bar:
+        """keep a bar as closed and emit it"""
+        closed = self.__to_bar(key, bar)
+        self.__get_closed(key).append(closed)
+        if self.on_close is not None:
+            self.on_close(closed)
+        return closed
+
+    def __get_closed(self, key: Tuple[int, Resolution]) -> deque:
+        closed = self.__closed.get(key)
+        if closed is None:
+            closed = self.__closed[key] = deque(maxlen=self.history)
+        return closed
+
+    def __to_bar(self, key: Tuple[int, Resolution], bar: list) -> Bar:
+        return Bar(key[0], key[1], bar[0], bar[2], bar[3], bar[4], bar[5], bar[6])
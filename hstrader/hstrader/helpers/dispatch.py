@@ -0,0 +1,161 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Tuple, Union
+from ..config import Config, Overflow
+from ..models import Dispatch
+
+_executors_lock = threading.Lock()
+
+
+def get_handler_executor(config: Config, dispatch: Dispatch) -> Executor:
+    """get the executor running the handlers dispatched to a pool, created on the first call,
+    the handlers have their own pools so they can't starve the async http requests
+
+    Args:
+        config (Config): the configuration holding the number of workers
+        dispatch (Dispatch): Dispatch.THREAD_POOL or Dispatch.PROCESS_POOL
+
+    Returns:
+        Executor: the shared executor
+    """
+    attribute = (
+        "_handler_processes" if dispatch == Dispatch.PROCESS_POOL else "_handler_threads"
+    )
+    executor = getattr(config, attribute)
+    if executor is None:
+        with _executors_lock:
+            executor = getattr(config, attribute)
+            if executor is None:
+                if dispatch == Dispatch.PROCESS_POOL:
+                    executor = ProcessPoolExecutor(max_workers=config.handler_workers)
+                else:
+                    executor = ThreadPoolExecutor(
+                        max_workers=config.handler_workers,
+                        thread_name_prefix="hstrader-handler",
+                    )
+                setattr(config, attribute, executor)
+    return executor
+
+
+def close_handler_executors(config: Config) -> None:
+    """shut down the pools running the handlers of the config, the handlers running are not interrupted
+
+    Args:
+        config (Config): the configuration holding the pools
+    """
+    with _executors_lock:
+        executors = config._handler_threads, config._handler_processes
+        config._handler_threads, config._handler_processes = None, None
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def default_order_key(data: any) -> any:
+    """get the key ordering the calls of a handler, the symbol of a tick, the position of a profit or loss
+    and the id of an order, a position or a deal, every other call share the same key
+
+    Args:
+        data (any): the first argument of the handler
+
+    Returns:
+        any: the key, calls with the same key run one after the other in the order they were received
+    """
+    for name in ("id", "position_id", "symbol_id"):
+        key = getattr(data, name, None)
+        if key is not None:
+            return key
+    return None
+
+
+class Dispatcher:
+    """Runs a handler off the receive loop according to a dispatch policy, the calls sharing the same key
+    run one after the other in the order they were received, calls with different keys run concurrently.
+    The calls waiting for their key are bounded by config.handler_queue_size, config.handler_overflow
+    picks the call dropped when a key is full
+
+    Args:
+        config (Config): the configuration holding the pools
+        handler (Callable): the handler to run, it must be picklable with Dispatch.PROCESS_POOL
+        dispatch (Dispatch): where the handler runs
+        key (Callable, optional): gives the ordering key of a call from its first argument. Defaults to default_order_key.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        handler: Callable,
+        dispatch: Dispatch,
+        key: Callable = None,
+    ):
+        self.__config = config
+        self.__handler = handler
+        self.__dispatch = dispatch
+        self.__key = key if key is not None else default_order_key
+        self.__lanes: Dict[any, Tuple[asyncio.Task, Deque[tuple]]] = {}
+        self.__dropped = 0
+        # keep the signature of the handler so the argument count can still be checked
+        functools.update_wrapper(self, handler)
+        self.__code__ = handler.__code__
+
+    @property
+    def dropped(self) -> int:
+        """the number of calls dropped because their key was full"""
+        return self.__dropped
+
+    def __call__(self, *args) -> asyncio.Task:
+        """Schedule a call of the handler, it waits in the queue of its key while a previous call of the key runs
+
+        Returns:
+            asyncio.Task: the task running the calls of the key, done once none of them is left
+        """
+        key = self.__key(args[0]) if args else None
+        lane = self.__lanes.get(key)
+        if lane is None:
+            pending = deque([args])
+            task = asyncio.ensure_future(self.__drain(key, pending))
+            self.__lanes[key] = (task, pending)
+            return task
+
+        task, pending = lane
+        size = self.__config.handler_queue_size
+        if size is not None and len(pending) >= size:
+            self.__dropped += 1
+            if self.__config.handler_overflow == Overflow.DROP_NEWEST:
+                return task
+            pending.popleft()
+        pending.append(args)
+        return task
+
+    async def __drain(self, key: any, pending: Deque[tuple]):
+        """Run the calls of the key in order until none is left, then release the key"""
+        try:
+            while pending:
+                args = pending.popleft()
+                try:
+                    await self.__run(args)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if not self.__config.disable_logging:
+                        logging.error(f"Handler {self.__handler.__name__} failed: {e}")
+        finally:
+            # nothing is awaited between the last check of the queue and the release, no call can be lost
+            del self.__lanes[key]
+
+    async def __run(self, args: tuple):
+        """Run the handler"""
+        if self.__dispatch in (Dispatch.THREAD_POOL, Dispatch.PROCESS_POOL):
+            loop = asyncio.get_event_loop()
+            executor = get_handler_executor(self.__config, self.__dispatch)
+            return await loop.run_in_executor(executor, self.__handler, *args)
+
+        result = self.__handler(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
@@ -0,0 +1,21 @@
+import json
+from typing import Union
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency, the messages are parsed faster with it
+    orjson = None
+
+
+def json_loads(data: Union[str, bytes]) -> any:
+    """Parse a json document with orjson if it is installed, with the standard json module otherwise
+
+    Args:
+        data (str | bytes): the json document
+
+    Returns:
+        any: the parsed document
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,248 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import List, Tuple, Union
+
+# time (epoch seconds), open, high, low, close, volume
+_RECORD = struct.Struct("<qddddd")
+
+# the key of a series of bars: symbol id, resolution and market type
+HistoryKey = Tuple[int, str, str]
+
+# a raw bar: time, open, high, low, close, volume
+HistoryRecord = Tuple[int, float, float, float, float, float]
+
+
+class _Times:
+    """Exposes the times of the records of a memory map as a sequence to bisect them without reading the prices"""
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self.__buffer = buffer
+        self.__count = count
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __getitem__(self, index: int) -> int:
+        return struct.unpack_from("<q", self.__buffer, index * _RECORD.size)[0]
+
+
+class HistoryStore:
+    """Stores the raw bars of the market history on disk, one append-only file of fixed size records
+    ordered by time per symbol, resolution and market type, with the time range it covers next to it
+
+    Args:
+        path (str): the directory of the store, created if it does not exist
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+    def coverage(self, key: HistoryKey) -> Union[Tuple[int, int], None]:
+        """get the time range covered by the stored bars
+
+        Args:
+            key (HistoryKey): the key of the bars
+
+        Returns:
+            Tuple[int, int] | None: the first and last time covered, None if nothing is stored
+        """
+        try:
+            with open(self.__meta_path(key)) as f:
+                meta = json.load(f)
+            return meta["from"], meta["to"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def last_time(self, key: HistoryKey) -> Union[int, None]:
+        """get the time of the last stored bar
+
+        Args:
+            key (HistoryKey): the key of the bars
+
+        Returns:
+            int | None: the time of the last bar, None if nothing is stored
+        """
+        with self.__lock:
+            try:
+                with open(self.__data_path(key), "rb") as f:
+                    f.seek(0, os.SEEK_END)
+                    size = f.tell() - f.tell() % _RECORD.size
+                    if size == 0:
+                        return None
+                    f.seek(size - _RECORD.size)
+                    return _RECORD.unpack(f.read(_RECORD.size))[0]
+            except OSError:
+                return None
+
+    def read(self, key: HistoryKey, frm: int, to: int) -> List[HistoryRecord]:
+        """read the stored bars between two times, both included
+
+        Args:
+            key (HistoryKey): the key of the bars
+            frm (int): from which time
+            to (int): to which time
+
+        Returns:
+            List[HistoryRecord]: the bars ordered by time
+        """
+        with self.__lock:
+            with self.__map(key) as buffer:
+                if buffer is None:
+                    return []
+                start, end = self.__bounds(buffer, frm, to)
+                return list(
+                    _RECORD.iter_unpack(
+                        buffer[start * _RECORD.size : end * _RECORD.size]
+                    )
+                )
+
+    def read_array(self, key: HistoryKey, frm: int, to: int) -> "np.ndarray":
+        """read the stored bars between two times as a numpy structured array, requires numpy
+
+        Args:
+            key (HistoryKey): the key of the bars
+            frm (int): from which time
+            to (int): to which time
+
+        Returns:
+            np.ndarray: the bars with the fields time, open, high, low, close and volume
+        """
+        # imported here, the services import the helpers
+        from ..services.utils import require_numpy
+
+        np = require_numpy("HistoryStore.read_array")
+
+        dtype = np.dtype(
+            [
+                ("time", "<i8"),
+                ("open", "<f8"),
+                ("high", "<f8"),
+                ("low", "<f8"),
+                ("close", "<f8"),
+                ("volume", "<f8"),
+            ]
+        )
+        with self.__lock:
+            with self.__map(key) as buffer:
+                if buffer is None:
+                    return np.empty(0, dtype=dtype)
+                start, end = self.__bounds(buffer, frm, to)
+                return np.frombuffer(
+                    buffer, dtype=dtype, count=end - start, offset=start * _RECORD.size
+                ).copy()
+
+    def write(
+        self, key: HistoryKey, records: List[HistoryRecord], frm: int, to: int
+    ) -> None:
+        """store the bars fetched between two times, the covered range is extended with them,
+        bars at a time already stored replace the stored ones
+
+        Args:
+            key (HistoryKey): the key of the bars
+            records (List[HistoryRecord]): the bars ordered by time
+            frm (int): the time the bars were fetched from
+            to (int): the time the bars were fetched to
+        """
+        with self.__lock:
+            coverage = self.coverage(key)
+            if coverage is not None:
+                frm, to = min(frm, coverage[0]), max(to, coverage[1])
+
+            if records:
+                self.__write_records(key, records)
+            with open(self.__meta_path(key), "w") as f:
+                json.dump({"from": frm, "to": to}, f)
+
+    def clear(self, key: HistoryKey) -> None:
+        """remove the stored bars
+
+        Args:
+            key (HistoryKey): the key of the bars
+        """
+        with self.__lock:
+            for path in (self.__meta_path(key), self.__data_path(key)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def __write_records(self, key: HistoryKey, records: List[HistoryRecord]):
+        """append the records to the file, the stored records from the first new time are replaced,
+        the file is rewritten only if the records do not extend its end
+
+        Args:
+            key (HistoryKey): the key of the bars
+            records (List[HistoryRecord]): the bars ordered by time
+        """
+        path = self.__data_path(key)
+        with self.__map(key) as buffer:
+            stored = 0 if buffer is None else len(buffer) // _RECORD.size
+            times = None if buffer is None else _Times(buffer, stored)
+            start = 0 if times is None else bisect.bisect_left(times, records[0][0])
+            appending = start == stored or times[stored - 1] <= records[-1][0]
+            if not appending:
+                merged = {
+                    record[0]: record
+                    for record in _RECORD.iter_unpack(buffer[: stored * _RECORD.size])
+                }
+
+        if appending:
+            with open(path, "ab") as f:
+                f.truncate(start * _RECORD.size)
+                f.write(b"".join(_RECORD.pack(*record) for record in records))
+            return
+
+        merged.update((record[0], record) for record in records)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(b"".join(_RECORD.pack(*merged[t]) for t in sorted(merged)))
+        os.replace(temporary, path)
+
+    def __bounds(self, buffer: mmap.mmap, frm: int, to: int) -> Tuple[int, int]:
+        """find the indexes of the records between two times
+
+        Returns:
+            Tuple[int, int]: the index of the first record and the index after the last one
+        """
+        times = _Times(buffer, len(buffer) // _RECORD.size)
+        return bisect.bisect_left(times, frm), bisect.bisect_right(times, to)
+
+    def __map(self, key: HistoryKey) -> "_Map":
+        return _Map(self.__data_path(key))
+
+    def __data_path(self, key: HistoryKey) -> str:
+        return os.path.join(self.path, "{}_{}_{}.bin".format(*key))
+
+    def __meta_path(self, key: HistoryKey) -> str:
+        return os.path.join(self.path, "{}_{}_{}.json".format(*key))
+
+
+class _Map:
+    """Context manager mapping a file in memory for reading, gives None if the file is missing or empty"""
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__file = None
+        self.__buffer = None
+
+    def __enter__(self) -> Union[mmap.mmap, None]:
+        try:
+            self.__file = open(self.__path, "rb")
+        except OSError:
+            return None
+        if os.fstat(self.__file.fileno()).st_size < _RECORD.size:
+            return None
+        self.__buffer = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.__buffer
+
+    def __exit__(self, *exc_info):
+        if self.__buffer is not None:
+            self.__buffer.close()
+        if self.__file is not None:
+            self.__file.close()
@@ -1,26 +1,123 @@
+import asyncio
+import functools
 import requests
-from typing import Union
-from ..config import Config
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Callable, Union
+from ..config import Config, Priority
 from ..models import BaseResponse
 from typing_extensions import Self
 from pydantic import BaseModel
-from typing import Callable
 from .user_agent import __USER_AGENT__
-
-http_method_to_string = {
-    requests.get: "GET",
-    requests.post: "POST",
-    requests.put: "PUT",
-    requests.patch: "PATCH",
-    requests.delete: "DELETE",
-}
+from .fast_json import json_loads
+from .rate_limit import get_rate_limiter
+
+_session_lock = threading.Lock()
+
+
+def get_session(config: Config) -> requests.Session:
+    """get the http session of the config, the session is created on the first call
+    and then reused by every HttpClient sharing the same config so the connections are kept alive
+
+    Args:
+        config (Config): the configuration holding the pool settings
+
+    Returns:
+        requests.Session: the pooled session
+    """
+    session = config._session
+    if session is None:
+        with _session_lock:
+            session = config._session
+            if session is None:
+                session = _create_session(config)
+                config._session = session
+    return session
+
+
+def get_executor(config: Config) -> ThreadPoolExecutor:
+    """get the executor running the async http requests of the config,
+    it has as many workers as pooled connections so every worker owns a keep-alive connection
+
+    Args:
+        config (Config): the configuration holding the pool settings
+
+    Returns:
+        ThreadPoolExecutor: the shared executor
+    """
+    executor = config._executor
+    if executor is None:
+        with _session_lock:
+            executor = config._executor
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=config.pool_maxsize, thread_name_prefix="hstrader-http"
+                )
+                config._executor = executor
+    return executor
+
+
+async def run_async(config: Config, f: Callable, *args, **kwargs) -> any:
+    """run a blocking http call on the shared executor without blocking the event loop
+
+    Args:
+        config (Config): the configuration holding the pool settings
+        f (Callable): the blocking function to run
+
+    Returns:
+        any: whatever the function returns
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_executor(config), functools.partial(f, *args, **kwargs)
+    )
+
+
+def close_session(config: Config) -> None:
+    """close the http session of the config and release its pooled connections and workers
+
+    Args:
+        config (Config): the configuration holding the session
+    """
+    with _session_lock:
+        session, executor = config._session, config._executor
+        config._session, config._executor = None, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+    if session is not None:
+        session.close()
+
+
+def _create_session(config: Config) -> requests.Session:
+    """create a new session with a connection pool sized from the config
+
+    Args:
+        config (Config): the configuration holding the pool settings
+
+    Returns:
+        requests.Session: the new session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not config.keep_alive:
+        session.headers["Connection"] = "close"
+    return session
 
 
 class HttpClient:
     def __init__(self, config: Config, url: str) -> None:
         self.__config: Config = config
-        self.url = "https://" + self.__config.get_url() + url
+        scheme = "https://" if self.__config.secure else "http://"
+        self.url = scheme + self.__config.get_url() + url
         self.headers = {"User-Agent": __USER_AGENT__}
+        self.priority = Priority.NORMAL
 
     def set_authorization_header(self, token: str) -> Self:
         """set the authorization header
@@ -46,6 +143,18 @@ class HttpClient:
             self.headers[key] = value
         return self
 
+    def set_priority(self, priority: Priority) -> Self:
+        """set the priority of the request when it waits for the rate limiter
+
+        Args:
+            priority (Priority): the priority of the request
+
+        Returns:
+            Self: same instance of HttpClient
+        """
+        self.priority = Priority(priority)
+        return self
+
     def get(self, params=None) -> Union[BaseResponse, None]:
         """perform a get request
 
@@ -53,7 +162,7 @@ class HttpClient:
             BaseResponse|None: the standard response from the server
         """
         response = self.__send_request(
-            requests.get,
+            "GET",
             url=self.url,
             headers=self.headers,
             params=params,
@@ -76,7 +185,7 @@ class HttpClient:
         if isinstance(data, BaseModel):
             data = data.model_dump()
         response = self.__send_request(
-            requests.post,
+            "POST",
             url=self.url,
             json=data,
             headers=self.headers,
@@ -99,7 +208,7 @@ class HttpClient:
             data = data.model_dump()
 
         response = self.__send_request(
-            requests.put,
+            "PUT",
             url=self.url,
             json=data,
             headers=self.headers,
@@ -121,7 +230,7 @@ class HttpClient:
         if isinstance(data, BaseModel):
             data = data.model_dump()
         response = self.__send_request(
-            requests.patch,
+            "PATCH",
             url=self.url,
             json=data,
             headers=self.headers,
@@ -134,7 +243,7 @@ class HttpClient:
     def delete(self) -> None:
         """perform a delete request"""
         response = self.__send_request(
-            requests.delete,
+            "DELETE",
             url=self.url,
             headers=self.headers,
             timeout=self.__config.timeout,
@@ -146,6 +255,57 @@ class HttpClient:
         #     return None
         # return response.json()
 
+    async def get_async(self, params=None) -> Union[BaseResponse, None]:
+        """perform a get request without blocking the event loop
+
+        Returns:
+            BaseResponse|None: the standard response from the server
+        """
+        return await run_async(self.__config, self.get, params)
+
+    async def post_async(
+        self, data: Union[dict, BaseModel] = None
+    ) -> Union[BaseResponse, None]:
+        """perform a post request without blocking the event loop
+
+        Args:
+            data (Union[dict, BaseModel], optional): the data to post. Defaults to None.
+
+        Returns:
+            BaseResponse|None: the standard response from the server
+        """
+        return await run_async(self.__config, self.post, data)
+
+    async def put_async(
+        self, data: Union[dict, BaseModel] = None
+    ) -> Union[BaseResponse, None]:
+        """perform a put request without blocking the event loop
+
+        Args:
+            data (Union[dict, BaseModel], optional): the data to update. Defaults to None.
+
+        Returns:
+            BaseResponse|None: the standard response from the server
+        """
+        return await run_async(self.__config, self.put, data)
+
+    async def patch_async(
+        self, data: Union[dict, BaseModel] = None
+    ) -> Union[BaseResponse, None]:
+        """perform a patch request without blocking the event loop
+
+        Args:
+            data (Union[dict, BaseModel], optional): the data to update. Defaults to None.
+
+        Returns:
+            BaseResponse|None: the standard response from the server
+        """
+        return await run_async(self.__config, self.patch, data)
+
+    async def delete_async(self) -> None:
+        """perform a delete request without blocking the event loop"""
+        return await run_async(self.__config, self.delete)
+
     def __check_response(self, response: requests.Response) -> BaseResponse:
         """check the response from the server and raise an error if the response is not successful
 
@@ -161,7 +321,7 @@ class HttpClient:
         baseResp: BaseResponse = None
 
         if response.status_code == 200:
-            baseResp = BaseResponse(**response.json())
+            baseResp = BaseResponse(**json_loads(response.content))
             return baseResp
         try:
             response.raise_for_status()
@@ -191,11 +351,15 @@ class HttpClient:
         """
 
     # decorator to automatically print the logs for the request and response
-    def __send_request(self, f: Callable, **kwargs) -> requests.Response:
-        """send the request and log the request and response
+    def __send_request(self, method: str, **kwargs) -> requests.Response:
+        """send the request through the pooled session and log the request and response,
+        waits for the rate limiter first if the config sets one
 
         Args:
-            f (Callable): the function to send the request
+            method (str): the http method of the request
+
+        Raises:
+            RuntimeError: if the request would wait for the limiter on the event loop while its messages wait too
 
         Returns:
             requests.Response: the response from the server
@@ -203,20 +367,10 @@ class HttpClient:
         url = kwargs.get("url")
         headers = kwargs.get("headers")
         body = kwargs.get("json")
-        method = self.__get_method(f)
+        limiter = get_rate_limiter(self.__config)
+        if limiter is not None:
+            limiter.acquire(self.priority)
         self.__log_request(method, url, headers, body)
-        response = f(**kwargs)
+        response = get_session(self.__config).request(method, **kwargs)
         self.__log_response(response)
         return response
-
-    def __get_method(self, method: Callable) -> str:
-        """get the method of the request
-
-        Args:
-            method (Callable): the method of the request
-
-        Returns:
-            str: the method of the request
-        """
-
-        return http_method_to_string.get(method)
@@ -0,0 +1,105 @@
+import asyncio
+from collections import deque
+from typing import Dict, Tuple
+from ..config import Overflow
+
+
+class ConflatingQueue:
+    """Keeps only the latest item of each key until it's consumed, keys are consumed in the order they first arrived,
+    the number of items replaced before being consumed is given with each item
+    """
+
+    def __init__(self):
+        self.__items: Dict[any, Tuple[any, int]] = {}
+        self.__ready = asyncio.Event()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def put(self, key: any, item: any):
+        """Add an item, the pending item of the same key is replaced
+
+        Args:
+            key (any): the key of the item, e.g. the symbol id of a tick
+            item (any): the item
+        """
+        pending = self.__items.get(key)
+        if pending is None:
+            self.__items[key] = (item, 0)
+            self.__ready.set()
+        else:
+            self.__items[key] = (item, pending[1] + 1)
+            self.dropped += 1
+
+    async def get(self) -> Tuple[any, int]:
+        """Wait for an item
+
+        Returns:
+            Tuple[any, int]: the latest item of the oldest key and the number of items it replaced
+        """
+        while not self.__items:
+            self.__ready.clear()
+            await self.__ready.wait()
+        key = next(iter(self.__items))
+        return self.__items.pop(key)
+
+    def clear(self):
+        """Remove the pending items"""
+        self.__items.clear()
+
+
+class BoundedQueue:
+    """A first in first out queue of a maximum size, the overflow policy decides which item is dropped when it's full,
+    the number of items dropped since the previous one was consumed is given with each item
+
+    Args:
+        maxsize (int): the maximum number of pending items
+        overflow (Overflow, optional): what to drop when the queue is full. Defaults to Overflow.DROP_OLDEST.
+    """
+
+    def __init__(self, maxsize: int, overflow: Overflow = Overflow.DROP_OLDEST):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.__items = deque()
+        self.__maxsize = maxsize
+        self.__overflow = overflow
+        self.__ready = asyncio.Event()
+        self.__since_get = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def put(self, key: any, item: any):
+        """Add an item, one item is dropped if the queue is full
+
+        Args:
+            key (any): unused, kept to be interchangeable with ConflatingQueue
+            item (any): the item
+        """
+        if len(self.__items) >= self.__maxsize:
+            self.dropped += 1
+            self.__since_get += 1
+            if self.__overflow == Overflow.DROP_NEWEST:
+                return
+            self.__items.popleft()
+        self.__items.append(item)
+        self.__ready.set()
+
+    async def get(self) -> Tuple[any, int]:
+        """Wait for an item
+
+        Returns:
+            Tuple[any, int]: the oldest item and the number of items dropped since the previous one was consumed
+        """
+        while not self.__items:
+            self.__ready.clear()
+            await self.__ready.wait()
+        dropped, self.__since_get = self.__since_get, 0
+        return self.__items.popleft(), dropped
+
+    def clear(self):
+        """Remove the pending items"""
+        self.__items.clear()
+        self.__since_get = 0
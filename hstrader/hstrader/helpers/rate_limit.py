@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, NamedTuple, Union
+from ..config import Config, Priority
+
+_limiter_lock = threading.Lock()
+
+
+class LaneMetrics(NamedTuple):
+    """The metrics of a priority lane of a RateLimiter, wait_time is the total time waited in seconds"""
+
+    waiting: int
+    max_waiting: int
+    acquired: int
+    wait_time: float
+
+
+class RateLimiter:
+    """Token bucket shared by the threads sending http requests and the event loop sending websocket messages,
+    the callers waiting for a token are served by priority, e.g. a cancel goes before the new orders queued before it,
+    and in order of arrival within a priority
+
+    Args:
+        rate (float): the number of tokens added per second
+        burst (int, optional): the maximum number of tokens kept, the size of a burst sent without waiting. Defaults to rate.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.burst = max(1, int(burst if burst is not None else rate))
+        self.__tokens = float(self.burst)
+        self.__updated = time.monotonic()
+        self.__condition = threading.Condition()
+        self.__lanes: Dict[Priority, deque] = {priority: deque() for priority in Priority}
+        self.__max_waiting = dict.fromkeys(Priority, 0)
+        self.__acquired = dict.fromkeys(Priority, 0)
+        self.__wait_time = dict.fromkeys(Priority, 0.0)
+        # the event loops of the coroutines waiting, by ticket
+        self.__loops: Dict[object, asyncio.AbstractEventLoop] = {}
+
+    def acquire(self, priority: Union[Priority, int] = Priority.NORMAL):
+        """Take a token, blocking the thread until one is available for this priority
+
+        Args:
+            priority (Priority, optional): the lane of the caller. Defaults to Priority.NORMAL.
+
+        Raises:
+            RuntimeError: if the caller would have to wait on the thread of an event loop whose coroutines are waiting
+                for a token too, they can't take it while the loop is blocked, e.g. a request sent from an inline handler
+        """
+        priority = Priority(priority)
+        ticket = object()
+        started = time.monotonic()
+        loop = _get_running_loop()
+        with self.__condition:
+            self.__enter(priority, ticket)
+            try:
+                while True:
+                    delay = self.__take(priority, ticket)
+                    if delay == 0:
+                        break
+                    if loop is not None and loop in self.__loops.values():
+                        raise RuntimeError(
+                            "Can't wait for the rate limiter on the event loop while coroutines of the same loop "
+                            "are waiting for it, use the async methods or a non inline dispatch in the handlers"
+                        )
+                    self.__condition.wait(delay)
+            finally:
+                self.__leave(priority, ticket, started)
+
+    async def acquire_async(self, priority: Union[Priority, int] = Priority.NORMAL):
+        """Take a token without blocking the event loop, waiting until one is available for this priority
+
+        Args:
+            priority (Priority, optional): the lane of the caller. Defaults to Priority.NORMAL.
+        """
+        priority = Priority(priority)
+        ticket = object()
+        started = time.monotonic()
+        with self.__condition:
+            self.__enter(priority, ticket)
+            self.__loops[ticket] = asyncio.get_event_loop()
+        try:
+            while True:
+                with self.__condition:
+                    delay = self.__take(priority, ticket)
+                if delay == 0:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            with self.__condition:
+                self.__leave(priority, ticket, started)
+
+    def depth(self, priority: Union[Priority, int] = None) -> int:
+        """get the number of callers waiting for a token
+
+        Args:
+            priority (Priority, optional): the lane to count. Defaults to None for all of them.
+
+        Returns:
+            int: the number of callers waiting
+        """
+        with self.__condition:
+            if priority is not None:
+                return len(self.__lanes[Priority(priority)])
+            return sum(len(lane) for lane in self.__lanes.values())
+
+    def metrics(self) -> Dict[Priority, LaneMetrics]:
+        """get the metrics of every priority lane
+
+        Returns:
+            Dict[Priority, LaneMetrics]: the metrics by priority
+        """
+        with self.__condition:
+            return {
+                priority: LaneMetrics(
+                    len(lane),
+                    self.__max_waiting[priority],
+                    self.__acquired[priority],
+                    self.__wait_time[priority],
+                )
+                for priority, lane in self.__lanes.items()
+            }
+
+    def __enter(self, priority: Priority, ticket: object):
+        lane = self.__lanes[priority]
+        lane.append(ticket)
+        if len(lane) > self.__max_waiting[priority]:
+            self.__max_waiting[priority] = len(lane)
+
+    def __leave(self, priority: Priority, ticket: object, started: float):
+        """remove a caller from its lane once served or interrupted and wake the next callers"""
+        lane = self.__lanes[priority]
+        if lane and lane[0] is ticket:
+            lane.popleft()
+        elif ticket in lane:
+            lane.remove(ticket)
+        self.__loops.pop(ticket, None)
+        self.__wait_time[priority] += time.monotonic() - started
+        self.__condition.notify_all()
+
+    def __take(self, priority: Priority, ticket: object) -> float:
+        """take a token for a caller if it's the first of the highest lane waiting, the lock is held
+
+        Returns:
+            float: 0 if the token was taken, else the time to wait before trying again
+        """
+        now = time.monotonic()
+        self.__tokens = min(
+            self.burst, self.__tokens + (now - self.__updated) * self.rate
+        )
+        self.__updated = now
+        shortage = max(0.0, 1 - self.__tokens) / self.rate
+        for lane_priority, lane in self.__lanes.items():
+            if lane:
+                if lane_priority != priority or lane[0] is not ticket:
+                    # the callers ahead are woken when they leave, the sleeping coroutines check again
+                    return shortage + 1 / self.rate
+                break
+        if shortage > 0:
+            return shortage
+        self.__tokens -= 1
+        self.__acquired[priority] += 1
+        return 0
+
+
+def _get_running_loop() -> Union[asyncio.AbstractEventLoop, None]:
+    """get the event loop running in the current thread, None if there is none"""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_rate_limiter(config: Config) -> Union[RateLimiter, None]:
+    """get the rate limiter of the config shared by the http and the websocket messages,
+    it's created on the first call
+
+    Args:
+        config (Config): the configuration holding the rate limit
+
+    Returns:
+        RateLimiter | None: the limiter, None if config.rate_limit is not set
+    """
+    if config.rate_limit is None:
+        return None
+    limiter = config._rate_limiter
+    if limiter is None:
+        with _limiter_lock:
+            limiter = config._rate_limiter
+            if limiter is None:
+                limiter = RateLimiter(config.rate_limit, config.rate_limit_burst)
+                config._rate_limiter = limiter
+    return limiter
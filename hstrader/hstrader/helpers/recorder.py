@@ -0,0 +1,104 @@
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, NamedTuple, Union
+
+# the first bytes of a recording, the last one is the version of the format
+_MAGIC = b"HSWS\x01"
+
+# receive time (monotonic seconds), kind of frame, length of the frame
+_HEADER = struct.Struct("<dBI")
+
+_BINARY = 0
+_TEXT = 1
+
+
+class Frame(NamedTuple):
+    """A frame received from the websocket, time is the monotonic time it was received at in seconds,
+    data is bytes for the binary frames (ticks) and str for the text frames (json events and summaries)
+    """
+
+    time: float
+    data: Union[bytes, str]
+
+
+class FrameRecorder:
+    """Appends the raw frames received from the websocket to a compact binary log,
+    each frame is written as its receive time, its kind and its length followed by its bytes
+
+    Args:
+        path (str): the file of the log, a new log is created or the frames are appended to an existing one
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.frames = 0
+        self.__lock = threading.Lock()
+        self.__file: BinaryIO = open(path, "ab")
+        if self.__file.tell() == 0:
+            self.__file.write(_MAGIC)
+
+    def write(self, data: Union[bytes, str], received_at: float = None):
+        """Append a frame to the log, the frames written once the log is closed are dropped
+        since the receive loop may still hold the recorder while another thread stops the recording
+
+        Args:
+            data (bytes | str): the frame as received
+            received_at (float, optional): the monotonic time the frame was received at. Defaults to now.
+        """
+        if received_at is None:
+            received_at = time.monotonic()
+        if isinstance(data, str):
+            kind, data = _TEXT, data.encode()
+        else:
+            kind = _BINARY
+        with self.__lock:
+            if self.__file.closed:
+                return
+            self.__file.write(_HEADER.pack(received_at, kind, len(data)))
+            self.__file.write(data)
+            self.frames += 1
+
+    def flush(self):
+        """Write the buffered frames to the file"""
+        with self.__lock:
+            if not self.__file.closed:
+                self.__file.flush()
+
+    def close(self):
+        """Flush and close the log"""
+        with self.__lock:
+            if not self.__file.closed:
+                self.__file.close()
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_frames(path: str) -> Iterator[Frame]:
+    """Read the frames of a log written by a FrameRecorder, a frame cut by a crash at the end of the log is ignored
+
+    Args:
+        path (str): the file of the log
+
+    Raises:
+        ValueError: if the file is not a log of frames
+
+    Returns:
+        Iterator[Frame]: the frames in the order they were received
+    """
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a recording of websocket frames")
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            received_at, kind, length = _HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield Frame(received_at, data.decode() if kind == _TEXT else data)
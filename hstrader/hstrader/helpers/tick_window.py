@@ -0,0 +1,192 @@
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Union
+
+
+class WindowTick(NamedTuple):
+    """A tick kept in a TickWindow, time is an epoch int"""
+
+    bid: float
+    ask: float
+    volume: float
+    time: int
+
+
+class TickRing:
+    """Keeps the last ticks of a symbol in preallocated arrays, 32 bytes per tick whatever the number of ticks,
+    once full every new tick overwrites the oldest one
+
+    Args:
+        capacity (int): the maximum number of ticks kept
+    """
+
+    __slots__ = (
+        "capacity",
+        "__bids",
+        "__asks",
+        "__volumes",
+        "__times",
+        "__next",
+        "__count",
+    )
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.__bids = array("d", bytes(8 * capacity))
+        self.__asks = array("d", bytes(8 * capacity))
+        self.__volumes = array("d", bytes(8 * capacity))
+        self.__times = array("q", bytes(8 * capacity))
+        self.__next = 0
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __getitem__(self, index: int) -> WindowTick:
+        """get a tick by its position, 0 is the oldest tick kept and -1 the latest"""
+        if index < 0:
+            index += self.__count
+        if not 0 <= index < self.__count:
+            raise IndexError("tick index out of range")
+        i = (self.__next - self.__count + index) % self.capacity
+        return WindowTick(
+            self.__bids[i], self.__asks[i], self.__volumes[i], self.__times[i]
+        )
+
+    def __iter__(self) -> Iterator[WindowTick]:
+        for index in range(self.__count):
+            yield self[index]
+
+    def append(self, bid: float, ask: float, volume: float, time: int):
+        """Add a tick, the oldest one is overwritten if the ring is full
+
+        Args:
+            bid (float): the bid price
+            ask (float): the ask price
+            volume (float): the volume
+            time (int): the time as an epoch
+        """
+        i = self.__next
+        self.__bids[i] = bid
+        self.__asks[i] = ask
+        self.__volumes[i] = volume
+        self.__times[i] = time
+        self.__next = (i + 1) % self.capacity
+        if self.__count < self.capacity:
+            self.__count += 1
+
+    def last(self, n: int = None) -> List[WindowTick]:
+        """get the latest ticks
+
+        Args:
+            n (int, optional): how many ticks to get. Defaults to None for all the ticks kept.
+
+        Returns:
+            List[WindowTick]: the ticks ordered by time
+        """
+        count = self.__count if n is None else min(n, self.__count)
+        return [self[index] for index in range(self.__count - count, self.__count)]
+
+    def bids(self) -> array:
+        """get a copy of the bid prices ordered by time"""
+        return self.__ordered(self.__bids)
+
+    def asks(self) -> array:
+        """get a copy of the ask prices ordered by time"""
+        return self.__ordered(self.__asks)
+
+    def volumes(self) -> array:
+        """get a copy of the volumes ordered by time"""
+        return self.__ordered(self.__volumes)
+
+    def times(self) -> array:
+        """get a copy of the times ordered by time"""
+        return self.__ordered(self.__times)
+
+    def to_arrays(self) -> Dict[str, "np.ndarray"]:
+        """get the ticks as numpy columns ordered by time, requires numpy
+
+        Returns:
+            Dict[str, np.ndarray]: the columns bid, ask, volume and time
+        """
+        # imported here, the services import the helpers
+        from ..services.utils import require_numpy
+
+        np = require_numpy("TickRing.to_arrays")
+
+        return {
+            "bid": np.frombuffer(self.bids(), dtype=np.float64),
+            "ask": np.frombuffer(self.asks(), dtype=np.float64),
+            "volume": np.frombuffer(self.volumes(), dtype=np.float64),
+            "time": np.frombuffer(self.times(), dtype=np.int64),
+        }
+
+    def clear(self):
+        """Remove all the ticks, the memory is kept for the next ones"""
+        self.__next = 0
+        self.__count = 0
+
+    def memory_usage(self) -> int:
+        """get the memory used by the arrays in bytes"""
+        return 4 * 8 * self.capacity
+
+    def __ordered(self, values: array) -> array:
+        """copy the kept values of an array from the oldest to the latest"""
+        start = (self.__next - self.__count) % self.capacity
+        if start + self.__count <= self.capacity:
+            return values[start : start + self.__count]
+        return values[start:] + values[: self.__next]
+
+
+class TickWindow:
+    """Keeps a rolling window of the last ticks of every symbol, one TickRing per symbol created on its first tick
+
+    Args:
+        capacity (int): the maximum number of ticks kept per symbol
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.__rings: Dict[int, TickRing] = {}
+
+    def __len__(self) -> int:
+        return sum(len(ring) for ring in self.__rings.values())
+
+    def __contains__(self, symbol_id: int) -> bool:
+        return symbol_id in self.__rings
+
+    def on_tick(self, tick: any):
+        """Add a tick received from the market feed
+
+        Args:
+            tick (RawTick | Tick): the tick, a Tick time is converted to an epoch
+        """
+        ring = self.__rings.get(tick.symbol_id)
+        if ring is None:
+            ring = self.__rings[tick.symbol_id] = TickRing(self.capacity)
+        time = tick.time
+        if not isinstance(time, int):
+            time = int(time.timestamp())
+        ring.append(tick.bid, tick.ask, tick.volume, time)
+
+    def get(self, symbol_id: int) -> Union[TickRing, None]:
+        """get the ticks of a symbol
+
+        Args:
+            symbol_id (int): the id of the symbol
+
+        Returns:
+            TickRing | None: the ticks of the symbol, None if no tick was received for it
+        """
+        return self.__rings.get(symbol_id)
+
+    def symbols(self) -> List[int]:
+        """get the ids of the symbols having ticks"""
+        return list(self.__rings)
+
+    def memory_usage(self) -> int:
+        """get the memory used by the ticks of all the symbols in bytes"""
+        return sum(ring.memory_usage() for ring in self.__rings.values())
@@ -1,13 +1,23 @@
 import asyncio
+import random
+import time
 
 import websockets
-from ..config import Config
+from ..config import Config, Priority
 
-from typing import Callable
+from typing import Awaitable, Callable
 import inspect
 
 
 from .user_agent import __USER_AGENT__
+from .rate_limit import get_rate_limiter
+
+# websockets 14 replaced the extra_headers argument of connect by additional_headers
+_HEADERS_ARGUMENT = (
+    "extra_headers"
+    if "extra_headers" in inspect.signature(websockets.connect).parameters
+    else "additional_headers"
+)
 
 
 class WebSocketClient:
@@ -24,34 +34,134 @@ class WebSocketClient:
         self.__on_connect = None
         self.__on_disconnect = None
         self.__on_message = None
+        self.__before_reconnect = None
+        self.__on_reconnect = None
         self.__url = url
 
+        self.__stopped = False
+        self.__reconnecting = False
+        self.__waiter: asyncio.Future = None
+        self.__gap = None
+        self.__recorder = None
+
     async def start_async(self):
-        """Start the websocket connection asynchronously, this method should be called using asyncio
+        """Start the websocket connection asynchronously, this method should be called using asyncio,
+        if reconnect is enabled in the config the connection is reopened whenever it drops until stop is called
 
         Raises:
             ValueError: if the connection is already established
+            ConnectionError: if the connection could not be reopened after reconnect_max_attempts
         """
 
-        authorization_header = (
-            "Authorization", f"Bearer {self.__config.get_token()}")
-        user_agent_header = ("User-Agent", __USER_AGENT__)
-
         if self.__config.is_connected:
             raise ValueError("Already connected to the server")
 
-        async with websockets.connect(
-            self.__url, extra_headers=[authorization_header, user_agent_header]
-        ) as websocket:
-            self.__connection = websocket
-            await self.__handle_message(websocket)
+        self.__stopped = False
+        attempts = 0
+        disconnected_at = None
+        while True:
+            try:
+                async with websockets.connect(
+                    self.__url, **{_HEADERS_ARGUMENT: self.__get_headers()}
+                ) as websocket:
+                    self.__connection = websocket
+                    self.__reconnecting = False
+                    if disconnected_at is not None:
+                        self.__gap = (disconnected_at, attempts)
+                    attempts, disconnected_at = 0, None
+                    await self.__handle_message(websocket)
+            except (
+                OSError,
+                asyncio.TimeoutError,
+                websockets.exceptions.WebSocketException,
+            ) as e:
+                if self.__stopped or not self.__config.reconnect:
+                    raise e
+                error = e
+            else:
+                error = None
+
+            if self.__stopped or not self.__config.reconnect:
+                return
+
+            self.__reconnecting = True
+            if disconnected_at is None:
+                disconnected_at = time.time()
+            attempts += 1
+            max_attempts = self.__config.reconnect_max_attempts
+            if max_attempts is not None and attempts > max_attempts:
+                self.__reconnecting = False
+                raise ConnectionError(
+                    f"Could not reconnect to the server after {max_attempts} attempts"
+                ) from error
+
+            await self.__sleep(self.__get_backoff(attempts))
+            if self.__stopped:
+                self.__reconnecting = False
+                return
+            if self.__before_reconnect:
+                result = self.__before_reconnect()
+                if inspect.isawaitable(result):
+                    await result
 
     def stop(self):
         """Stop the websocket connection"""
-        if self.__connection is None or not self.__config.is_connected:
+        if self.__connection is None or (
+            not self.__config.is_connected and not self.__reconnecting
+        ):
             raise ValueError(
                 "You can't stop a connection without starting it first")
-        self._run(self.__connection.close)
+        self.__stopped = True
+        if self.__waiter is not None and not self.__waiter.done():
+            self.__waiter.set_result(None)
+        if self.__config.is_connected:
+            self._run(self.__connection.close)
+
+    def _set_url(self, url: str):
+        """Set the url used for the next connections
+
+        Args:
+            url (str): the websocket url
+        """
+        self.__url = url
+
+    def __get_headers(self) -> list:
+        """Get the headers sent when opening the connection, built on each connection to pick up a refreshed token
+
+        Returns:
+            list: the headers
+        """
+        authorization_header = (
+            "Authorization", f"Bearer {self.__config.get_token()}")
+        user_agent_header = ("User-Agent", __USER_AGENT__)
+        return [authorization_header, user_agent_header]
+
+    def __get_backoff(self, attempts: int) -> float:
+        """Get the delay before the next reconnection attempt, exponential with jitter
+
+        Args:
+            attempts (int): the number of attempts made so far
+
+        Returns:
+            float: the delay in seconds
+        """
+        delay = min(
+            self.__config.reconnect_max_delay,
+            self.__config.reconnect_min_delay * 2 ** (attempts - 1),
+        )
+        return delay * random.uniform(0.5, 1.0)
+
+    async def __sleep(self, delay: float):
+        """Sleep until the delay is over or stop is called
+
+        Args:
+            delay (float): the delay in seconds
+        """
+        self.__waiter = self.__loop.create_future()
+        try:
+            await asyncio.wait({self.__waiter}, timeout=delay)
+        finally:
+            self.__waiter = None
 
     def start(self):
         """Start the websocket connection, this function will block the current thread,
@@ -59,13 +169,58 @@ class WebSocketClient:
         """
         self.__loop.run_until_complete(self.start_async())
 
-    def _send_message(self, message: str):
-        """Send a message to the server, only for debugging purposes
+    def _run_until_complete(self, awaitable: Awaitable) -> any:
+        """Run an awaitable on the event loop of the client, blocking the current thread until it's done
 
         Args:
-            message (str): _description_
+            awaitable (Awaitable): the coroutine or future to run
+
+        Returns:
+            any: whatever the awaitable returns
         """
-        self.__loop.create_task(self.__connection.send(message))
+        return self.__loop.run_until_complete(awaitable)
+
+    def _send_message(
+        self, message: str, priority: Priority = Priority.NORMAL
+    ) -> asyncio.Task:
+        """Send a message to the server, after waiting for the rate limiter if the config sets one
+
+        Args:
+            message (str): the message to send
+            priority (Priority, optional): the priority of the message for the rate limiter. Defaults to Priority.NORMAL.
+
+        Returns:
+            asyncio.Task: the task sending the message
+        """
+        limiter = get_rate_limiter(self.__config)
+        if limiter is None:
+            return self.__loop.create_task(self.__connection.send(message))
+        return self.__loop.create_task(self.__send_limited(limiter, message, priority))
+
+    async def __send_limited(self, limiter: any, message: str, priority: Priority):
+        """wait for a token of the rate limiter then send the message on the current connection"""
+        await limiter.acquire_async(priority)
+        await self.__connection.send(message)
+
+    def _create_future(self) -> asyncio.Future:
+        """Create a new future attached to the event loop of the client
+
+        Returns:
+            asyncio.Future: the new future
+        """
+        return self.__loop.create_future()
+
+    def _call_later(self, delay: float, f: Callable, *args) -> asyncio.TimerHandle:
+        """Schedule a function to be called after a delay using the event loop
+
+        Args:
+            delay (float): the delay in seconds
+            f (Callable): the function to call
+
+        Returns:
+            asyncio.TimerHandle: the handle to cancel the call
+        """
+        return self.__loop.call_later(delay, f, *args)
 
     async def __handle_message(self, websocket: websockets.connect):
         """Handle the messages received from the server
@@ -82,13 +237,12 @@ class WebSocketClient:
             async for message in websocket:
                 if message is websockets.protocol.State.CLOSED:
                     break
+                if self.__recorder is not None:
+                    self.__recorder.write(message)
                 self.__run_on_message(message)
 
+        finally:
             self.__run_on_disconnect()
-        except Exception as e:
-            raise e
-            # self.__on_disconnect()
-            # self.__loop.stop()
 
     def _set_on_connect(self, handler: Callable):
         """Set the handler for the connect event
@@ -118,6 +272,30 @@ class WebSocketClient:
             )
         self.__on_disconnect = handler
 
+    def _set_before_reconnect(self, handler: Callable):
+        """Set the handler called before every reconnection attempt, it may be a coroutine function
+
+        Args:
+            handler (Callable): the handler to be called before reconnecting
+        """
+        if not callable(handler):
+            raise ValueError("Handler must be a callable")
+        self.__before_reconnect = handler
+
+    def _set_on_reconnect(self, handler: Callable):
+        """Set the handler for the reconnect event
+
+        Args:
+            handler (Callable): the handler to be called with the time the connection dropped
+                                and the number of attempts it took to reconnect
+        """
+        if not callable(handler):
+            raise ValueError("Handler must be a callable")
+        if handler.__code__.co_argcount != 2:
+            raise ValueError(
+                "Handler must take two arguments, disconnected_at and attempts")
+        self.__on_reconnect = handler
+
     def _set_on_message(self, handler: Callable):
         """Set the handler for the message event
 
@@ -131,6 +309,14 @@ class WebSocketClient:
                 "Handler must take two arguments, self and message")
         self.__on_message = handler
 
+    def _set_recorder(self, recorder: any):
+        """Set the recorder the frames received are written to before being handled
+
+        Args:
+            recorder (FrameRecorder | None): the recorder, None to stop recording
+        """
+        self.__recorder = recorder
+
     def __run_on_connect(self):
         """Run the on_connect handler if it's set
         """
@@ -139,6 +325,10 @@ class WebSocketClient:
         if self.__on_connect:
             self._run(self.__on_connect)
 
+        gap, self.__gap = self.__gap, None
+        if gap is not None and self.__on_reconnect:
+            self._run(self.__on_reconnect, *gap)
+
     def __run_on_disconnect(self):
         """Run the on_disconnect handler if it's set
         """
@@ -157,14 +347,16 @@ class WebSocketClient:
         if self.__on_message:
             self._run(self.__on_message, message)
 
-    def _create_task(self, f: Callable, *args, **kwargs):
+    def _create_task(self, f: Callable, *args, **kwargs) -> asyncio.Task:
         """Create a new task using the event loop
 
         Args:
             f (Callable): the function to run
 
+        Returns:
+            asyncio.Task: the task created
         """
-        self.__loop.create_task(f(*args, **kwargs))
+        return self.__loop.create_task(f(*args, **kwargs))
 
     def _run(self, f: Callable, *args, **kwargs) -> any:
         """Run a function, if the function is a coroutine function, it will be run using the event loop
@@ -8,9 +8,14 @@ from ..services import (
     AccountService,
     MarketService,
     DealService,
+    StateService,
 )
+from ..helpers import close_session, close_handler_executors, get_executor, run_async
 from ..models import *
-from typing import Callable, Union
+from typing import Callable, List, Union
+from concurrent import futures
+import asyncio
+import itertools
 
 __version__ = "1.0.0"
 
@@ -24,6 +29,7 @@ class HsTrader(
     AccountService,
     MarketService,
     DealService,
+    StateService,
 ):
     """Create a new instance client for any HS Trader server
 
@@ -44,7 +50,11 @@ class HsTrader(
         try:
             self.login(client_id, client_secret)
             SymbolService.__init__(self, self.__config)
-            self.__config.set_symbols(self.get_symbols())
+            # start with the saved symbols if any, they are refreshed in the background
+            if self.load_symbols():
+                self.refresh_symbols()
+            else:
+                self.get_symbols()
         except Exception as e:
             raise e from None
         WebSocketService.__init__(self, self.__config)
@@ -54,6 +64,25 @@ class HsTrader(
         AccountService.__init__(self, self.__config)
         MarketService.__init__(self, self.__config)
         DealService.__init__(self, self.__config)
+        StateService.__init__(self, self.__config)
+
+    def close(self) -> None:
+        """Release the pooled http connections and the handler pools held by the client,
+        the client can still be used afterwards, new pools will be created when needed,
+        the symbols are saved if symbols_cache_path is set so the symbol updates received are kept
+        and the recording of the frames is stopped
+        """
+        if self.__config.symbols_cache_path:
+            self.save_symbols()
+        self.stop_recording()
+        close_session(self.__config)
+        close_handler_executors(self.__config)
+
+    def __enter__(self) -> "HsTrader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def create_order(self, order: Union[CrtOrder, dict]) -> None:
         return self.__execute(
@@ -83,23 +112,259 @@ class HsTrader(
             WebSocketService.update_position, PositionService.update_position, position
         )
 
+    async def create_order_async(self, order: Union[CrtOrder, dict]) -> None:
+        return await self.__execute_async(
+            WebSocketService.create_order, OrderService.create_order, order
+        )
+
+    async def cancel_order_async(self, order_id: int) -> None:
+        return await self.__execute_async(
+            WebSocketService.cancel_order, OrderService.cancel_order, order_id
+        )
+
+    async def update_order_async(self, order: Union[UpdOrder, dict]) -> None:
+        return await self.__execute_async(
+            WebSocketService.update_order, OrderService.update_order, order
+        )
+
+    async def close_position_async(self, position_id: int, volume: float) -> None:
+        return await self.__execute_async(
+            WebSocketService.close_position,
+            PositionService.close_position,
+            ClsPosition(position_id=position_id, volume=volume),
+        )
+
+    async def update_position_async(self, position: Union[UpdPosition, dict]) -> None:
+        return await self.__execute_async(
+            WebSocketService.update_position, PositionService.update_position, position
+        )
+
+    def create_orders(
+        self, orders: List[Union[CrtOrder, dict]], max_concurrency: int = None
+    ) -> List[BatchResult]:
+        """send several orders at once over pooled http, blocks until every order is answered,
+        use create_orders_async to pipeline them over the websocket
+
+        Args:
+            orders (List[CrtOrder | dict]): the orders to send
+            max_concurrency (int, optional): the maximum number of requests running at the same time.
+                Defaults to config.pool_maxsize.
+
+        Returns:
+            List[BatchResult]: the result or the error of each order, in the order they were given
+        """
+        return self.__run_batch(OrderService.create_order, orders, max_concurrency)
+
+    def cancel_orders(
+        self, order_ids: List[int], max_concurrency: int = None
+    ) -> List[BatchResult]:
+        """cancel several orders at once over pooled http, see create_orders
+
+        Args:
+            order_ids (List[int]): the ids of the orders to cancel
+            max_concurrency (int, optional): the maximum number of requests running at the same time.
+                Defaults to config.pool_maxsize.
+
+        Returns:
+            List[BatchResult]: the result or the error of each order, in the order they were given
+        """
+        return self.__run_batch(OrderService.cancel_order, order_ids, max_concurrency)
+
+    def close_positions(
+        self,
+        positions: List[Union[ClsPosition, Position]],
+        max_concurrency: int = None,
+    ) -> List[BatchResult]:
+        """close several positions at once over pooled http, see create_orders
+
+        Args:
+            positions (List[ClsPosition | Position]): the positions to close, a Position is closed entirely
+            max_concurrency (int, optional): the maximum number of requests running at the same time.
+                Defaults to config.pool_maxsize.
+
+        Returns:
+            List[BatchResult]: the result or the error of each position, in the order they were given
+        """
+        return self.__run_batch(
+            PositionService.close_position,
+            [self.__to_close(position) for position in positions],
+            max_concurrency,
+        )
+
+    def close_all(
+        self, symbol: Union[int, Symbol] = None, max_concurrency: int = None
+    ) -> List[BatchResult]:
+        """close all the open positions, or those of a symbol, at once over pooled http, see create_orders
+
+        Args:
+            symbol (int | Symbol, optional): the symbol of the positions to close. Defaults to None for all the symbols.
+            max_concurrency (int, optional): the maximum number of requests running at the same time.
+                Defaults to config.pool_maxsize.
+
+        Returns:
+            List[BatchResult]: the result or the error of each position
+        """
+        return self.close_positions(self.__open_positions(symbol), max_concurrency)
+
+    async def create_orders_async(
+        self, orders: List[Union[CrtOrder, dict]], max_concurrency: int = None
+    ) -> List[BatchResult]:
+        """send several orders at once, pipelined over the websocket if it's used, concurrently over pooled http otherwise
+
+        Args:
+            orders (List[CrtOrder | dict]): the orders to send
+            max_concurrency (int, optional): the maximum number of requests waiting for an answer at the same time.
+                Defaults to no limit over the websocket and config.pool_maxsize over http.
+
+        Returns:
+            List[BatchResult]: the result or the error of each order, in the order they were given
+        """
+        return await self.__run_batch_async(
+            WebSocketService.create_order,
+            OrderService.create_order,
+            orders,
+            max_concurrency,
+        )
+
+    async def cancel_orders_async(
+        self, order_ids: List[int], max_concurrency: int = None
+    ) -> List[BatchResult]:
+        """cancel several orders at once, see create_orders_async"""
+        return await self.__run_batch_async(
+            WebSocketService.cancel_order,
+            OrderService.cancel_order,
+            order_ids,
+            max_concurrency,
+        )
+
+    async def close_positions_async(
+        self,
+        positions: List[Union[ClsPosition, Position]],
+        max_concurrency: int = None,
+    ) -> List[BatchResult]:
+        """close several positions at once, a Position is closed entirely, see create_orders_async"""
+        return await self.__run_batch_async(
+            WebSocketService.close_position,
+            PositionService.close_position,
+            [self.__to_close(position) for position in positions],
+            max_concurrency,
+        )
+
+    async def close_all_async(
+        self, symbol: Union[int, Symbol] = None, max_concurrency: int = None
+    ) -> List[BatchResult]:
+        """close all the open positions, or those of a symbol, at once, see create_orders_async"""
+        positions = await run_async(self.__config, self.__open_positions, symbol)
+        return await self.close_positions_async(positions, max_concurrency)
+
+    def __run_batch(
+        self, http_func: Callable, items: list, max_concurrency: int = None
+    ) -> List[BatchResult]:
+        """run a request per item on the shared http executor and wait for all of them,
+        at most max_concurrency requests are submitted at once so the workers are left to the other requests"""
+        executor = get_executor(self.__config)
+        indexes = iter(range(len(items)))
+        running = {
+            executor.submit(http_func, self, items[index]): index
+            for index in itertools.islice(
+                indexes, max_concurrency or self.__config.pool_maxsize
+            )
+        }
+        results: List[BatchResult] = [None] * len(items)
+        while running:
+            done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                try:
+                    results[index] = BatchResult(items[index], future.result())
+                except Exception as e:
+                    results[index] = BatchResult(items[index], error=e)
+            # a request is submitted for each one done
+            for index in itertools.islice(indexes, len(done)):
+                running[executor.submit(http_func, self, items[index])] = index
+        return results
+
+    async def __run_batch_async(
+        self,
+        ws_func: Callable,
+        http_func: Callable,
+        items: list,
+        max_concurrency: int = None,
+    ) -> List[BatchResult]:
+        """run a request per item over the websocket if it's used or over http and wait for all of them"""
+        use_websocket = self.__use_websocket()
+        if max_concurrency is None and not use_websocket:
+            max_concurrency = self.__config.pool_maxsize
+        limit = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        async def send(item: any) -> any:
+            if use_websocket:
+                result = await ws_func(self, item)
+            else:
+                result = await run_async(self.__config, http_func, self, item)
+            # the server rejected the request sent over the websocket
+            if isinstance(result, Error):
+                raise ValueError(f"{result.message}: {result.reason}")
+            return result
+
+        async def run(item: any) -> any:
+            if limit is None:
+                return await send(item)
+            async with limit:
+                return await send(item)
+
+        outcomes = await asyncio.gather(
+            *(run(item) for item in items), return_exceptions=True
+        )
+        return [
+            (
+                BatchResult(item, error=outcome)
+                if isinstance(outcome, Exception)
+                else BatchResult(item, outcome)
+            )
+            for item, outcome in zip(items, outcomes)
+        ]
+
+    def __open_positions(self, symbol: Union[int, Symbol] = None) -> List[Position]:
+        """get the open positions, or those of a symbol"""
+        symbol_id = symbol.id if isinstance(symbol, Symbol) else symbol
+        return [
+            position
+            for position in PositionService.get_positions(self)
+            if position.status in (None, PositionStatus.OPEN)
+            and (symbol_id is None or position.symbol_id == symbol_id)
+        ]
+
+    def __to_close(self, position: Union[ClsPosition, Position]) -> ClsPosition:
+        """get the request closing a position entirely if a Position is given"""
+        if isinstance(position, Position):
+            return ClsPosition(position_id=position.id, volume=position.volume)
+        return position
+
     def __execute(self, ws_func: Callable, http_func: Callable, *args, **kwargs) -> any:
+        if self.__use_websocket():
+            return ws_func(self, *args, **kwargs)
+        return http_func(self, *args, **kwargs)
+
+    async def __execute_async(
+        self, ws_func: Callable, http_func: Callable, *args, **kwargs
+    ) -> any:
+        if self.__use_websocket():
+            return ws_func(self, *args, **kwargs)
+        return await run_async(self.__config, http_func, self, *args, **kwargs)
+
+    def __use_websocket(self) -> bool:
         if self.__config.strategy == Strategy.AUTO:
-            if self.__config.is_connected:
-                return ws_func(self, *args, **kwargs)
-            else:
-                return http_func(self, *args, **kwargs)
+            return self.__config.is_connected
 
         if self.__config.strategy == Strategy.WS:
             if self.__config.is_connected:
-                return ws_func(self, *args, **kwargs)
-            else:
-                raise ValueError(
-                    "You need to connect to the websocket first, or set the strategy to AUTO"
-                )
+                return True
+            raise ValueError(
+                "You need to connect to the websocket first, or set the strategy to AUTO"
+            )
 
-        if self.__config.strategy == Strategy.HTTP:
-            return http_func(self, *args, **kwargs)
+        return False
 
     def __login(self, identifier: str, password: str) -> None:
         self.login(identifier, password)
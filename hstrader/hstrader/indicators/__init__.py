@@ -0,0 +1,7 @@
+"""Technical indicators updated in O(1) per value, to be fed with the closed bars of the market feed
+(see WebSocketService.track_bars) or the history bars through on_bar, and their vectorized versions
+over numpy arrays in the batch module.
+"""
+
+from .incremental import SMA, RollingStd, Bollinger, EMA, MACD, RSI, Stochastic, ATR
+from . import batch
@@ -0,0 +1,176 @@
+"""Vectorized versions of the incremental indicators over a batch of history, they take numpy arrays
+of shape (bars,) or (bars, symbols) to compute many symbols at once and give the same values as the
+incremental indicators, NaN where those give None. The rolling indicators are computed over sliding windows,
+the recursive ones (EMA, MACD, RSI, ATR) loop over the bars and are vectorized over the symbols.
+"""
+
+from typing import Tuple
+from ..services.utils import require_numpy
+
+
+def _asarray(values) -> "np.ndarray":
+    np = require_numpy("the batch indicators")
+    return np.asarray(values, dtype=np.float64)
+
+
+def _windows(values: "np.ndarray", period: int) -> "np.ndarray":
+    """get the sliding windows of the bars, the window is the last axis"""
+    np = require_numpy("the batch indicators")
+    return np.lib.stride_tricks.sliding_window_view(values, period, axis=0)
+
+
+def _empty(values: "np.ndarray") -> "np.ndarray":
+    np = require_numpy("the batch indicators")
+    return np.full(values.shape, np.nan)
+
+
+def sma(values, period: int) -> "np.ndarray":
+    """simple moving average, see SMA
+
+    Args:
+        values (np.ndarray): the values, one row per bar
+        period (int): the number of values averaged
+
+    Returns:
+        np.ndarray: the averages
+    """
+    values = _asarray(values)
+    out = _empty(values)
+    if len(values) >= period:
+        out[period - 1 :] = _windows(values, period).mean(axis=-1)
+    return out
+
+
+def rolling_std(values, period: int, ddof: int = 1) -> "np.ndarray":
+    """rolling standard deviation, see RollingStd
+
+    Args:
+        values (np.ndarray): the values, one row per bar
+        period (int): the number of values in the window
+        ddof (int, optional): the delta degrees of freedom. Defaults to 1.
+
+    Returns:
+        np.ndarray: the standard deviations
+    """
+    values = _asarray(values)
+    out = _empty(values)
+    if len(values) >= period:
+        out[period - 1 :] = _windows(values, period).std(axis=-1, ddof=ddof)
+    return out
+
+
+def bollinger(
+    values, period: int = 20, k: float = 2, ddof: int = 1
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """bollinger bands, see Bollinger
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: the lower band, the mean and the upper band
+    """
+    mean = sma(values, period)
+    std = rolling_std(values, period, ddof)
+    return mean - k * std, mean, mean + k * std
+
+
+def ema(values, period: int) -> "np.ndarray":
+    """exponential moving average starting from the first value, see EMA
+
+    Args:
+        values (np.ndarray): the values, one row per bar
+        period (int): the span of the average
+
+    Returns:
+        np.ndarray: the averages
+    """
+    values = _asarray(values)
+    out = _empty(values)
+    if len(values) == 0:
+        return out
+    alpha = 2 / (period + 1)
+    out[0] = values[0]
+    for i in range(1, len(values)):
+        out[i] = out[i - 1] + alpha * (values[i] - out[i - 1])
+    return out
+
+
+def macd(
+    values, fast: int = 12, slow: int = 26, signal: int = 9
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """moving average convergence divergence, see MACD
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: the macd, the signal and the histogram
+    """
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def _wilder(values: "np.ndarray", period: int, first: int) -> "np.ndarray":
+    """smooth the values with the average of Wilder, the first average at row first is the mean of the period rows before it"""
+    out = _empty(values)
+    if len(values) <= first:
+        return out
+    out[first] = values[first - period + 1 : first + 1].mean(axis=0)
+    for i in range(first + 1, len(values)):
+        out[i] = (out[i - 1] * (period - 1) + values[i]) / period
+    return out
+
+
+def rsi(values, period: int = 14) -> "np.ndarray":
+    """relative strength index with the smoothing of Wilder, see RSI
+
+    Args:
+        values (np.ndarray): the values, one row per bar
+        period (int, optional): the smoothing period. Defaults to 14.
+
+    Returns:
+        np.ndarray: the indexes between 0 and 100
+    """
+    np = require_numpy("the batch indicators")
+    values = _asarray(values)
+    changes = np.zeros(values.shape)
+    changes[1:] = np.diff(values, axis=0)
+    gain = _wilder(np.where(changes > 0, changes, 0.0), period, period)
+    loss = _wilder(np.where(changes < 0, -changes, 0.0), period, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + gain / loss)
+    flat = loss == 0
+    out[flat] = np.where(gain[flat] > 0, 100.0, 50.0)
+    return out
+
+
+def stochastic(
+    high, low, close, k_period: int = 14, d_period: int = 3
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """stochastic oscillator, see Stochastic
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: %K and %D
+    """
+    np = require_numpy("the batch indicators")
+    high, low, close = _asarray(high), _asarray(low), _asarray(close)
+    k = _empty(close)
+    if len(close) >= k_period:
+        highest = _windows(high, k_period).max(axis=-1)
+        lowest = _windows(low, k_period).min(axis=-1)
+        span = highest - lowest
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = 100 * (close[k_period - 1 :] - lowest) / span
+        k[k_period - 1 :] = np.where(span == 0, 50.0, ratio)
+    return k, sma(k, d_period)
+
+
+def atr(high, low, close, period: int = 14) -> "np.ndarray":
+    """average true range with the smoothing of Wilder, see ATR
+
+    Returns:
+        np.ndarray: the average true ranges
+    """
+    np = require_numpy("the batch indicators")
+    high, low, close = _asarray(high), _asarray(low), _asarray(close)
+    true_range = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        true_range[1:] = np.maximum(high[1:], previous) - np.minimum(low[1:], previous)
+    return _wilder(true_range, period, period - 1)
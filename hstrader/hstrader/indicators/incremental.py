@@ -0,0 +1,368 @@
+import math
+from collections import deque
+from typing import Tuple, Union
+
+
+class SMA:
+    """Simple moving average updated in O(1) per value
+
+    Args:
+        period (int): the number of values averaged
+    """
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period must be at least 1")
+        self.period = period
+        self.value: Union[float, None] = None
+        self.__window = deque()
+        self.__sum = 0.0
+
+    def update(self, value: float) -> Union[float, None]:
+        """Add a value
+
+        Args:
+            value (float): the new value
+
+        Returns:
+            float | None: the average of the last period values, None until period values were added
+        """
+        self.__window.append(value)
+        self.__sum += value
+        if len(self.__window) > self.period:
+            self.__sum -= self.__window.popleft()
+        if len(self.__window) == self.period:
+            self.value = self.__sum / self.period
+        return self.value
+
+    def on_bar(self, bar: any) -> Union[float, None]:
+        """Add the close of a bar, see update"""
+        return self.update(bar.close)
+
+
+class RollingStd:
+    """Rolling mean and standard deviation updated in O(1) per value with a sliding Welford update,
+    which stays accurate where the sum of squares would cancel out
+
+    Args:
+        period (int): the number of values in the window
+        ddof (int, optional): the delta degrees of freedom, 1 for the sample deviation as pandas does. Defaults to 1.
+    """
+
+    def __init__(self, period: int, ddof: int = 1):
+        if period <= ddof:
+            raise ValueError("period must be greater than ddof")
+        self.period = period
+        self.ddof = ddof
+        self.mean: Union[float, None] = None
+        self.value: Union[float, None] = None
+        self.__window = deque()
+        self.__mean = 0.0
+        self.__m2 = 0.0
+
+    def update(self, value: float) -> Union[float, None]:
+        """Add a value
+
+        Args:
+            value (float): the new value
+
+        Returns:
+            float | None: the standard deviation of the last period values, None until period values were added
+        """
+        window = self.__window
+        window.append(value)
+        if len(window) <= self.period:
+            delta = value - self.__mean
+            self.__mean += delta / len(window)
+            self.__m2 += delta * (value - self.__mean)
+        else:
+            old = window.popleft()
+            mean = self.__mean + (value - old) / self.period
+            self.__m2 += (value - old) * (value - mean + old - self.__mean)
+            self.__mean = mean
+
+        if len(window) == self.period:
+            self.mean = self.__mean
+            self.value = math.sqrt(max(self.__m2, 0.0) / (self.period - self.ddof))
+        return self.value
+
+    def on_bar(self, bar: any) -> Union[float, None]:
+        """Add the close of a bar, see update"""
+        return self.update(bar.close)
+
+
+class Bollinger:
+    """Bollinger bands, the rolling mean plus and minus k rolling standard deviations
+
+    Args:
+        period (int, optional): the number of values in the window. Defaults to 20.
+        k (float, optional): the number of standard deviations. Defaults to 2.
+        ddof (int, optional): the delta degrees of freedom of the deviation. Defaults to 1.
+    """
+
+    def __init__(self, period: int = 20, k: float = 2, ddof: int = 1):
+        self.k = k
+        self.value: Union[Tuple[float, float, float], None] = None
+        self.__std = RollingStd(period, ddof)
+
+    def update(self, value: float) -> Union[Tuple[float, float, float], None]:
+        """Add a value
+
+        Args:
+            value (float): the new value
+
+        Returns:
+            Tuple[float, float, float] | None: the lower band, the mean and the upper band, None until period values were added
+        """
+        std = self.__std.update(value)
+        if std is not None:
+            mean = self.__std.mean
+            self.value = (mean - self.k * std, mean, mean + self.k * std)
+        return self.value
+
+    def on_bar(self, bar: any) -> Union[Tuple[float, float, float], None]:
+        """Add the close of a bar, see update"""
+        return self.update(bar.close)
+
+
+class EMA:
+    """Exponential moving average with a smoothing of 2 / (period + 1), starting from the first value
+    as pandas ewm(span=period, adjust=False) does
+
+    Args:
+        period (int): the span of the average
+    """
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period must be at least 1")
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.value: Union[float, None] = None
+
+    def update(self, value: float) -> float:
+        """Add a value
+
+        Args:
+            value (float): the new value
+
+        Returns:
+            float: the average
+        """
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+    def on_bar(self, bar: any) -> float:
+        """Add the close of a bar, see update"""
+        return self.update(bar.close)
+
+
+class MACD:
+    """Moving average convergence divergence, the difference of a fast and a slow EMA and its signal EMA
+
+    Args:
+        fast (int, optional): the period of the fast average. Defaults to 12.
+        slow (int, optional): the period of the slow average. Defaults to 26.
+        signal (int, optional): the period of the signal average. Defaults to 9.
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.value: Union[Tuple[float, float, float], None] = None
+        self.__fast = EMA(fast)
+        self.__slow = EMA(slow)
+        self.__signal = EMA(signal)
+
+    def update(self, value: float) -> Tuple[float, float, float]:
+        """Add a value
+
+        Args:
+            value (float): the new value
+
+        Returns:
+            Tuple[float, float, float]: the macd, the signal and the histogram
+        """
+        macd = self.__fast.update(value) - self.__slow.update(value)
+        signal = self.__signal.update(macd)
+        self.value = (macd, signal, macd - signal)
+        return self.value
+
+    def on_bar(self, bar: any) -> Tuple[float, float, float]:
+        """Add the close of a bar, see update"""
+        return self.update(bar.close)
+
+
+class RSI:
+    """Relative strength index with the smoothing of Wilder, the first averages are the means of the first period changes
+
+    Args:
+        period (int, optional): the smoothing period. Defaults to 14.
+    """
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError("period must be at least 1")
+        self.period = period
+        self.value: Union[float, None] = None
+        self.__previous: Union[float, None] = None
+        self.__count = 0
+        self.__gain = 0.0
+        self.__loss = 0.0
+
+    def update(self, value: float) -> Union[float, None]:
+        """Add a value
+
+        Args:
+            value (float): the new value
+
+        Returns:
+            float | None: the index between 0 and 100, None until period changes were added
+        """
+        previous, self.__previous = self.__previous, value
+        if previous is None:
+            return None
+        change = value - previous
+        gain, loss = (change, 0.0) if change > 0 else (0.0, -change)
+
+        if self.__count < self.period:
+            self.__count += 1
+            self.__gain += gain
+            self.__loss += loss
+            if self.__count < self.period:
+                return None
+            self.__gain /= self.period
+            self.__loss /= self.period
+        else:
+            self.__gain = (self.__gain * (self.period - 1) + gain) / self.period
+            self.__loss = (self.__loss * (self.period - 1) + loss) / self.period
+
+        if self.__loss == 0:
+            self.value = 100.0 if self.__gain > 0 else 50.0
+        else:
+            self.value = 100 - 100 / (1 + self.__gain / self.__loss)
+        return self.value
+
+    def on_bar(self, bar: any) -> Union[float, None]:
+        """Add the close of a bar, see update"""
+        return self.update(bar.close)
+
+
+class _RollingExtreme:
+    """The maximum or the minimum of the last period values in amortized O(1) with a monotonic deque"""
+
+    def __init__(self, period: int, maximum: bool):
+        self.__period = period
+        self.__maximum = maximum
+        self.__values = deque()
+        self.__index = 0
+
+    def update(self, value: float) -> float:
+        values = self.__values
+        if self.__maximum:
+            while values and values[-1][1] <= value:
+                values.pop()
+        else:
+            while values and values[-1][1] >= value:
+                values.pop()
+        values.append((self.__index, value))
+        if values[0][0] <= self.__index - self.__period:
+            values.popleft()
+        self.__index += 1
+        return values[0][1]
+
+
+class Stochastic:
+    """Stochastic oscillator, %K the position of the close in the range of the last k_period bars
+    and %D the simple average of the last d_period %K
+
+    Args:
+        k_period (int, optional): the number of bars of the range. Defaults to 14.
+        d_period (int, optional): the number of %K averaged. Defaults to 3.
+    """
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        if k_period < 1:
+            raise ValueError("k_period must be at least 1")
+        self.k_period = k_period
+        self.value: Union[Tuple[float, Union[float, None]], None] = None
+        self.__highest = _RollingExtreme(k_period, maximum=True)
+        self.__lowest = _RollingExtreme(k_period, maximum=False)
+        self.__d = SMA(d_period)
+        self.__count = 0
+
+    def update(
+        self, high: float, low: float, close: float
+    ) -> Union[Tuple[float, Union[float, None]], None]:
+        """Add a bar
+
+        Args:
+            high (float): the high of the bar
+            low (float): the low of the bar
+            close (float): the close of the bar
+
+        Returns:
+            Tuple[float, float | None] | None: %K and %D between 0 and 100, None until k_period bars were added,
+                %D is None until d_period %K were computed
+        """
+        highest = self.__highest.update(high)
+        lowest = self.__lowest.update(low)
+        self.__count += 1
+        if self.__count < self.k_period:
+            return None
+        span = highest - lowest
+        k = 50.0 if span == 0 else 100 * (close - lowest) / span
+        self.value = (k, self.__d.update(k))
+        return self.value
+
+    def on_bar(self, bar: any) -> Union[Tuple[float, Union[float, None]], None]:
+        """Add a bar, see update"""
+        return self.update(bar.high, bar.low, bar.close)
+
+
+class ATR:
+    """Average true range with the smoothing of Wilder, the first average is the mean of the first period true ranges
+
+    Args:
+        period (int, optional): the smoothing period. Defaults to 14.
+    """
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError("period must be at least 1")
+        self.period = period
+        self.value: Union[float, None] = None
+        self.__close: Union[float, None] = None
+        self.__count = 0
+        self.__sum = 0.0
+
+    def update(self, high: float, low: float, close: float) -> Union[float, None]:
+        """Add a bar
+
+        Args:
+            high (float): the high of the bar
+            low (float): the low of the bar
+            close (float): the close of the bar
+
+        Returns:
+            float | None: the average true range, None until period bars were added
+        """
+        previous, self.__close = self.__close, close
+        if previous is None:
+            true_range = high - low
+        else:
+            true_range = max(high, previous) - min(low, previous)
+
+        if self.__count < self.period:
+            self.__count += 1
+            self.__sum += true_range
+            if self.__count == self.period:
+                self.value = self.__sum / self.period
+            return self.value
+        self.value = (self.value * (self.period - 1) + true_range) / self.period
+        return self.value
+
+    def on_bar(self, bar: any) -> Union[float, None]:
+        """Add a bar, see update"""
+        return self.update(bar.high, bar.low, bar.close)
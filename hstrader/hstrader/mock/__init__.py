@@ -0,0 +1,3 @@
+"""A local mock of an HsTrader server, to run the client without a network in tests and load tests"""
+
+from .server import MockServer, MockError
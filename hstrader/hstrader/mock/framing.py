@@ -0,0 +1,115 @@
+import asyncio
+import base64
+import hashlib
+import struct
+from typing import Tuple, Union
+
+# the key appended to the key of the client to accept the websocket handshake (RFC 6455)
+_ACCEPT_KEY = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+CONTINUATION = 0x0
+TEXT = 0x1
+BINARY = 0x2
+CLOSE = 0x8
+PING = 0x9
+PONG = 0xA
+
+
+def accept_key(key: str) -> str:
+    """get the Sec-WebSocket-Accept answering the Sec-WebSocket-Key of a client
+
+    Args:
+        key (str): the key sent by the client
+
+    Returns:
+        str: the accept key
+    """
+    digest = hashlib.sha1(key.encode() + _ACCEPT_KEY).digest()
+    return base64.b64encode(digest).decode()
+
+
+def encode_frame(opcode: int, payload: bytes) -> bytes:
+    """encode a final frame sent by the server, the server frames are not masked
+
+    Args:
+        opcode (int): the opcode of the frame
+        payload (bytes): the payload of the frame
+
+    Returns:
+        bytes: the frame
+    """
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    """xor the payload with the mask of the client, on whole integers instead of byte by byte"""
+    if not payload:
+        return payload
+    length = len(payload)
+    repeated = (mask * (length // 4 + 1))[:length]
+    return (
+        int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")
+    ).to_bytes(length, "big")
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """read a frame sent by a client
+
+    Args:
+        reader (asyncio.StreamReader): the stream of the connection
+
+    Raises:
+        asyncio.IncompleteReadError: if the connection is closed in the middle of a frame
+
+    Returns:
+        Tuple[bool, int, bytes]: whether the frame is final, its opcode and its unmasked payload
+    """
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask is not None:
+        payload = _unmask(payload, mask)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+async def read_message(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> Union[bytes, str, None]:
+    """read the next message of a client, the pings are answered and the fragmented messages are joined
+
+    Args:
+        reader (asyncio.StreamReader): the stream of the connection
+        writer (asyncio.StreamWriter): the stream to answer the pings and the close on
+
+    Returns:
+        bytes | str | None: the message, str for a text message, None once the client closed the connection
+    """
+    fragments, message_opcode = [], None
+    while True:
+        final, opcode, payload = await read_frame(reader)
+        if opcode == CLOSE:
+            writer.write(encode_frame(CLOSE, payload[:2]))
+            return None
+        if opcode == PING:
+            writer.write(encode_frame(PONG, payload))
+            continue
+        if opcode == PONG:
+            continue
+        if opcode != CONTINUATION:
+            message_opcode = opcode
+        fragments.append(payload)
+        if final:
+            data = b"".join(fragments)
+            return data.decode() if message_opcode == TEXT else data
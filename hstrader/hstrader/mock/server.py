@@ -0,0 +1,856 @@
+import asyncio
+import base64
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Set, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+from ..config import Config
+from ..models import OrderStatus, OrderType, PositionStatus, SideType
+from . import framing
+
+# the names, the digits and the first price of the first symbols, the next ones are named SYM<id>
+_SYMBOLS = [
+    ("EURUSD", 5, 1.08),
+    ("GBPUSD", 5, 1.26),
+    ("USDJPY", 3, 151.2),
+    ("XAUUSD", 2, 2330.0),
+    ("USDCHF", 5, 0.91),
+    ("AUDUSD", 5, 0.65),
+    ("USDCAD", 5, 1.37),
+    ("BTCUSD", 2, 64000.0),
+]
+
+# the length of the bars of each resolution in seconds, a month is counted as 30 days
+_RESOLUTIONS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+    "1w": 7 * 24 * 60 * 60,
+    "1mo": 30 * 24 * 60 * 60,
+}
+
+_REASONS = {
+    101: "Switching Protocols",
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+}
+
+
+class MockError(Exception):
+    """An error answered to the client, as a failed response over http or a bad_request event over the websocket"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class _Connection:
+    """A websocket connection of a client and its market feed"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.feed: asyncio.Task = None
+        # the known symbols of the feed in the order their ticks are sent, None for every symbol
+        self.symbols: Union[List[int], None] = None
+
+
+class MockServer:
+    """A local stand-in of an HsTrader server to test and load test the client without a network, it answers the
+    rest endpoints of the client and the /ws/v1 websocket with ticks, summaries and the order, position and deal events.
+    Orders and positions are kept in memory, the market orders are filled at once at the current price.
+    It runs on its own event loop in a background thread, connect to it with config() or client()
+
+    Args:
+        host (str, optional): the host to listen on. Defaults to "127.0.0.1".
+        port (int, optional): the port to listen on, 0 picks a free one. Defaults to 0.
+        symbols (int, optional): the number of symbols traded. Defaults to 8.
+        tick_rate (float, optional): the number of ticks sent per second to each client of the market feed,
+            spread over the symbols of its feed. Defaults to 10.
+        latency (float, optional): the delay in seconds added before every answer. Defaults to 0.
+        summary_interval (float, optional): the delay in seconds between two summaries, None to send none. Defaults to 1.
+        balance (float, optional): the balance of the account. Defaults to 100000.
+        credentials (Tuple[str, str], optional): the only client id and secret accepted. Defaults to None to accept any.
+        seed (int, optional): the seed of the prices. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        symbols: int = 8,
+        tick_rate: float = 10,
+        latency: float = 0,
+        summary_interval: float = 1,
+        balance: float = 100000,
+        credentials: Tuple[str, str] = None,
+        seed: int = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.latency = latency
+        self.summary_interval = summary_interval
+        self.credentials = credentials
+        self.requests = 0
+        self.ticks_sent = 0
+
+        self.account = {
+            "id": 1,
+            "trade_type": 1,
+            "balance": balance,
+            "credit": 0.0,
+            "currency": "USD",
+            "leverage": 100,
+        }
+        self.symbols: Dict[int, dict] = {}
+        self.orders: Dict[int, dict] = {}
+        self.positions: Dict[int, dict] = {}
+        self.deals: Dict[int, dict] = {}
+
+        self.__random = random.Random(seed)
+        self.__ids = itertools.count(1)
+        self.__access_token: str = None
+        self.__refresh_token: str = None
+        self.__session_id: str = None
+        self.__connections: Set[_Connection] = set()
+        self.__loop: asyncio.AbstractEventLoop = None
+        self.__server: asyncio.AbstractServer = None
+        self.__thread: threading.Thread = None
+        self.__tasks: Set[asyncio.Task] = set()
+        # the tasks serving the connections and their streams, closed rather than cancelled when the server stops
+        self.__handlers: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.__routes: List[Tuple[str, "re.Pattern", Callable]] = [
+            ("POST", re.compile(r"/auth/v1/oauth2/token"), self.__login),
+            ("POST", re.compile(r"/auth/v1/oauth2/login"), self.__login),
+            ("POST", re.compile(r"/auth/v1/oauth2/refresh/token"), self.__refresh),
+            ("DELETE", re.compile(r"/auth/v1/oauth2/logout"), self.__logout),
+            ("GET", re.compile(r"/api/v1/accounts/me"), self.__get_account),
+            ("GET", re.compile(r"/api/v1/symbols/me"), self.__get_symbols),
+            ("GET", re.compile(r"/api/v1/symbols/me/by_name"), self.__get_symbol),
+            ("GET", re.compile(r"/api/v1/market/history"), self.__get_history),
+            ("GET", re.compile(r"/api/v1/orders/accounts/me"), self.__get_orders),
+            ("POST", re.compile(r"/api/v1/orders/accounts/me"), self.__post_order),
+            ("PUT", re.compile(r"/api/v1/orders/(\d+)/accounts/me"), self.__put_order),
+            ("POST", re.compile(r"/api/v1/orders/(\d+)/accounts/me"), self.__post_cancel),
+            ("GET", re.compile(r"/api/v1/positions/accounts/me"), self.__get_positions),
+            ("PUT", re.compile(r"/api/v1/positions/(\d+)/accounts/me"), self.__put_position),
+            ("POST", re.compile(r"/api/v1/positions/(\d+)/accounts/me"), self.__post_close),
+            ("GET", re.compile(r"/api/v1/deals/accounts/me"), self.__get_deals),
+        ]
+
+        for index in range(symbols):
+            name, digits, price = (
+                _SYMBOLS[index]
+                if index < len(_SYMBOLS)
+                else (f"SYM{index + 1:03d}", 5, 1 + index / 100)
+            )
+            self.__add_symbol(index + 1, name, digits, price)
+
+    @property
+    def url(self) -> str:
+        """the url to pass to the config of the client, the host and the port of the server"""
+        return f"{self.host}:{self.port}"
+
+    def config(self, **kwargs) -> Config:
+        """get a config connecting to the server
+
+        Returns:
+            Config: the config, kwargs are passed to it
+        """
+        return Config(url=self.url, secure=False, **kwargs)
+
+    def client(self, **kwargs) -> "HsTrader":
+        """get a client logged in to the server
+
+        Returns:
+            HsTrader: the client, kwargs are passed to its config
+        """
+        from ..hstrader import HsTrader
+
+        client_id, client_secret = self.credentials or ("mock", "mock")
+        return HsTrader(client_id, client_secret, self.url, self.config(**kwargs))
+
+    def start(self) -> "MockServer":
+        """Start the server in a background thread, returns once it's listening
+
+        Returns:
+            MockServer: the server
+        """
+        if self.__thread is not None:
+            raise ValueError("The server is already started")
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start_async())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                return
+            started.set()
+            loop.run_forever()
+            loop.close()
+
+        self.__thread = threading.Thread(target=run, name="hstrader-mock", daemon=True)
+        self.__thread.start()
+        started.wait()
+        if errors:
+            self.__thread = None
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """Stop the server started with start, the connections are closed"""
+        thread, self.__thread = self.__thread, None
+        if thread is None:
+            return
+        loop = self.__loop
+        asyncio.run_coroutine_threadsafe(self.stop_async(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    async def start_async(self):
+        """Start the server on the running event loop"""
+        self.__loop = asyncio.get_event_loop()
+        self.__server = await asyncio.start_server(
+            self.__handle_connection, self.host, self.port
+        )
+        self.port = self.__server.sockets[0].getsockname()[1]
+        if self.summary_interval:
+            self.__spawn(self.__send_summaries())
+
+    async def stop_async(self):
+        """Stop the server started with start_async"""
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        for writer in list(self.__handlers.values()):
+            writer.close()
+        if self.__handlers:
+            await asyncio.wait(list(self.__handlers), timeout=1)
+        for task in list(self.__tasks):
+            task.cancel()
+        if self.__tasks:
+            await asyncio.wait(list(self.__tasks))
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def price(self, symbol_id: int) -> Tuple[float, float]:
+        """get the current prices of a symbol
+
+        Args:
+            symbol_id (int): the id of the symbol
+
+        Returns:
+            Tuple[float, float]: the bid and the ask
+        """
+        symbol = self.symbols[symbol_id]
+        return symbol["last_bid"], symbol["last_ask"]
+
+    def __add_symbol(self, id: int, name: str, digits: int, price: float):
+        point = 10 ** -digits
+        self.symbols[id] = {
+            "id": id,
+            "symbol": name,
+            "desc": name,
+            "base_currency": name[:3],
+            "quote_currency": name[3:6] or "USD",
+            "leverage": 100,
+            "enabled": True,
+            "trade_level": 0,
+            "execution": 0,
+            "filling": 0,
+            "min_value": 0.01,
+            "max_value": 100,
+            "step": 0.01,
+            "swap_type": 0,
+            "digits": digits,
+            "spread_balance": 0,
+            "calculation": 0,
+            "contract_size": 100000 if digits > 3 else 100,
+            "status": 0,
+            "last_bid": round(price, digits),
+            "last_ask": round(price + 10 * point, digits),
+            "open": round(price, digits),
+            "close": round(price, digits),
+            "low_bid": round(price, digits),
+            "high_bid": round(price, digits),
+            "low_ask": round(price + 10 * point, digits),
+            "high_ask": round(price + 10 * point, digits),
+        }
+
+    def __spawn(self, coroutine) -> asyncio.Task:
+        """run a coroutine in a task cancelled when the server stops"""
+        task = self.__loop.create_task(coroutine)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return task
+
+    # ----- connections -----
+
+    async def __handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """serve the http requests of a keep-alive connection until it's upgraded to a websocket or closed"""
+        task = asyncio.current_task()
+        self.__handlers[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.__handle_websocket(target, headers, reader, writer)
+                    return
+
+                self.requests += 1
+                status, response = await self.__handle_request(
+                    method, target, headers, body
+                )
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.__write_response(writer, status, json.dumps(response).encode())
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.__handlers.pop(task, None)
+            writer.close()
+
+    def __write_response(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes = b"",
+        headers: Dict[str, str] = None,
+    ):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        if headers is None:
+            headers = {"Content-Type": "application/json", "Content-Length": len(body)}
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+
+    async def __handle_request(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, dict]:
+        """answer an http request with the status and the body of a BaseResponse"""
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        for route_method, pattern, handler in self.__routes:
+            match = pattern.fullmatch(url.path)
+            if match is None or route_method != method:
+                continue
+            try:
+                if handler not in (self.__login, self.__refresh):
+                    self.__authorize(headers)
+                data = json.loads(body) if body else {}
+                result = handler(*match.groups(), query=query, data=data, headers=headers)
+            except MockError as e:
+                return e.status, _response(None, str(e), e.status)
+            except ValueError as e:
+                return 400, _response(None, f"invalid body: {e}", 400)
+            return 200, _response(result)
+        return 404, _response(None, f"{method} {url.path} not found", 404)
+
+    def __authorize(self, headers: Dict[str, str]):
+        if self.__access_token is None or headers.get("authorization") != (
+            f"Bearer {self.__access_token}"
+        ):
+            raise MockError("unauthorized", 401)
+
+    async def __handle_websocket(
+        self,
+        target: str,
+        headers: Dict[str, str],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        """accept a websocket connection of /ws/v1 and answer its messages until it's closed"""
+        url = urlsplit(target)
+        session_id = dict(parse_qsl(url.query)).get("session_id")
+        if url.path != "/ws/v1" or "sec-websocket-key" not in headers:
+            self.__write_response(writer, 404, headers={"Content-Length": 0})
+            return
+        if self.__session_id is None or session_id != self.__session_id:
+            self.__write_response(writer, 401, headers={"Content-Length": 0})
+            return
+        self.__write_response(
+            writer,
+            101,
+            headers={
+                "Upgrade": "websocket",
+                "Connection": "Upgrade",
+                "Sec-WebSocket-Accept": framing.accept_key(headers["sec-websocket-key"]),
+            },
+        )
+        connection = _Connection(writer)
+        self.__connections.add(connection)
+        try:
+            while True:
+                message = await framing.read_message(reader, writer)
+                if message is None:
+                    return
+                if isinstance(message, str):
+                    await self.__handle_message(connection, message)
+        finally:
+            self.__connections.discard(connection)
+            if connection.feed is not None:
+                connection.feed.cancel()
+
+    async def __handle_message(self, connection: _Connection, message: str):
+        """answer a message sent by a client over the websocket"""
+        try:
+            body = json.loads(message)
+            typ, payload = body.get("type"), body.get("payload") or {}
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if typ == "start_market_feed":
+                symbols = payload.get("symbols")
+                unknown = []
+                if symbols is None:
+                    connection.symbols = None
+                else:
+                    connection.symbols = sorted(set(symbols) & self.symbols.keys())
+                    unknown = sorted(set(symbols) - self.symbols.keys())
+                if connection.feed is None or connection.feed.done():
+                    connection.feed = self.__spawn(self.__stream_ticks(connection))
+                if unknown:
+                    raise MockError(f"unknown symbols {unknown}")
+            elif typ == "stop_market_feed":
+                if connection.feed is not None:
+                    connection.feed.cancel()
+                    connection.feed = None
+            elif typ == "order_create":
+                self.__create_order(payload)
+            elif typ == "order_update":
+                self.__update_order(int(payload.get("order_id")), payload)
+            elif typ == "order_cancel":
+                self.__cancel_order(int(payload.get("order_id")))
+            elif typ == "position_update":
+                self.__update_position(int(payload.get("position_id")), payload)
+            elif typ == "position_close":
+                self.__close_position(int(payload.get("position_id")), payload)
+            else:
+                raise MockError(f"unknown message type {typ}")
+        except (MockError, ValueError, TypeError) as e:
+            self.__send(connection, "bad_request", {"message": str(e), "reason": str(e)})
+
+    def __send(self, connection: _Connection, typ: str, payload: any):
+        frame = framing.encode_frame(
+            framing.TEXT, json.dumps({"type": typ, "payload": payload}).encode()
+        )
+        connection.writer.write(frame)
+
+    def __broadcast(self, typ: str, payload: any):
+        """send an event to every websocket client"""
+        for connection in list(self.__connections):
+            self.__send(connection, typ, payload)
+
+    # ----- market -----
+
+    def __next_tick(self, symbol_id: int, now: int) -> bytes:
+        """move the price of a symbol by a random step and encode its tick as sent by the server"""
+        symbol = self.symbols[symbol_id]
+        digits = symbol["digits"]
+        point = 10 ** -digits
+        spread = symbol["last_ask"] - symbol["last_bid"]
+        bid = round(symbol["last_bid"] + self.__random.randint(-3, 3) * point, digits)
+        ask = round(bid + spread, digits)
+        symbol["last_bid"], symbol["last_ask"] = bid, ask
+        symbol["high_bid"] = max(symbol["high_bid"], bid)
+        symbol["low_bid"] = min(symbol["low_bid"], bid)
+        return (
+            f"{symbol_id},{bid:.{digits}f},{ask:.{digits}f},{symbol['high_bid']:.{digits}f},"
+            f"{symbol['low_bid']:.{digits}f},{bid:.{digits}f},{symbol['open']:.{digits}f},1,{now}"
+        ).encode()
+
+    async def __stream_ticks(self, connection: _Connection):
+        """send tick_rate ticks per second to a client, in batches written every few milliseconds"""
+        interval = min(0.05, 1 / self.tick_rate) if self.tick_rate > 0 else 0.05
+        every_symbol = sorted(self.symbols)
+        turn, owed, last = 0, 0.0, time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            owed += (now - last) * self.tick_rate
+            last = now
+            count = int(owed)
+            owed -= count
+            epoch = int(time.time())
+            # the symbols of the feed are known symbols only, it may be changed by the client at any time
+            ids = every_symbol if connection.symbols is None else connection.symbols
+            if not ids:
+                continue
+            frames = []
+            for _ in range(count):
+                symbol_id = ids[turn % len(ids)]
+                turn += 1
+                frames.append(
+                    framing.encode_frame(framing.BINARY, self.__next_tick(symbol_id, epoch))
+                )
+            if frames:
+                connection.writer.write(b"".join(frames))
+                self.ticks_sent += len(frames)
+                await connection.writer.drain()
+
+    async def __send_summaries(self):
+        """send the summary of the account with the profit of the open positions to every client"""
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            if not self.__connections:
+                continue
+            frame = framing.encode_frame(framing.TEXT, self.__summary().encode())
+            for connection in list(self.__connections):
+                connection.writer.write(frame)
+
+    def __summary(self) -> str:
+        profits = [
+            (id, self.__profit(position))
+            for id, position in self.positions.items()
+            if position["status"] == PositionStatus.OPEN
+        ]
+        total = sum(profit for _, profit in profits)
+        balance = self.account["balance"]
+        used = sum(
+            self.__margin(position)
+            for position in self.positions.values()
+            if position["status"] == PositionStatus.OPEN
+        )
+        equity = balance + total
+        level = equity / used * 100 if used else 0
+        fields = [
+            "summary",
+            str(self.account["id"]),
+            f"{balance:.2f}",
+            "0.00",
+            f"{equity:.2f}",
+            f"{used:.2f}",
+            f"{equity - used:.2f}",
+            f"{level:.2f}%",
+            f"{total:.2f}",
+        ]
+        for id, profit in profits:
+            fields.extend((str(id), f"{profit:.2f}"))
+        return ",".join(fields)
+
+    def __profit(self, position: dict) -> float:
+        bid, ask = self.price(position["symbol_id"])
+        if position["side"] == SideType.BUY:
+            move = bid - position["open_price"]
+        else:
+            move = position["open_price"] - ask
+        return move * position["volume"] * position["contract_size"]
+
+    def __margin(self, position: dict) -> float:
+        return (
+            position["open_price"]
+            * position["volume"]
+            * position["contract_size"]
+            / self.account["leverage"]
+        )
+
+    # ----- trading -----
+
+    def __create_order(self, data: dict) -> dict:
+        symbol_id = data.get("symbol_id")
+        if symbol_id not in self.symbols:
+            raise MockError(f"unknown symbol {symbol_id}")
+        volume = float(data.get("volume") or 0)
+        if volume <= 0:
+            raise MockError("volume must be greater than 0")
+        now = int(time.time())
+        side = SideType(data.get("side", 0))
+        order = {
+            "id": next(self.__ids),
+            "symbol_id": symbol_id,
+            "type": OrderType(data.get("type", 0)),
+            "side": side,
+            "volume": volume,
+            "order_price": data.get("order_price"),
+            "stop_loss": data.get("stop_loss"),
+            "take_profit": data.get("take_profit"),
+            "comment": data.get("comment") or "",
+            "status": OrderStatus.PLACED,
+            "filled_volume": 0.0,
+            "contract_size": self.symbols[symbol_id]["contract_size"],
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.orders[order["id"]] = order
+        if order["type"] == OrderType.MARKET:
+            bid, ask = self.price(symbol_id)
+            price = ask if side == SideType.BUY else bid
+            order.update(
+                status=OrderStatus.FILLED,
+                filled_volume=volume,
+                filled_price=price,
+                done_at=now,
+            )
+            self.__broadcast("order_create", order)
+            self.__open_position(order, price)
+        else:
+            self.__broadcast("order_create", order)
+        return order
+
+    def __open_position(self, order: dict, price: float):
+        position = {
+            "id": next(self.__ids),
+            "symbol_id": order["symbol_id"],
+            "side": order["side"],
+            "volume": order["volume"],
+            "open_price": price,
+            "stop_loss": order["stop_loss"],
+            "take_profit": order["take_profit"],
+            "comment": order["comment"],
+            "contract_size": order["contract_size"],
+            "status": PositionStatus.OPEN,
+            "profit": 0.0,
+            "created_at": order["created_at"],
+            "updated_at": order["created_at"],
+        }
+        self.positions[position["id"]] = position
+        self.__broadcast("position_create", position)
+        self.__add_deal(position, order["id"], order["volume"], price, direction=0)
+
+    def __add_deal(
+        self, position: dict, order_id: int, volume: float, price: float, direction: int
+    ) -> dict:
+        deal = {
+            "id": next(self.__ids),
+            "order_id": order_id,
+            "position_id": position["id"],
+            "symbol_id": position["symbol_id"],
+            "side": position["side"],
+            "volume": volume,
+            "closed_volume": volume if direction else 0.0,
+            "open_price": position["open_price"],
+            "close_price": price if direction else 0.0,
+            "contract_size": position["contract_size"],
+            "direction": direction,
+            "profit": position["profit"] if direction else 0.0,
+            "commission": 0.0,
+            "swap": 0.0,
+        }
+        self.deals[deal["id"]] = deal
+        self.__broadcast("deal_create", deal)
+        return deal
+
+    def __update_order(self, order_id: int, data: dict) -> dict:
+        order = self.orders.get(order_id)
+        if order is None or order["status"] != OrderStatus.PLACED:
+            raise MockError(f"order {order_id} is not pending")
+        for name in ("volume", "stop_loss", "take_profit", "comment", "order_limit_price"):
+            if data.get(name) is not None:
+                order[name] = data[name]
+        order["updated_at"] = int(time.time())
+        self.__broadcast("order_update", order)
+        return order
+
+    def __cancel_order(self, order_id: int) -> dict:
+        order = self.orders.get(order_id)
+        if order is None or order["status"] != OrderStatus.PLACED:
+            raise MockError(f"order {order_id} is not pending")
+        order["status"] = OrderStatus.CANCELED
+        order["updated_at"] = order["done_at"] = int(time.time())
+        self.__broadcast("order_cancel", order)
+        return order
+
+    def __update_position(self, position_id: int, data: dict) -> dict:
+        position = self.__open(position_id)
+        for name in ("stop_loss", "take_profit", "comment"):
+            if name in data:
+                position[name] = data[name]
+        position["updated_at"] = int(time.time())
+        self.__broadcast("position_update", position)
+        return position
+
+    def __close_position(self, position_id: int, data: dict) -> dict:
+        position = self.__open(position_id)
+        volume = float(data.get("volume") or position["volume"])
+        if volume <= 0 or volume > position["volume"] + 1e-9:
+            raise MockError(f"invalid volume {volume}")
+        bid, ask = self.price(position["symbol_id"])
+        price = bid if position["side"] == SideType.BUY else ask
+        profit = self.__profit(position) * volume / position["volume"]
+        self.account["balance"] += profit
+        position["updated_at"] = int(time.time())
+        if volume >= position["volume"] - 1e-9:
+            position.update(status=PositionStatus.CLOSED, close_price=price, profit=profit)
+            self.__broadcast("position_close", position)
+        else:
+            position["volume"] = round(position["volume"] - volume, 8)
+            self.__broadcast("position_update", position)
+        # the closing order is not kept, only its deal
+        self.__add_deal(
+            dict(position, profit=profit), next(self.__ids), volume, price, direction=1
+        )
+        return position
+
+    def __open(self, position_id: int) -> dict:
+        position = self.positions.get(position_id)
+        if position is None or position["status"] != PositionStatus.OPEN:
+            raise MockError(f"position {position_id} is not open")
+        return position
+
+    # ----- rest endpoints -----
+
+    def __login(self, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        authorization = headers.get("authorization", "")
+        if self.credentials is not None:
+            try:
+                decoded = base64.b64decode(authorization[len("Basic ") :]).decode()
+            except ValueError:
+                decoded = ""
+            if tuple(decoded.split(":", 1)) != tuple(self.credentials):
+                raise MockError("invalid credentials", 401)
+        self.__session_id = uuid.uuid4().hex
+        return self.__new_tokens()
+
+    def __refresh(self, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        if self.__refresh_token is None or data.get("refresh_token") != self.__refresh_token:
+            raise MockError("invalid refresh token", 401)
+        return self.__new_tokens()
+
+    def __new_tokens(self) -> dict:
+        self.__access_token = uuid.uuid4().hex
+        self.__refresh_token = uuid.uuid4().hex
+        return {
+            "account_id": self.account["id"],
+            "access_token": self.__access_token,
+            "refresh_token": self.__refresh_token,
+            "session_id": self.__session_id,
+            "expires_in": 3600,
+            "ip_address": self.host,
+            "scope": "trade",
+        }
+
+    def __logout(self, query: dict, data: dict, headers: Dict[str, str]) -> None:
+        self.__access_token = self.__refresh_token = self.__session_id = None
+        return None
+
+    def __get_account(self, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        balance = self.account["balance"]
+        profit = sum(
+            self.__profit(p)
+            for p in self.positions.values()
+            if p["status"] == PositionStatus.OPEN
+        )
+        return dict(self.account, equity=balance + profit, profit=profit, floating_profit=profit)
+
+    def __get_symbols(self, query: dict, data: dict, headers: Dict[str, str]) -> list:
+        return list(self.symbols.values())
+
+    def __get_symbol(self, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        for symbol in self.symbols.values():
+            if symbol["symbol"] == query.get("symbol"):
+                return symbol
+        raise MockError(f"unknown symbol {query.get('symbol')}", 404)
+
+    def __get_history(self, query: dict, data: dict, headers: Dict[str, str]) -> list:
+        symbol = self.symbols.get(int(query.get("symbol_id", 0)))
+        if symbol is None:
+            raise MockError(f"unknown symbol {query.get('symbol_id')}")
+        step = _RESOLUTIONS.get(query.get("resolution", "1m"))
+        if step is None:
+            raise MockError(f"invalid resolution {query.get('resolution')}")
+        to = int(query.get("to", time.time()))
+        frm = int(query.get("from", 0))
+        count_back = int(query.get("count_back", 300))
+        start = max(frm, to - count_back * step)
+        start -= start % step
+        digits = symbol["digits"]
+        offset = 0 if query.get("type", "bid") == "bid" else 10 ** -digits * 10
+        bars = []
+        for t in range(start, to, step):
+            open_, close = _history_price(symbol, t), _history_price(symbol, t + step)
+            bars.append(
+                {
+                    "time": t,
+                    "open": round(open_ + offset, digits),
+                    "high": round(max(open_, close) * 1.0002 + offset, digits),
+                    "low": round(min(open_, close) * 0.9998 + offset, digits),
+                    "close": round(close + offset, digits),
+                    "volume": float(t // step % 97 + 1),
+                }
+            )
+        return bars
+
+    def __get_orders(self, query: dict, data: dict, headers: Dict[str, str]) -> list:
+        active = query.get("active", "true") != "false"
+        return [
+            o for o in self.orders.values() if (o["status"] == OrderStatus.PLACED) == active
+        ]
+
+    def __post_order(self, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        return self.__create_order(data)
+
+    def __put_order(self, id: str, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        return self.__update_order(int(id), data)
+
+    def __post_cancel(self, id: str, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        return self.__cancel_order(int(id))
+
+    def __get_positions(self, query: dict, data: dict, headers: Dict[str, str]) -> list:
+        active = query.get("active", "true") != "false"
+        return [
+            p
+            for p in self.positions.values()
+            if (p["status"] == PositionStatus.OPEN) == active
+        ]
+
+    def __put_position(self, id: str, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        return self.__update_position(int(id), data)
+
+    def __post_close(self, id: str, query: dict, data: dict, headers: Dict[str, str]) -> dict:
+        return self.__close_position(int(id), data)
+
+    def __get_deals(self, query: dict, data: dict, headers: Dict[str, str]) -> list:
+        return list(self.deals.values())
+
+
+def _history_price(symbol: dict, time: int) -> float:
+    """the price of a symbol in the history, a slow wave around its first price so the bars are the same on every call"""
+    return symbol["open"] * (1 + 0.002 * math.sin(time / 3600 + symbol["id"]))
+
+
+def _response(data: any, message: str = "", code: int = 200) -> dict:
+    """the body of a BaseResponse"""
+    return {
+        "success": code == 200,
+        "code": code,
+        "data": data,
+        "error": "" if code == 200 else message,
+        "message": message,
+    }
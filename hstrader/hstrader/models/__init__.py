@@ -9,3 +9,4 @@ from .position import *
 from .events import *
 from . ws import *
 from .market import *
+from .batch import *
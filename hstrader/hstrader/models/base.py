@@ -1,6 +1,120 @@
 from pydantic import BaseModel as PydanticBaseModel
-from pydantic import ConfigDict
+from pydantic import ConfigDict, TypeAdapter
+from enum import Enum
+from typing import Dict, List, Tuple, Type, Union
+import datetime
 
 
 class BaseModel(PydanticBaseModel):
     model_config = ConfigDict()
+
+
+# parses the times that are not epochs the way the validation does
+_datetime_adapter = TypeAdapter(datetime.datetime)
+
+
+def _to_datetime(value: any) -> any:
+    """convert a time to a datetime the way pydantic does, an epoch to a utc datetime without going through pydantic"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    return _datetime_adapter.validate_python(value)
+
+
+class _Plan:
+    """What construct needs to build a model: the members of its enum fields by value, its datetime fields,
+    the defaults of its fields and their names
+    """
+
+    __slots__ = ("enums", "datetimes", "defaults", "names")
+
+    def __init__(self, cls: Type[BaseModel]):
+        self.enums: List[Tuple[str, Dict[any, Enum]]] = []
+        self.datetimes: List[str] = []
+        self.defaults = {}
+        self.names = frozenset(cls.model_fields)
+        for name, field in cls.model_fields.items():
+            if not field.is_required():
+                self.defaults[name] = field.get_default(call_default_factory=True)
+            for annotation in getattr(field.annotation, "__args__", None) or (
+                field.annotation,
+            ):
+                if not isinstance(annotation, type):
+                    continue
+                if issubclass(annotation, PydanticBaseModel):
+                    raise TypeError(f"{cls.__name__}.{name} is a nested model")
+                if issubclass(annotation, Enum):
+                    self.enums.append((name, annotation._value2member_map_))
+                    break
+                if issubclass(annotation, datetime.datetime):
+                    self.datetimes.append(name)
+                    break
+
+
+# the plan of each model built by construct, None if the model has to be validated
+_plans: Dict[type, Union[_Plan, None]] = {}
+
+
+def _get_plan(cls: Type[BaseModel]) -> Union[_Plan, None]:
+    """get the plan to build a model without validating it, None if the model has nested models
+
+    Args:
+        cls (Type[BaseModel]): the model
+
+    Returns:
+        _Plan | None: the plan of the model
+    """
+    try:
+        return _plans[cls]
+    except KeyError:
+        pass
+    try:
+        plan = _Plan(cls)
+    except TypeError:
+        plan = None
+    _plans[cls] = plan
+    return plan
+
+
+def construct(cls: Type[BaseModel], data: dict) -> BaseModel:
+    """build a model from data trusted to be valid, e.g. sent by the server, without validating it,
+    only the enums and the epoch datetimes are converted, the models that can't be built this way are validated.
+    It does what model_construct does without looking up the defaults of every field on each call
+
+    Args:
+        cls (Type[BaseModel]): the model
+        data (dict): the fields of the model, it's left unchanged
+
+    Returns:
+        BaseModel: the model
+    """
+    plan = _get_plan(cls)
+    if plan is None:
+        return cls.model_validate(data)
+
+    values = plan.defaults.copy()
+    if plan.names.issuperset(data):
+        values.update(data)
+        fields_set = set(data)
+    else:
+        # the fields unknown to the model are ignored as they are by the validation
+        fields_set = plan.names.intersection(data)
+        for name in fields_set:
+            values[name] = data[name]
+
+    for name, members in plan.enums:
+        if name in fields_set:
+            value = values[name]
+            # unknown values are kept as sent
+            values[name] = members.get(value, value)
+    for name in plan.datetimes:
+        if name in fields_set:
+            values[name] = _to_datetime(values[name])
+
+    model = object.__new__(cls)
+    object.__setattr__(model, "__dict__", values)
+    object.__setattr__(model, "__pydantic_fields_set__", fields_set)
+    object.__setattr__(model, "__pydantic_extra__", None)
+    object.__setattr__(model, "__pydantic_private__", None)
+    return model
@@ -1,4 +1,4 @@
-from .base import BaseModel
+from .base import BaseModel, construct
 from typing import Union,List
 
 
@@ -9,15 +9,19 @@ class BaseResponse(BaseModel):
     error: str
     message: str
 
-    def deserialize(self, cls: BaseModel) -> BaseModel:
+    def deserialize(self, cls: BaseModel, trusted: bool = False) -> BaseModel:
         if self.data is not None:
             if isinstance(self.data, list):
                 raise ValueError("deserialize should be used only single object data")
+            if trusted:
+                return construct(cls, self.data)
             return cls(**self.data)
 
-    def deserialize_list(self, cls: BaseModel) -> List[BaseModel]:
+    def deserialize_list(self, cls: BaseModel, trusted: bool = False) -> List[BaseModel]:
         if self.data is not None:
             if not isinstance(self.data, list):
                 raise ValueError("deserialize_list should be used only with list data")
+            if trusted:
+                return [construct(cls, item) for item in self.data]
             return [cls(**item) for item in self.data]
 
@@ -0,0 +1,13 @@
+from typing import NamedTuple
+
+
+class BatchResult(NamedTuple):
+    """The outcome of one item of a batch request, the answer of the server or the error raised for it"""
+
+    item: any
+    result: any = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
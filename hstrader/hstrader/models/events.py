@@ -4,13 +4,16 @@ from enum import Enum
 class Event(Enum):
     CONNECT = "connect"
     DISCONNECT = "disconnect"
+    RECONNECT = "reconnect"
 
     ORDER = "order"
     POSITION = "position"
     DEAL = "deal"
+    SYMBOL = "symbol"
 
     SUMMARY = "summary"
     MARKET = "market"
+    BAR = "bar"
     POSITION_PL = "position_pl"
     START_MARKET_FEED = "start_market_feed"
     STOP_MARKET_FEED = "stop_market_feed"
@@ -23,3 +26,18 @@ class Status(Enum):
     DELETED = "delete"
     CLOSED = "close"
     CANCELED = "cancel"
+
+
+class Dispatch(Enum):
+    """Dispatch determines where an event handler runs
+
+    INLINE: on the event loop, a coroutine function is run as a task
+    THREAD_POOL: on a pool of threads, use it for blocking handlers
+    PROCESS_POOL: on a pool of processes, use it for cpu heavy handlers, the handler must be picklable
+    ASYNCIO_TASK: in a task of the event loop, after the message is processed
+    """
+
+    INLINE = "inline"
+    THREAD_POOL = "thread_pool"
+    PROCESS_POOL = "process_pool"
+    ASYNCIO_TASK = "asyncio_task"
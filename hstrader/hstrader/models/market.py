@@ -1,4 +1,6 @@
 from .base import BaseModel
+from .enums import Resolution
+from typing import NamedTuple
 import datetime
 
 
@@ -27,3 +29,17 @@ class HistoryTick(BaseModel):
             close=close,
             volume=volume,
         )
+
+
+class Bar(NamedTuple):
+    """A lightweight OHLCV bar built from the market feed, time is the epoch the bar starts at
+    and volume the number of ticks it was built from, or the volume of the history bar it was seeded with"""
+
+    symbol_id: int
+    resolution: Resolution
+    time: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
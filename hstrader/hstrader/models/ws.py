@@ -1,5 +1,5 @@
 from .base import BaseModel
-from typing import Union
+from typing import NamedTuple, Union
 import datetime
 
 
@@ -18,6 +18,23 @@ class Tick(BaseModel):
     open: float
     volume: float
     time: datetime.datetime
+    dropped: int = 0
+
+
+class RawTick(NamedTuple):
+    """A lightweight tick, fields are in the order they are sent by the server and time is an epoch int,
+    dropped is the number of ticks skipped before this one when the ticks are conflated or queued"""
+
+    symbol_id: int
+    bid: float
+    ask: float
+    high: float
+    low: float
+    close: float
+    open: float
+    volume: float
+    time: int
+    dropped: int = 0
 
 
 class Summary(BaseModel):
@@ -35,6 +52,12 @@ class PositionPL(BaseModel):
     profit: float
 
 
+class Gap(BaseModel):
+    disconnected_at: datetime.datetime
+    reconnected_at: datetime.datetime
+    attempts: int
+
+
 class Error(BaseModel):
     message: str
     reason: str
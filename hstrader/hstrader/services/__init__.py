@@ -6,3 +6,4 @@ from .symbol import SymbolService
 from .account import AccountService
 from .market import MarketService
 from .deal import DealService
+from .state import StateService, StateStore
@@ -1,5 +1,5 @@
 from ..models import Account
-from ..helpers import HttpClient
+from ..helpers import HttpClient, run_async
 from ..config import Config
 from .urls import _GETMYPROFILE
 
@@ -21,4 +21,12 @@ class AccountService:
             .get()
         )
 
-        return response.deserialize(Account)
+        return response.deserialize(Account, self.__config.trusted_payloads)
+
+    async def get_account_async(self) -> Account:
+        """get the account information without blocking the event loop
+
+        Returns:
+            Account: the account information
+        """
+        return await run_async(self.__config, AccountService.get_account, self)
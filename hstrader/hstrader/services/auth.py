@@ -1,6 +1,6 @@
 import base64
 
-from ..helpers import HttpClient
+from ..helpers import HttpClient, run_async
 from ..config import Config
 from ..models import *
 from .urls import _LOGIN_URL_CREDENTIALS, _LOGOUT_URL, _REFRESH_URL
@@ -80,6 +80,32 @@ class AuthService:
 
         return login
 
+    async def login_async(self, username: str, password: str) -> AuthResponse:
+        """login to hstrader without blocking the event loop
+
+        Args:
+            username (str): username or email
+            password (str): password
+
+        Returns:
+            AuthResponse: the credentials
+        """
+        return await run_async(
+            self.__config, AuthService.login, self, username, password
+        )
+
+    async def logout_async(self) -> None:
+        """logout from hstrader without blocking the event loop"""
+        return await run_async(self.__config, AuthService.logout, self)
+
+    async def refresh_token_async(self) -> AuthResponse:
+        """refresh the access token without blocking the event loop
+
+        Returns:
+            AuthResponse: the new credentials
+        """
+        return await run_async(self.__config, AuthService.refresh_token, self)
+
     def __load_credentials(self, login: AuthResponse) -> None:
         """loads the credentials from the response to the config
 
@@ -1,5 +1,5 @@
 from ..models import Deal
-from ..helpers import HttpClient
+from ..helpers import HttpClient, run_async
 from ..config import Config
 from .urls import _URL_GETMYDEALS
 from typing import List
@@ -21,4 +21,12 @@ class DealService:
             .set_authorization_header(self.__config.get_token())
             .get()
         )
-        return response.deserialize_list(Deal)
\ No newline at end of file
+        return response.deserialize_list(Deal, self.__config.trusted_payloads)
+
+    async def get_deals_async(self) -> List[Deal]:
+        """get the list of deals of the account without blocking the event loop
+
+        Returns:
+            List[Deal]: list of deals of the account
+        """
+        return await run_async(self.__config, DealService.get_deals, self)
@@ -1,14 +1,17 @@
 from ..config import Config
-from ..helpers import HttpClient
-from ..models import HistoryTick, Resolution, MarketType, Symbol
+from ..helpers import HttpClient, HistoryStore, run_async
+from ..models import HistoryTick, Resolution, MarketType, Symbol, BaseResponse
 import time
-from typing import Union, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple, Union, List
 from .urls import _HISTORY_URL
 from .utils import (
-    calculate_spread,
-    truncate_float,
+    PriceAdjuster,
+    get_price_adjuster,
+    require_numpy,
     convert_time_to_int,
     calculate_frm_value,
+    resolution_to_timedelta,
 )
 import datetime as dt
 
@@ -16,6 +19,7 @@ import datetime as dt
 class MarketService:
     def __init__(self, config: Config):
         self.__config: Config = config
+        self.__history_store: HistoryStore = None
 
     def get_market_history(
         self,
@@ -41,6 +45,294 @@ class MarketService:
                 Returns:
                     List[HistoryTick]: the market history
         """
+        resolution, type = self.__validate_history_args(resolution, type)
+        response = self.__request_history(
+            symbol, frm, to, resolution, type, count_back
+        )
+
+        adjuster = self.__get_adjuster(symbol)
+        return [
+            self.__apply_spread(tick, adjuster, type)
+            # tick
+            for tick in response.deserialize_list(
+                HistoryTick, self.__config.trusted_payloads
+            )
+        ]
+
+    def get_market_history_array(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime] = None,
+        to: Union[int, float, str, dt.datetime] = None,
+        resolution: Union[Resolution, str] = Resolution.M1,
+        type: Union[MarketType, str] = MarketType.BID,
+        count_back: int = 300,
+    ) -> Dict[str, "np.ndarray"]:
+        """get the market history as numpy columns, takes the same arguments as get_market_history,
+        the bars are not converted to HistoryTick and the spread is applied to whole columns, requires numpy
+
+        Returns:
+            Dict[str, np.ndarray]: the columns time (epoch seconds), open, high, low, close and volume
+        """
+        resolution, type = self.__validate_history_args(resolution, type)
+        response = self.__request_history(
+            symbol,
+            frm,
+            int(time.time()) if to is None else to,
+            resolution,
+            type,
+            count_back,
+        )
+        return self.__history_to_arrays(response.data or [], symbol, type)
+
+    def get_market_history_range(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime],
+        to: Union[int, float, str, dt.datetime] = None,
+        resolution: Union[Resolution, str] = Resolution.M1,
+        type: Union[MarketType, str] = MarketType.BID,
+        chunk_size: int = 1000,
+        max_workers: int = None,
+    ) -> List[HistoryTick]:
+        """get the market history between two times whatever the number of bars, the range is split in windows of
+        chunk_size bars requested concurrently, the overlapping bars are removed and the bars are returned in order
+
+        Args:
+            symbol (int | Symbol): the symbol id or the symbol
+            frm (int | float | str | dt.datetime): from which time.
+            to (int | float | str | dt.datetime, optional): to which time. Defaults to now.
+            resolution (Resolution | str, optional): the time period. Defaults to Resolution.M1 (1 minute).
+            type (MarketType | str, optional): the type of the market. Defaults to MarketType.BID.
+            chunk_size (int, optional): how many bars to request at once. Defaults to 1000.
+            max_workers (int, optional): how many requests to run at the same time. Defaults to the config pool_maxsize.
+
+        Returns:
+            List[HistoryTick]: the market history
+        """
+        resolution, type = self.__validate_history_args(resolution, type)
+        rows = self.__request_history_range(
+            symbol, frm, to, resolution, type, chunk_size, max_workers
+        )
+        adjuster = self.__get_adjuster(symbol)
+        return [
+            self.__apply_spread(HistoryTick(**row), adjuster, type) for row in rows
+        ]
+
+    def get_cached_market_history(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime],
+        to: Union[int, float, str, dt.datetime] = None,
+        resolution: Union[Resolution, str] = Resolution.M1,
+        type: Union[MarketType, str] = MarketType.BID,
+        chunk_size: int = 1000,
+        max_workers: int = None,
+    ) -> List[HistoryTick]:
+        """get the market history between two times from the cache in config.history_cache_path,
+        only the bars missing from the cache are requested from the server with get_market_history_range,
+        the raw bars are stored and the spread is applied when they are read
+
+        Args:
+            symbol (int | Symbol): the symbol id or the symbol
+            frm (int | float | str | dt.datetime): from which time.
+            to (int | float | str | dt.datetime, optional): to which time. Defaults to now.
+            resolution (Resolution | str, optional): the time period. Defaults to Resolution.M1 (1 minute).
+            type (MarketType | str, optional): the type of the market. Defaults to MarketType.BID.
+            chunk_size (int, optional): how many bars to request at once. Defaults to 1000.
+            max_workers (int, optional): how many requests to run at the same time. Defaults to the config pool_maxsize.
+
+        Returns:
+            List[HistoryTick]: the market history
+        """
+        resolution, type = self.__validate_history_args(resolution, type)
+        store, key, frm, to = self.__top_up_history(
+            symbol, frm, to, resolution, type, chunk_size, max_workers
+        )
+        adjuster = self.__get_adjuster(symbol)
+        return [
+            self.__apply_spread(
+                HistoryTick(
+                    time=record[0],
+                    open=record[1],
+                    high=record[2],
+                    low=record[3],
+                    close=record[4],
+                    volume=record[5],
+                ),
+                adjuster,
+                type,
+            )
+            for record in store.read(key, frm, to)
+        ]
+
+    def get_cached_market_history_array(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime],
+        to: Union[int, float, str, dt.datetime] = None,
+        resolution: Union[Resolution, str] = Resolution.M1,
+        type: Union[MarketType, str] = MarketType.BID,
+        chunk_size: int = 1000,
+        max_workers: int = None,
+    ) -> Dict[str, "np.ndarray"]:
+        """get the market history between two times from the cache as numpy columns,
+        takes the same arguments as get_cached_market_history, requires numpy
+
+        Returns:
+            Dict[str, np.ndarray]: the columns time (epoch seconds), open, high, low, close and volume
+        """
+        require_numpy("get_cached_market_history_array")
+        resolution, type = self.__validate_history_args(resolution, type)
+        store, key, frm, to = self.__top_up_history(
+            symbol, frm, to, resolution, type, chunk_size, max_workers
+        )
+        bars = store.read_array(key, frm, to)
+        arrays = {field: bars[field] for field in bars.dtype.names}
+        adjuster = self.__get_adjuster(symbol)
+        if adjuster is not None:
+            spread = (
+                adjuster.bid_spread if type == MarketType.BID else adjuster.ask_spread
+            )
+            for field in ("open", "high", "low", "close"):
+                arrays[field] = adjuster.truncate_array(arrays[field] + spread)
+        return arrays
+
+    def get_history_cache_stats(self) -> Dict[str, int]:
+        """get the counters of the history cache
+
+        Returns:
+            Dict[str, int]: hits, the requests served from the disk only, and misses, the requests that needed the server
+        """
+        store = self.__get_history_store()
+        return {"hits": store.hits, "misses": store.misses}
+
+    def __top_up_history(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime],
+        to: Union[int, float, str, dt.datetime],
+        resolution: str,
+        type: str,
+        chunk_size: int,
+        max_workers: int,
+    ) -> Tuple[HistoryStore, Tuple[int, str, str], int, int]:
+        """request the bars missing from the cache before and after the cached range and store them
+
+        Returns:
+            Tuple[HistoryStore, Tuple[int, str, str], int, int]: the store, the key of the bars and the requested range
+        """
+        store = self.__get_history_store()
+        symbol_id = symbol.id if isinstance(symbol, Symbol) else symbol
+        key = (symbol_id, resolution.lower(), type.lower())
+        frm = convert_time_to_int(frm)
+        now = int(time.time())
+        to = now if to is None else min(convert_time_to_int(to), now)
+
+        coverage = store.coverage(key)
+        if coverage is None:
+            missing = [(frm, to)]
+        else:
+            missing = []
+            if frm < coverage[0]:
+                missing.append((frm, coverage[0]))
+            if to > coverage[1]:
+                # the last stored bar may have been stored before it was closed
+                last = store.last_time(key)
+                missing.append((coverage[1] if last is None else min(last, coverage[1]), to))
+
+        if missing:
+            store.misses += 1
+        else:
+            store.hits += 1
+
+        for start, end in missing:
+            rows = self.__request_history_range(
+                symbol, start, end, resolution, type, chunk_size, max_workers
+            )
+            records = [
+                (
+                    convert_time_to_int(row["time"]),
+                    row["open"],
+                    row["high"],
+                    row["low"],
+                    row["close"],
+                    row["volume"],
+                )
+                for row in rows
+            ]
+            store.write(key, records, start, end)
+        return store, key, frm, to
+
+    def __get_history_store(self) -> HistoryStore:
+        """get the store of the history cache
+
+        Raises:
+            ValueError: if history_cache_path is not set in the config
+
+        Returns:
+            HistoryStore: the store
+        """
+        if self.__history_store is None:
+            if not self.__config.history_cache_path:
+                raise ValueError(
+                    "history_cache_path must be set in the config to use the history cache"
+                )
+            self.__history_store = HistoryStore(self.__config.history_cache_path)
+        return self.__history_store
+
+    def __request_history_range(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime],
+        to: Union[int, float, str, dt.datetime],
+        resolution: str,
+        type: str,
+        chunk_size: int,
+        max_workers: int = None,
+    ) -> List[dict]:
+        """request the raw bars between two times in concurrent windows
+
+        Returns:
+            List[dict]: the raw bars without duplicates ordered by time
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be greater than 0")
+        frm = convert_time_to_int(frm)
+        to = int(time.time()) if to is None else convert_time_to_int(to)
+        # the window boundaries are shared so no bar falls between two windows
+        span = int(resolution_to_timedelta[resolution.lower()].total_seconds()) * chunk_size
+        windows = [(start, min(start + span, to)) for start in range(frm, to, span)]
+        if not windows:
+            return []
+
+        def request(window: Tuple[int, int]) -> List[dict]:
+            response = self.__request_history(
+                symbol, window[0], window[1], resolution, type, chunk_size + 1
+            )
+            return response.data or []
+
+        workers = min(max_workers or self.__config.pool_maxsize, len(windows))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(request, windows))
+
+        bars = {}
+        for chunk in chunks:
+            for row in chunk:
+                bars[convert_time_to_int(row["time"])] = row
+        return [bars[t] for t in sorted(bars)]
+
+    def __validate_history_args(
+        self, resolution: Union[Resolution, str], type: Union[MarketType, str]
+    ) -> Tuple[str, str]:
+        """validate the resolution and the type of the market history and convert them to their string values
+
+        Raises:
+            ValueError: if the resolution or the type is invalid
+
+        Returns:
+            Tuple[str, str]: the resolution and the type
+        """
         if isinstance(resolution, Resolution):
             resolution = resolution.value
         elif isinstance(resolution, str):
@@ -57,7 +349,22 @@ class MarketService:
                 raise ValueError(
                     f"Invalid type, available types: {', '.join([t.value for t in MarketType])}"
                 )
+        return resolution, type
+
+    def __request_history(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime],
+        to: Union[int, float, str, dt.datetime],
+        resolution: str,
+        type: str,
+        count_back: int,
+    ) -> BaseResponse:
+        """request the market history from the server
 
+        Returns:
+            BaseResponse: the response holding the raw bars
+        """
         to = convert_time_to_int(to)
         frm = calculate_frm_value(frm, to, resolution, count_back)
 
@@ -75,34 +382,106 @@ class MarketService:
                 }
             )
         )
+        return response
 
-        return [
-            self.__apply_spread(tick, symbol, type)
-            # tick
-            for tick in response.deserialize_list(HistoryTick)
-        ]
+    async def get_market_history_async(
+        self,
+        symbol: Union[int, Symbol],
+        frm: Union[int, float, str, dt.datetime] = None,
+        to: Union[int, float, str, dt.datetime] = None,
+        resolution: Union[Resolution, str] = Resolution.M1,
+        type: Union[MarketType, str] = MarketType.BID,
+        count_back: int = 300,
+    ) -> List[HistoryTick]:
+        """get the market history without blocking the event loop, takes the same arguments as get_market_history
+
+        Returns:
+            List[HistoryTick]: the market history
+        """
+        return await run_async(
+            self.__config,
+            MarketService.get_market_history,
+            self,
+            symbol,
+            frm,
+            int(time.time()) if to is None else to,
+            resolution,
+            type,
+            count_back,
+        )
 
     def __apply_spread(
-        self, tick: HistoryTick, symbol: Union[int, Symbol], type: MarketType
+        self,
+        tick: HistoryTick,
+        adjuster: Union[PriceAdjuster, None],
+        type: MarketType,
     ) -> HistoryTick:
-        """apply the spread to the symbol
+        """apply the spread to the bar, the adjuster is resolved once per request with __get_adjuster
 
         Args:
-            symbol (Symbol): the symbol
+            tick (HistoryTick): the bar
+            adjuster (PriceAdjuster | None): the price adjuster of the symbol, None to leave the bar as it is
+            type (MarketType): the type of the market
 
         Returns:
-            Symbol: the symbol with the spread applied
+            HistoryTick: the bar with the spread applied
         """
-        if isinstance(symbol, int):
-            symbol = self.__config.get_symbol(symbol)
-        if symbol is None:
+        if adjuster is None:
             return tick
 
-        bid, ask = calculate_spread(symbol)
-        spread = bid if type == MarketType.BID else ask
-        tick.open = truncate_float(tick.open + spread, symbol.digits)
-        tick.close = truncate_float(tick.close + spread, symbol.digits)
-        tick.low = truncate_float(tick.low + spread, symbol.digits)
-        tick.high = truncate_float(tick.high + spread, symbol.digits)
+        spread = adjuster.bid_spread if type == MarketType.BID else adjuster.ask_spread
+        tick.open = adjuster.truncate(tick.open + spread)
+        tick.close = adjuster.truncate(tick.close + spread)
+        tick.low = adjuster.truncate(tick.low + spread)
+        tick.high = adjuster.truncate(tick.high + spread)
 
         return tick
+
+    def __history_to_arrays(
+        self, rows: List[dict], symbol: Union[int, Symbol], type: MarketType
+    ) -> Dict[str, "np.ndarray"]:
+        """convert the raw bars to numpy columns and apply the spread to the prices
+
+        Args:
+            rows (List[dict]): the raw bars received from the server
+            symbol (int | Symbol): the symbol of the bars
+            type (MarketType): the type of the market
+
+        Returns:
+            Dict[str, np.ndarray]: the columns time, open, high, low, close and volume
+        """
+        np = require_numpy("get_market_history_array")
+        count = len(rows)
+        arrays = {
+            "time": np.fromiter(
+                (convert_time_to_int(row["time"]) for row in rows), np.int64, count
+            )
+        }
+        for field in ("open", "high", "low", "close", "volume"):
+            arrays[field] = np.fromiter(
+                (row[field] for row in rows), np.float64, count
+            )
+
+        adjuster = self.__get_adjuster(symbol)
+        if adjuster is not None:
+            spread = (
+                adjuster.bid_spread if type == MarketType.BID else adjuster.ask_spread
+            )
+            for field in ("open", "high", "low", "close"):
+                arrays[field] = adjuster.truncate_array(arrays[field] + spread)
+        return arrays
+
+    def __get_adjuster(self, symbol: Union[int, Symbol]) -> Union[PriceAdjuster, None]:
+        """get the price adjuster of the symbol
+
+        Args:
+            symbol (int | Symbol): the symbol id or the symbol
+
+        Returns:
+            PriceAdjuster | None: the price adjuster, None if the symbol is unknown
+        """
+        if isinstance(symbol, int):
+            return get_price_adjuster(self.__config, symbol)
+        if symbol is not None:
+            return PriceAdjuster(symbol)
+        return None
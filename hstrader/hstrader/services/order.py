@@ -1,5 +1,5 @@
-from ..helpers import HttpClient
-from ..config import Config
+from ..helpers import HttpClient, run_async
+from ..config import Config, Priority
 from ..models import *
 from typing import List
 from .urls import (
@@ -27,6 +27,7 @@ class OrderService:
         response = (
             HttpClient(self.__config, url=_URL_CREATEMYORDER)
             .set_authorization_header(self.__config.get_token())
+            .set_priority(Priority.ORDER)
             .post(order)
         )
         return response
@@ -43,6 +44,7 @@ class OrderService:
                 url=_URL_CANCELMYORDER_ORDER_ID.replace("%v", str(order_id)),
             )
             .set_authorization_header(self.__config.get_token())
+            .set_priority(Priority.CRITICAL)
             .post()
         )
 
@@ -63,6 +65,7 @@ class OrderService:
                     "%v", str(order.order_id)),
             )
             .set_authorization_header(self.__config.get_token())
+            .set_priority(Priority.ORDER)
             .put(order)
         )
         return response.data
@@ -78,7 +81,7 @@ class OrderService:
             .set_authorization_header(self.__config.get_token())
             .get()
         )
-        return response.deserialize_list(Order)
+        return response.deserialize_list(Order, self.__config.trusted_payloads)
     
     def get_orders_history(self) -> List[Order]:
         """get the list of orders of the account
@@ -91,4 +94,52 @@ class OrderService:
             .set_authorization_header(self.__config.get_token())
             .get()
         )
-        return response.deserialize_list(Order)
+        return response.deserialize_list(Order, self.__config.trusted_payloads)
+
+    async def create_order_async(self, order: Union[CrtOrder, dict]) -> str:
+        """send an order to the server without blocking the event loop
+
+        Args:
+            order (CrtOrder | dict): the order to send
+
+        Returns:
+            str: response from the server
+        """
+        return await run_async(self.__config, OrderService.create_order, self, order)
+
+    async def cancel_order_async(self, order_id: int) -> None:
+        """cancel an order without blocking the event loop
+
+        Args:
+            order_id (int): the order id
+        """
+        return await run_async(
+            self.__config, OrderService.cancel_order, self, order_id
+        )
+
+    async def update_order_async(self, order: Union[UpdOrder, dict]) -> str:
+        """update an existing order without blocking the event loop
+
+        Args:
+            order (UpdOrder | dict): the new order data
+
+        Returns:
+            str: response from the server
+        """
+        return await run_async(self.__config, OrderService.update_order, self, order)
+
+    async def get_orders_async(self) -> List[Order]:
+        """get the list of orders of the account without blocking the event loop
+
+        Returns:
+            List[Order]: list of orders of the account
+        """
+        return await run_async(self.__config, OrderService.get_orders, self)
+
+    async def get_orders_history_async(self) -> List[Order]:
+        """get the orders history of the account without blocking the event loop
+
+        Returns:
+            List[Order]: list of orders of the account
+        """
+        return await run_async(self.__config, OrderService.get_orders_history, self)
@@ -1,5 +1,5 @@
-from ..helpers import HttpClient
-from ..config import Config
+from ..helpers import HttpClient, run_async
+from ..config import Config, Priority
 from ..models import Position, UpdPosition, ClsPosition
 from typing import List, Union
 from .urls import (
@@ -25,7 +25,7 @@ class PositionService:
             .set_authorization_header(self.__config.get_token())
             .get()
         )
-        return response.deserialize_list(Position)
+        return response.deserialize_list(Position, self.__config.trusted_payloads)
 
 
     def get_position_history(self) -> List[Position]:
@@ -39,7 +39,7 @@ class PositionService:
             .set_authorization_header(self.__config.get_token())
             .get()
         )
-        return response.deserialize_list(Position)
+        return response.deserialize_list(Position, self.__config.trusted_payloads)
     def update_position(self, position: Union[UpdPosition, dict]) -> str:
         """update am existing position
 
@@ -58,6 +58,7 @@ class PositionService:
                 ),
             )
             .set_authorization_header(self.__config.get_token())
+            .set_priority(Priority.ORDER)
             .put(position)
         )
         return response.data
@@ -71,7 +72,52 @@ class PositionService:
                 ),
             )
             .set_authorization_header(self.__config.get_token())
+            .set_priority(Priority.CRITICAL)
             .post(data)
         )
         return response.data
 
+    async def get_positions_async(self) -> List[Position]:
+        """get the list of positions without blocking the event loop
+
+        Returns:
+            List[Position]: the list of positions
+        """
+        return await run_async(self.__config, PositionService.get_positions, self)
+
+    async def get_position_history_async(self) -> List[Position]:
+        """get the positions history without blocking the event loop
+
+        Returns:
+            List[Position]: the list of positions
+        """
+        return await run_async(
+            self.__config, PositionService.get_position_history, self
+        )
+
+    async def update_position_async(self, position: Union[UpdPosition, dict]) -> str:
+        """update an existing position without blocking the event loop
+
+        Args:
+            position (UpdPosition | dict): the new position data
+
+        Returns:
+            str: response from the server
+        """
+        return await run_async(
+            self.__config, PositionService.update_position, self, position
+        )
+
+    async def close_position_async(self, data: ClsPosition) -> str:
+        """close a position without blocking the event loop
+
+        Args:
+            data (ClsPosition): the position to close
+
+        Returns:
+            str: response from the server
+        """
+        return await run_async(
+            self.__config, PositionService.close_position, self, data
+        )
+
@@ -0,0 +1,414 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple, Union
+from ..config import Config
+from ..helpers import get_executor
+from ..models import *
+from .order import OrderService
+from .position import PositionService
+from .deal import DealService
+
+
+class _Index:
+    """Keeps objects by id with secondary indexes by symbol id, by status and by both,
+    each lookup is a dictionary access. The finished objects are kept up to history_size,
+    the oldest finished ones are removed past it
+
+    Args:
+        finished (Callable): tells if an object is finished, e.g. a canceled order
+        history_size (int, optional): the number of finished objects kept. Defaults to None to keep them all.
+    """
+
+    def __init__(self, finished: Callable[[BaseModel], bool], history_size: int = None):
+        self.by_id: Dict[int, BaseModel] = {}
+        self.__by_symbol: Dict[int, Dict[int, BaseModel]] = {}
+        self.__by_status: Dict[any, Dict[int, BaseModel]] = {}
+        self.__by_symbol_status: Dict[Tuple[int, any], Dict[int, BaseModel]] = {}
+        self.__finished = finished
+        self.__history_size = history_size
+        # the ids of the finished objects, from the oldest to the latest finished
+        self.__history: Dict[int, None] = {}
+
+    def put(self, obj: BaseModel) -> BaseModel:
+        """Add or replace an object, the fields missing from a partial update are kept from the stored object
+
+        Args:
+            obj (BaseModel): the object, must have an id
+
+        Returns:
+            BaseModel: the stored object
+        """
+        stored = self.by_id.get(obj.id)
+        if stored is not None:
+            self.remove(obj.id)
+            obj = stored.model_copy(
+                update={name: getattr(obj, name) for name in obj.model_fields_set}
+            )
+        self.by_id[obj.id] = obj
+        symbol_id, status = obj.symbol_id, getattr(obj, "status", None)
+        self.__by_symbol.setdefault(symbol_id, {})[obj.id] = obj
+        self.__by_status.setdefault(status, {})[obj.id] = obj
+        self.__by_symbol_status.setdefault((symbol_id, status), {})[obj.id] = obj
+        if self.__finished(obj):
+            self.__history.pop(obj.id, None)
+            self.__history[obj.id] = None
+            if self.__history_size is not None:
+                while len(self.__history) > self.__history_size:
+                    self.remove(next(iter(self.__history)))
+        return obj
+
+    def remove(self, id: int) -> Union[BaseModel, None]:
+        """Remove an object from all the indexes
+
+        Args:
+            id (int): the id of the object
+
+        Returns:
+            BaseModel | None: the removed object, None if it was not stored
+        """
+        obj = self.by_id.pop(id, None)
+        if obj is None:
+            return None
+        self.__history.pop(id, None)
+        symbol_id, status = obj.symbol_id, getattr(obj, "status", None)
+        for index, key in (
+            (self.__by_symbol, symbol_id),
+            (self.__by_status, status),
+            (self.__by_symbol_status, (symbol_id, status)),
+        ):
+            bucket = index[key]
+            del bucket[id]
+            if not bucket:
+                del index[key]
+        return obj
+
+    def find(self, symbol_id: int = None, status: any = None) -> List[BaseModel]:
+        """Get the objects matching a symbol id and/or a status
+
+        Args:
+            symbol_id (int, optional): the symbol id. Defaults to None for any symbol.
+            status (any, optional): the status. Defaults to None for any status.
+
+        Returns:
+            List[BaseModel]: the matching objects
+        """
+        if symbol_id is None and status is None:
+            bucket = self.by_id
+        elif status is None:
+            bucket = self.__by_symbol.get(symbol_id, {})
+        elif symbol_id is None:
+            bucket = self.__by_status.get(status, {})
+        else:
+            bucket = self.__by_symbol_status.get((symbol_id, status), {})
+        return list(bucket.values())
+
+    def clear(self):
+        """Remove all the objects"""
+        self.by_id.clear()
+        self.__by_symbol.clear()
+        self.__by_status.clear()
+        self.__by_symbol_status.clear()
+        self.__history.clear()
+
+
+_FINISHED_ORDERS = frozenset(
+    (OrderStatus.FILLED, OrderStatus.CANCELED, OrderStatus.REJECTED, OrderStatus.EXPIRED)
+)
+
+
+class StateStore:
+    """In memory mirror of the orders, positions and deals of the account, seeded with the REST api
+    and kept current with the websocket events, the queries don't make any request to the server.
+
+    Orders and positions are kept once filled, canceled or closed with their last status, deleted ones are removed.
+    The last history_size finished orders, closed positions and deals are kept, the older ones are removed.
+
+    The snapshot of a seed is requested while the events keep coming, call begin_seed before requesting it:
+    the events received until seed is called are applied again on top of the snapshot so they are not lost.
+
+    Args:
+        history_size (int, optional): the number of finished orders, of closed positions and of deals kept.
+            Defaults to 1000, None keeps them all.
+    """
+
+    def __init__(self, history_size: int = 1000):
+        self.__lock = threading.RLock()
+        self.__orders = _Index(lambda order: order.status in _FINISHED_ORDERS, history_size)
+        self.__positions = _Index(
+            lambda position: position.status == PositionStatus.CLOSED, history_size
+        )
+        self.__deals = _Index(lambda deal: True, history_size)
+        # the number of seeds whose snapshot is being requested and the events received meanwhile
+        self.__seeding = 0
+        self.__missed: List[Tuple[Callable, tuple]] = []
+
+    def begin_seed(self):
+        """Start keeping the events received until the snapshot requested next is passed to seed,
+        end_seed must be called instead of seed if the snapshot can't be requested
+        """
+        with self.__lock:
+            self.__seeding += 1
+
+    def end_seed(self):
+        """Stop keeping the events for a seed started with begin_seed, the events are dropped
+        once no seed is running"""
+        with self.__lock:
+            if self.__seeding > 0:
+                self.__seeding -= 1
+            if self.__seeding == 0:
+                self.__missed.clear()
+
+    def seed(self, orders: List[Order], positions: List[Position], deals: List[Deal]):
+        """Replace the content of the store with a snapshot of the account, the events received since
+        begin_seed are applied again on top of it as they are newer than the snapshot or already part of it
+
+        Args:
+            orders (List[Order]): the active orders
+            positions (List[Position]): the open positions
+            deals (List[Deal]): the deals
+        """
+        with self.__lock:
+            for index, items in (
+                (self.__orders, orders),
+                (self.__positions, positions),
+                (self.__deals, deals),
+            ):
+                index.clear()
+                for item in items or []:
+                    if item.id is not None:
+                        index.put(item)
+            for apply, args in self.__missed:
+                apply(*args)
+            self.end_seed()
+
+    def get_order(self, id: int) -> Union[Order, None]:
+        """get an order by id
+
+        Args:
+            id (int): the id of the order
+
+        Returns:
+            Order | None: the order, None if it's unknown
+        """
+        return self.__orders.by_id.get(id)
+
+    def get_orders(
+        self, symbol_id: int = None, status: OrderStatus = None
+    ) -> List[Order]:
+        """get the orders of a symbol and/or with a status
+
+        Args:
+            symbol_id (int, optional): the id of the symbol. Defaults to None for all symbols.
+            status (OrderStatus, optional): the status of the orders. Defaults to None for all statuses.
+
+        Returns:
+            List[Order]: the matching orders
+        """
+        with self.__lock:
+            return self.__orders.find(symbol_id, status)
+
+    def get_position(self, id: int) -> Union[Position, None]:
+        """get a position by id
+
+        Args:
+            id (int): the id of the position
+
+        Returns:
+            Position | None: the position, None if it's unknown
+        """
+        return self.__positions.by_id.get(id)
+
+    def get_positions(
+        self, symbol_id: int = None, status: PositionStatus = None
+    ) -> List[Position]:
+        """get the positions of a symbol and/or with a status
+
+        Args:
+            symbol_id (int, optional): the id of the symbol. Defaults to None for all symbols.
+            status (PositionStatus, optional): the status of the positions. Defaults to None for all statuses.
+
+        Returns:
+            List[Position]: the matching positions
+        """
+        with self.__lock:
+            return self.__positions.find(symbol_id, status)
+
+    def get_deal(self, id: int) -> Union[Deal, None]:
+        """get a deal by id
+
+        Args:
+            id (int): the id of the deal
+
+        Returns:
+            Deal | None: the deal, None if it's unknown
+        """
+        return self.__deals.by_id.get(id)
+
+    def get_deals(self, symbol_id: int = None) -> List[Deal]:
+        """get the deals of a symbol
+
+        Args:
+            symbol_id (int, optional): the id of the symbol. Defaults to None for all symbols.
+
+        Returns:
+            List[Deal]: the matching deals
+        """
+        with self.__lock:
+            return self.__deals.find(symbol_id)
+
+    def on_order(self, order: Order, status: Status):
+        """Apply an order event received from the websocket
+
+        Args:
+            order (Order): the order received
+            status (Status): the status of the event
+        """
+        if order is None or order.id is None:
+            return
+        with self.__lock:
+            self.__keep(self.__apply_order, order, status)
+            self.__apply_order(order, status)
+
+    def __apply_order(self, order: Order, status: Status):
+        with self.__lock:
+            if status == Status.DELETED:
+                self.__orders.remove(order.id)
+                return
+            if status == Status.CANCELED and "status" not in order.model_fields_set:
+                order = order.model_copy(update={"status": OrderStatus.CANCELED})
+            self.__orders.put(order)
+
+    def on_position(self, position: Position, status: Status):
+        """Apply a position event received from the websocket
+
+        Args:
+            position (Position): the position received
+            status (Status): the status of the event
+        """
+        if position is None or position.id is None:
+            return
+        with self.__lock:
+            self.__keep(self.__apply_position, position, status)
+            self.__apply_position(position, status)
+
+    def __apply_position(self, position: Position, status: Status):
+        with self.__lock:
+            if status == Status.DELETED:
+                self.__positions.remove(position.id)
+                return
+            if status == Status.CLOSED and "status" not in position.model_fields_set:
+                position = position.model_copy(update={"status": PositionStatus.CLOSED})
+            self.__positions.put(position)
+
+    def on_deal(self, deal: Deal, status: Status):
+        """Apply a deal event received from the websocket
+
+        Args:
+            deal (Deal): the deal received
+            status (Status): the status of the event
+        """
+        if deal is None or deal.id is None:
+            return
+        with self.__lock:
+            self.__keep(self.__apply_deal, deal, status)
+            self.__apply_deal(deal, status)
+
+    def __apply_deal(self, deal: Deal, status: Status):
+        with self.__lock:
+            if status == Status.DELETED:
+                self.__deals.remove(deal.id)
+                return
+            self.__deals.put(deal)
+
+    def on_position_pl(self, pl: PositionPL):
+        """Apply the profit or loss of a position received with the summary
+
+        Args:
+            pl (PositionPL): the profit or loss of the position
+        """
+        with self.__lock:
+            self.__keep(self.__apply_position_pl, pl)
+            self.__apply_position_pl(pl)
+
+    def __apply_position_pl(self, pl: PositionPL):
+        position = self.__positions.by_id.get(pl.position_id)
+        if position is not None:
+            # the stored position may have been returned to the user, it's replaced instead of changed
+            self.__positions.put(position.model_copy(update={"profit": pl.profit}))
+
+    def __keep(self, apply: Callable, *args):
+        """keep an event received while a seed is running to apply it again on top of the snapshot"""
+        if self.__seeding:
+            self.__missed.append((apply, args))
+
+
+class StateService:
+    def __init__(self, config: Config):
+        """Create a new instance of the StateService
+
+        Args:
+            config (Config): the configuration object to be used for the service
+        """
+        self.__config = config
+        self.__state: StateStore = None
+
+    def track_state(self) -> StateStore:
+        """Mirror the orders, positions and deals of the account in memory, the mirror is seeded with the REST api
+        and kept current with the websocket events, it's seeded again after a reconnection since events may have been missed
+
+        Returns:
+            StateStore: the mirror, the same one is returned on every call
+        """
+        if self.__state is not None:
+            return self.__state
+
+        state = StateStore(self.__config.state_history_size)
+        # listen before seeding, the events received while the snapshot is requested are applied on top of it
+        self._add_listener(Event.ORDER, state.on_order)
+        self._add_listener(Event.POSITION, state.on_position)
+        self._add_listener(Event.DEAL, state.on_deal)
+        self._add_listener(Event.POSITION_PL, state.on_position_pl)
+        self._add_listener(Event.RECONNECT, self.__get_on_reconnect_callback(state))
+        state.begin_seed()
+        self.__seed_state(state)
+        self.__state = state
+        return state
+
+    def __seed_state(self, state: StateStore):
+        """Seed the mirror with the current orders, positions and deals, begin_seed must be called on the mirror
+        before so the events received while they are requested are kept
+
+        Args:
+            state (StateStore): the mirror to seed
+        """
+        try:
+            orders = OrderService.get_orders(self)
+            positions = PositionService.get_positions(self)
+            deals = DealService.get_deals(self)
+        except Exception:
+            state.end_seed()
+            raise
+        state.seed(orders, positions, deals)
+
+    def __get_on_reconnect_callback(self, state: StateStore) -> Callable:
+        """Seed the mirror again in the background after a reconnection, a failed seed is logged
+        and the mirror is seeded again on the next reconnection"""
+
+        def on_seeded(future: Future):
+            error = future.exception()
+            if error is not None and not self.__config.disable_logging:
+                logging.warning(f"Could not seed the state again after the reconnection: {error}")
+
+        def on_reconnect(gap: Gap):
+            # the events are kept from now on, the loop keeps applying them while the snapshot is requested
+            state.begin_seed()
+            try:
+                future = get_executor(self.__config).submit(self.__seed_state, state)
+            except RuntimeError:
+                # the executor is shut down, the client is closing
+                state.end_seed()
+                return
+            future.add_done_callback(on_seeded)
+
+        return on_reconnect
@@ -1,9 +1,13 @@
-from ..helpers import HttpClient
+from ..helpers import HttpClient, run_async
 from ..config import Config
 from ..models import Symbol
 from typing import List
 from .urls import _GETMYSYMBOLS, _GETMYSYMBOL
 from .utils import apply_spread
+import json
+import logging
+import os
+import threading
 
 
 class SymbolService:
@@ -24,7 +28,9 @@ class SymbolService:
             .set_authorization_header(self.__config.get_token())
             .get()
         )
-        symbol = apply_spread(response.deserialize(Symbol))
+        symbol = apply_spread(
+            response.deserialize(Symbol, self.__config.trusted_payloads)
+        )
         self.__config.set_symbol(symbol)
         return symbol
 
@@ -36,11 +42,93 @@ class SymbolService:
         Returns:
             List[Symbol]: the list of symbols
         """
+        # the symbols updated by the websocket while they are requested are newer than the response
+        since = self.__config.get_symbols_sequence()
         response = (
             HttpClient(self.__config, url=_GETMYSYMBOLS)
             .set_authorization_header(self.__config.get_token())
             .get()
         )
-        symbols = [apply_spread(symbol) for symbol in response.deserialize_list(Symbol)]
-        self.__config.set_symbols(symbols)
+        symbols = [
+            apply_spread(symbol)
+            for symbol in response.deserialize_list(
+                Symbol, self.__config.trusted_payloads
+            )
+        ]
+        self.__config.set_symbols(symbols, since)
+        if self.__config.symbols_cache_path:
+            self.save_symbols()
         return symbols
+
+    def load_symbols(self) -> bool:
+        """load the symbols saved in config.symbols_cache_path into the config
+
+        Returns:
+            bool: True if the symbols were loaded, False if there is no saved symbols
+        """
+        path = self.__config.symbols_cache_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                symbols = [Symbol(**item) for item in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            if not self.__config.disable_logging:
+                logging.warning(f"Could not load the saved symbols: {e}")
+            return False
+        self.__config.set_symbols(symbols)
+        return True
+
+    def save_symbols(self) -> None:
+        """save the symbols of the config in config.symbols_cache_path
+
+        Raises:
+            ValueError: if symbols_cache_path is not set in the config
+        """
+        path = self.__config.symbols_cache_path
+        if not path:
+            raise ValueError(
+                "symbols_cache_path must be set in the config to save the symbols"
+            )
+        symbols = [
+            symbol.model_dump(mode="json", exclude_none=True)
+            for symbol in list(self.__config.get_symbols())
+        ]
+        temporary = path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(symbols, f)
+        os.replace(temporary, path)
+
+    def refresh_symbols(self) -> threading.Thread:
+        """get the symbols from the server in a background thread, the config and the saved symbols are updated once received
+
+        Returns:
+            threading.Thread: the thread refreshing the symbols
+        """
+
+        def refresh():
+            try:
+                SymbolService.get_symbols(self)
+            except Exception as e:
+                if not self.__config.disable_logging:
+                    logging.warning(f"Could not refresh the symbols: {e}")
+
+        thread = threading.Thread(target=refresh, name="hstrader-symbols", daemon=True)
+        thread.start()
+        return thread
+
+    async def get_symbol_async(self, name: str) -> Symbol:
+        """get a symbol by name without blocking the event loop
+
+        Returns:
+            Symbol: symbol requested
+        """
+        return await run_async(self.__config, SymbolService.get_symbol, self, name)
+
+    async def get_symbols_async(self) -> List[Symbol]:
+        """get the list of symbols without blocking the event loop
+
+        Returns:
+            List[Symbol]: the list of symbols
+        """
+        return await run_async(self.__config, SymbolService.get_symbols, self)
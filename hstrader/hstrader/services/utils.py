@@ -1,5 +1,6 @@
 from ..models import (
     Tick,
+    RawTick,
     Summary,
     BaseModel,
     Event,
@@ -10,42 +11,96 @@ from ..models import (
     Symbol,
     PositionPL,
 )
+from ..config import Config
 import json
 from typing import Tuple, Union, List
 from decimal import Decimal, ROUND_DOWN
 import datetime as dt
 import time
 
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency, only needed for the array outputs
+    np = None
 
-def deserialize_tick(message: bytes) -> Tick:
+
+def require_numpy(feature: str):
+    """Return the numpy module or raise an explicit error if it is not installed
+
+    Args:
+        feature (str): the name of the feature requiring numpy
+
+    Raises:
+        ImportError: if numpy is not installed
+
+    Returns:
+        module: the numpy module
+    """
+    if np is None:
+        raise ImportError(
+            f"numpy is required for {feature}, install it with: pip install hstrader[numpy]"
+        )
+    return np
+
+
+def deserialize_raw_tick(message: Union[bytes, memoryview]) -> RawTick:
+    """Deserialize the tick message to a raw tick, the fields are parsed directly from the bytes
+    without decoding the message to a string and without any validation
+
+    Args:
+        message (bytes | memoryview): incoming message from the server
+
+    Returns:
+        RawTick: a raw tick
+    """
+    if isinstance(message, memoryview):
+        message = message.tobytes()
+    splitted = message.split(b",")
+    return RawTick(
+        int(splitted[0]),
+        float(splitted[1]),
+        float(splitted[2]),
+        float(splitted[3]),
+        float(splitted[4]),
+        float(splitted[5]),
+        float(splitted[6]),
+        float(splitted[7]),
+        int(splitted[8]),
+    )
+
+
+def deserialize_tick(message: Union[bytes, memoryview]) -> Tick:
     """Deserialize the tick message to a tick object
 
     Args:
-        message (bytes): incoming message from the server
+        message (bytes | memoryview): incoming message from the server
+
+    Returns:
+        Tick: a tick object
+    """
+    return raw_tick_to_tick(deserialize_raw_tick(message))
+
+
+def raw_tick_to_tick(tick: RawTick) -> Tick:
+    """Convert a raw tick to a validated tick object
+
+    Args:
+        tick (RawTick): the raw tick
 
     Returns:
         Tick: a tick object
     """
-    splitted = message.decode("utf-8").split(",")
-    ID = int(splitted[0])
-    Bid = float(splitted[1])
-    Ask = float(splitted[2])
-    High = float(splitted[3])
-    Low = float(splitted[4])
-    Close = float(splitted[5])
-    Open = float(splitted[6])
-    Volume = float(splitted[7])
-    Time = int(splitted[8])
     return Tick(
-        symbol_id=ID,
-        bid=Bid,
-        ask=Ask,
-        high=High,
-        low=Low,
-        close=Close,
-        open=Open,
-        volume=Volume,
-        time=Time,
+        symbol_id=tick.symbol_id,
+        bid=tick.bid,
+        ask=tick.ask,
+        high=tick.high,
+        low=tick.low,
+        close=tick.close,
+        open=tick.open,
+        volume=tick.volume,
+        time=tick.time,
+        dropped=tick.dropped,
     )
 
 
@@ -91,20 +146,6 @@ def deserialize_summary(message: str) -> Tuple[Summary, List[PositionPL]]:
     )
 
 
-def deserialize_model(cls: BaseModel, payload: str) -> BaseModel:
-    """Deserialize the incoming message to a BaseModel object (cls) using the payload
-
-    Args:
-        cls (BaseModel): the class of the object to deserialize to
-        payload (str): the incoming message from the server
-
-    Returns:
-        BaseModel: the class object after deserialization
-    """
-    message = json.loads(payload)
-    return cls(**message.get("payload"))
-
-
 def convert_to_float(value: str) -> float:
     """Convert a string to a float
 
@@ -124,6 +165,7 @@ events_deserializer = {
     Event.ORDER: Order,
     Event.POSITION: Position,
     Event.DEAL: Deal,
+    Event.SYMBOL: Symbol,
     Event.ERROR: Error,
 }
 
@@ -135,6 +177,102 @@ def truncate_float(number, digits):
     )
 
 
+class PriceAdjuster:
+    """Spread offsets and truncation of a symbol computed once, to be applied to every price of the symbol,
+    the truncation gives the same results as truncate_float using scaled integers instead of Decimal
+
+    Args:
+        symbol (Symbol): the symbol to adjust the prices of
+    """
+
+    __slots__ = ("digits", "scale", "bid_spread", "ask_spread", "spread")
+
+    def __init__(self, symbol: Symbol):
+        self.bid_spread, self.ask_spread = calculate_spread(symbol)
+        self.spread = symbol.spread
+        self.digits = symbol.digits
+        self.scale = 10**symbol.digits if symbol.digits is not None else None
+
+    def truncate(self, number: float) -> float:
+        """Truncate a number to the digits of the symbol
+
+        Args:
+            number (float): the number to truncate
+
+        Returns:
+            float: the truncated number
+        """
+        scale = self.scale
+        if scale is None or number == 0:
+            return number
+        if number < 0:
+            return -self.truncate(-number)
+        # the product may land on either side of the integer, the exact comparisons fix it up
+        scaled = int(number * scale)
+        if (scaled + 1) / scale <= number:
+            scaled += 1
+        elif scaled / scale > number:
+            scaled -= 1
+        return scaled / scale
+
+    def truncate_array(self, numbers: "np.ndarray") -> "np.ndarray":
+        """Truncate an array of numbers to the digits of the symbol, same results as truncate
+
+        Args:
+            numbers (np.ndarray): the numbers to truncate
+
+        Returns:
+            np.ndarray: the truncated numbers
+        """
+        np = require_numpy("truncate_array")
+        scale = self.scale
+        if scale is None:
+            return numbers
+        absolute = np.abs(numbers)
+        scaled = np.trunc(absolute * scale)
+        scaled += (scaled + 1) / scale <= absolute
+        scaled -= scaled / scale > absolute
+        return np.copysign(scaled / scale, numbers)
+
+    def adjust_tick(self, bid: float, ask: float) -> Tuple[float, float]:
+        """Apply the spread to the bid and ask prices of a tick
+
+        Args:
+            bid (float): the bid price received from the server
+            ask (float): the ask price received from the server
+
+        Returns:
+            Tuple[float, float]: the bid and ask prices with the spread applied
+        """
+        bid = self.truncate(bid + self.bid_spread)
+        if self.spread is not None:
+            ask = self.truncate(bid + self.spread)
+        else:
+            ask = self.truncate(ask + self.ask_spread)
+        return bid, ask
+
+
+def get_price_adjuster(config: Config, symbol_id: int) -> Union[PriceAdjuster, None]:
+    """Get the price adjuster of a symbol, it is cached in the config until the symbol is set again
+
+    Args:
+        config (Config): the config holding the symbols
+        symbol_id (int): the symbol id
+
+    Returns:
+        PriceAdjuster | None: the price adjuster, None if the symbol is unknown
+    """
+    adjusters = config._adjusters
+    adjuster = adjusters.get(symbol_id)
+    if adjuster is None:
+        symbol = config.get_symbol(symbol_id)
+        if symbol is None:
+            return None
+        adjuster = PriceAdjuster(symbol)
+        adjusters[symbol_id] = adjuster
+    return adjuster
+
+
 def calculate_spread(symbol: Symbol) -> Tuple[float, float]:
     """Calculate the spread of a symbol
 
@@ -174,32 +312,24 @@ def apply_spread(symbol: Symbol) -> Symbol:
     if symbol.spread is None:
         symbol
     else:
-        # calculate the spread
-        bid_spread, ask_spread = calculate_spread(symbol)
+        # calculate the spread and the truncation once for all the prices
+        adjuster = PriceAdjuster(symbol)
+        bid_spread, ask_spread = adjuster.bid_spread, adjuster.ask_spread
+        truncate = adjuster.truncate
         # apply the spread to the symbol and truncate the digits
-        symbol.last_bid = truncate_float(symbol.last_bid + bid_spread, symbol.digits)
-        symbol.low_bid = truncate_float(symbol.low_bid + bid_spread, symbol.digits)
-        symbol.high_bid = truncate_float(symbol.high_bid + bid_spread, symbol.digits)
+        symbol.last_bid = truncate(symbol.last_bid + bid_spread)
+        symbol.low_bid = truncate(symbol.low_bid + bid_spread)
+        symbol.high_bid = truncate(symbol.high_bid + bid_spread)
         if symbol.spread is not None:
-            symbol.low_ask = truncate_float(symbol.low_bid + ask_spread, symbol.digits)
-            symbol.high_ask = truncate_float(
-                symbol.high_bid + ask_spread, symbol.digits
-            )
-            symbol.last_ask = truncate_float(
-                symbol.last_bid + ask_spread, symbol.digits
-            )
+            symbol.low_ask = truncate(symbol.low_bid + ask_spread)
+            symbol.high_ask = truncate(symbol.high_bid + ask_spread)
+            symbol.last_ask = truncate(symbol.last_bid + ask_spread)
         else:
-            symbol.low_ask = truncate_float(symbol.low_ask + ask_spread, symbol.digits)
-            symbol.high_ask = truncate_float(
-                symbol.high_ask + ask_spread, symbol.digits
-            )
-            symbol.last_ask = truncate_float(
-                symbol.last_ask + ask_spread, symbol.digits
-            )
-        symbol.open = truncate_float(symbol.open + symbol.spread_balance, symbol.digits)
-        symbol.close = truncate_float(
-            symbol.close + symbol.spread_balance, symbol.digits
-        )
+            symbol.low_ask = truncate(symbol.low_ask + ask_spread)
+            symbol.high_ask = truncate(symbol.high_ask + ask_spread)
+            symbol.last_ask = truncate(symbol.last_ask + ask_spread)
+        symbol.open = truncate(symbol.open + symbol.spread_balance)
+        symbol.close = truncate(symbol.close + symbol.spread_balance)
 
     return symbol
 
@@ -234,6 +364,7 @@ resolution_to_timedelta = {
     "1d": dt.timedelta(days=1),
     "1w": dt.timedelta(weeks=1),
     "1M": dt.timedelta(weeks=4),
+    "1mo": dt.timedelta(weeks=4),
 }
 
 
@@ -1,10 +1,27 @@
+import asyncio
 import json
-from ..config import Config
-from ..helpers import WebSocketClient
+from collections import OrderedDict, deque
+from ..config import Config, TickDelivery, Priority
+from ..helpers import (
+    WebSocketClient,
+    ConflatingQueue,
+    BoundedQueue,
+    Dispatcher,
+    TickWindow,
+    CandleAggregator,
+    FrameRecorder,
+    read_frames,
+)
+from ..helpers.fast_json import json_loads
 from ..models import *
-from typing import Callable, Union
+from typing import Callable, Union, Dict, FrozenSet, List, NamedTuple, Tuple
 from .utils import *
+from .auth import AuthService
+import datetime as dt
+import inspect
 import logging
+import os
+import time
 
 
 class _WS_Event(Enum):
@@ -27,6 +44,210 @@ class _WS_Event(Enum):
     SYMBOL_CREATE = "symbol_create"
 
 
+# the request event resolved by each event received from the server
+_acknowledgements = {
+    (Event.ORDER, Status.CREATED): _WS_Event.ORDER_CREATE,
+    (Event.ORDER, Status.UPDATED): _WS_Event.ORDER_UPDATE,
+    (Event.ORDER, Status.CANCELED): _WS_Event.ORDER_CANCEL,
+    (Event.POSITION, Status.UPDATED): _WS_Event.POSITION_UPDATE,
+    (Event.POSITION, Status.CLOSED): _WS_Event.POSITION_CLOSE,
+}
+
+
+# the event, status and payload model of each type of json message received from the server, e.g. "order_create"
+_routes: Dict[str, Tuple[Event, Union[Status, None], type]] = {
+    f"{event.value}_{status.value}": (event, status, events_deserializer.get(event))
+    for event in Event
+    for status in Status
+}
+_routes[Event.ERROR.value] = (Event.ERROR, None, Error)
+
+# the priority of the events sent to the server when they wait for the rate limiter
+_priorities = {
+    _WS_Event.ORDER_CANCEL: Priority.CRITICAL,
+    _WS_Event.POSITION_CLOSE: Priority.CRITICAL,
+    _WS_Event.ORDER_CREATE: Priority.ORDER,
+    _WS_Event.ORDER_UPDATE: Priority.ORDER,
+    _WS_Event.POSITION_UPDATE: Priority.ORDER,
+    _WS_Event.START_MARKET_FEED: Priority.FEED,
+    _WS_Event.STOP_MARKET_FEED: Priority.FEED,
+}
+
+# the events whose handlers can be filtered by symbol and by status
+_SYMBOL_EVENTS = frozenset(
+    (Event.MARKET, Event.BAR, Event.ORDER, Event.POSITION, Event.DEAL, Event.SYMBOL)
+)
+_STATUS_EVENTS = frozenset((Event.ORDER, Event.POSITION, Event.DEAL, Event.SYMBOL))
+
+_MARKET_ROUTE = (Event.MARKET, None, None)
+_SUMMARY_ROUTE = (Event.SUMMARY, None, None)
+
+
+class _PendingRequests:
+    """Keeps the futures of the requests sent over the websocket until the server answers them,
+    requests are matched by (event, key) in the order they were sent
+    """
+
+    def __init__(self):
+        self.__queues: Dict[Tuple[_WS_Event, any], deque] = {}
+        self.__futures: Dict[asyncio.Future, Tuple[_WS_Event, any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__futures)
+
+    def add(self, event: _WS_Event, key: any, future: asyncio.Future):
+        """Add a pending request, it's removed automatically once the future is done
+
+        Args:
+            event (_WS_Event): the event sent to the server
+            key (any): the key identifying the answer of the server
+            future (asyncio.Future): the future to resolve with the answer
+        """
+        self.__queues.setdefault((event, key), deque()).append(future)
+        self.__futures[future] = (event, key)
+        future.add_done_callback(self.discard)
+
+    def resolve(self, event: _WS_Event, key: any, result: any) -> bool:
+        """Resolve the oldest pending request sent with event and key
+
+        Returns:
+            bool: True if a request was resolved
+        """
+        queue = self.__queues.get((event, key))
+        while queue:
+            future = queue[0]
+            self.discard(future)
+            if not future.done():
+                future.set_result(result)
+                return True
+        return False
+
+    def resolve_oldest(self, result: any) -> bool:
+        """Resolve the oldest pending request whatever its event is
+
+        Returns:
+            bool: True if a request was resolved
+        """
+        while self.__futures:
+            future = next(iter(self.__futures))
+            self.discard(future)
+            if not future.done():
+                future.set_result(result)
+                return True
+        return False
+
+    def fail_all(self, exception: Exception):
+        """Fail every pending request with the exception
+
+        Args:
+            exception (Exception): the exception to set on the futures
+        """
+        futures = list(self.__futures)
+        for future in futures:
+            self.discard(future)
+            if not future.done():
+                future.set_exception(exception)
+
+    def discard(self, future: asyncio.Future):
+        """Remove the future from the pending requests
+
+        Args:
+            future (asyncio.Future): the future to remove
+        """
+        event_key = self.__futures.pop(future, None)
+        if event_key is None:
+            return
+        queue = self.__queues[event_key]
+        queue.remove(future)
+        if not queue:
+            del self.__queues[event_key]
+
+
+class _Subscription(NamedTuple):
+    """A handler registered for an event, callback is the handler wrapped by its dispatcher if it's not run inline,
+    symbols and statuses are the filters of the handler, None to receive every symbol or status
+    """
+
+    handler: Callable
+    callback: Callable
+    symbols: Union[FrozenSet[int], None]
+    statuses: Union[FrozenSet[Status], None]
+
+
+class _Handlers:
+    """Keeps the handlers registered for each event and an index of the handlers matching each symbol and status,
+    so finding the handlers of a message is a dict lookup whatever the number of handlers and filters.
+    An entry of the index is computed on the first message of its symbol and status and cleared when the handlers change
+    """
+
+    def __init__(self):
+        self.__subscriptions: Dict[Event, List[_Subscription]] = {}
+        self.__index: Dict[Event, Dict[Tuple[any, any], Tuple[Callable, ...]]] = {}
+
+    def __contains__(self, event: Event) -> bool:
+        return event in self.__subscriptions
+
+    def add(self, event: Event, subscription: _Subscription):
+        """Add a handler for an event, after the handlers already registered
+
+        Args:
+            event (Event): the event to handle
+            subscription (_Subscription): the handler and its filters
+        """
+        self.__subscriptions.setdefault(event, []).append(subscription)
+        self.__index[event] = {}
+
+    def remove(self, event: Event, handler: Callable = None) -> int:
+        """Remove a handler of an event
+
+        Args:
+            event (Event): the event the handler was registered for
+            handler (Callable, optional): the handler to remove. Defaults to None for all the handlers of the event.
+
+        Returns:
+            int: the number of handlers removed
+        """
+        subscriptions = self.__subscriptions.get(event, [])
+        kept = [
+            s for s in subscriptions if handler is not None and s.handler != handler
+        ]
+        removed = len(subscriptions) - len(kept)
+        if kept:
+            self.__subscriptions[event] = kept
+            self.__index[event] = {}
+        else:
+            self.__subscriptions.pop(event, None)
+            self.__index.pop(event, None)
+        return removed
+
+    def get(
+        self, event: Event, symbol_id: int = None, status: Status = None
+    ) -> Tuple[Callable, ...]:
+        """get the handlers to call for a message
+
+        Args:
+            event (Event): the event of the message
+            symbol_id (int, optional): the symbol of the message if it has one. Defaults to None.
+            status (Status, optional): the status of the message if it has one. Defaults to None.
+
+        Returns:
+            Tuple[Callable, ...]: the handlers matching the message in the order they were registered
+        """
+        index = self.__index.get(event)
+        if index is None:
+            return ()
+        key = (symbol_id, status)
+        handlers = index.get(key)
+        if handlers is None:
+            handlers = index[key] = tuple(
+                s.callback
+                for s in self.__subscriptions[event]
+                if (s.symbols is None or symbol_id in s.symbols)
+                and (s.statuses is None or status in s.statuses)
+            )
+        return handlers
+
+
 class WebSocketService:
     def __init__(self, config: Config):
         """Create a new instance of the WebSocketService
@@ -35,21 +256,45 @@ class WebSocketService:
             config (Config): the configuration object to be used for the service
         """
 
-        self.__message_handlers = {
-            Event.ERROR.value: self.__bad_request,
-        }
+        self.__handlers = _Handlers()
         self.__config: Config = config
+        self.__pending = _PendingRequests()
+        self.__market_feed = False
+        self.__listeners: Dict[Event, List[Callable]] = {}
+        self.__ticks: Union[ConflatingQueue, BoundedQueue] = None
+        self.__tick_drainer: asyncio.Task = None
+        self.__tick_window: TickWindow = None
+        self.__candles: CandleAggregator = None
+        # the symbols of the market feed and their ids as sent in the ticks, None for every symbol
+        self.__feed_symbols: Union[FrozenSet[int], None] = None
+        self.__feed_prefixes: Union[FrozenSet[bytes], None] = None
+        self.__recorder: FrameRecorder = None
 
         self.__client = WebSocketClient(config, self.__get_url())
         self.__client._set_on_message(self.__on_message)
         self.__client._set_on_connect(self.__get_on_connect_callback())
         self.__client._set_on_disconnect(self.__get_on_disconnect_callback())
-
-    def subscribe(self, event: Union[Event, str] = None):
-        """Decorator to register a handler for a specific event
+        self.__client._set_before_reconnect(self.__before_reconnect)
+        self.__client._set_on_reconnect(self.__get_on_reconnect_callback())
+
+    def subscribe(
+        self,
+        event: Union[Event, str] = None,
+        dispatch: Union[Dispatch, str] = Dispatch.INLINE,
+        key: Callable = None,
+        symbols: List[Union[int, Symbol]] = None,
+        status: Union[Status, str, List[Union[Status, str]]] = None,
+    ):
+        """Decorator to register a handler for a specific event, several handlers can be registered for the same event
 
         Args:
             event (Event): the event to register the handler for
+            dispatch (Dispatch, optional): where the handler runs. Defaults to Dispatch.INLINE.
+            key (Callable, optional): gives the ordering key of a call from the data received when the handler
+                is not run inline, calls with the same key run in order. Defaults to the symbol of a tick
+                or the id of an order, a position or a deal.
+            symbols (List[int | Symbol], optional): only call the handler for these symbols. Defaults to None for all of them.
+            status (Status | List[Status], optional): only call the handler for these statuses. Defaults to None for all of them.
         """
 
         def decorator(func: Callable):
@@ -59,41 +304,47 @@ class WebSocketService:
                 func (Callable): a callable function that will be called when the event is received
 
             """
-            self.register_handler(event, func)
+            self.register_handler(event, func, dispatch, key, symbols, status)
             return func
 
         return decorator
 
-    def register_handler(self, event: Union[Event, str], handler: Callable):
-        """Add a handler for a specific event
+    def register_handler(
+        self,
+        event: Union[Event, str],
+        handler: Callable,
+        dispatch: Union[Dispatch, str] = Dispatch.INLINE,
+        key: Callable = None,
+        symbols: List[Union[int, Symbol]] = None,
+        status: Union[Status, str, List[Union[Status, str]]] = None,
+    ):
+        """Add a handler for a specific event, the handlers of an event are called in the order they were added
 
         Args:
             handler (Callable): the handler function to be called when the event is received
             event (Event): the event to be handled
+            dispatch (Dispatch, optional): where the handler runs, a thread or a process pool keep the slow handlers
+                from blocking the messages. Defaults to Dispatch.INLINE.
+            key (Callable, optional): gives the ordering key of a call from the data received when the handler
+                is not run inline, calls with the same key run in order. Defaults to the symbol of a tick
+                or the id of an order, a position or a deal.
+            symbols (List[int | Symbol], optional): only call the handler for the messages of these symbols,
+                for the market, bar, order, position, deal and symbol events. Defaults to None for all of them.
+            status (Status | List[Status], optional): only call the handler for the messages with these statuses,
+                for the order, position, deal and symbol events. Defaults to None for all of them.
+
+        Raises:
+            ValueError: if the event is invalid, the handler doesn't take the arguments of the event
+                or the event can't be filtered
         """
 
         if event is None or handler is None:
             raise ValueError("Event and handler must be provided")
 
-        if not isinstance(event, Event) and not isinstance(event, str):
-            raise ValueError("Event must be an instance of Event Enum or a string")
-
         if not callable(handler):
             return
 
-        if isinstance(event, str):
-            event = event.lower()
-            # check if event is valid
-            if event == "error":
-                event = "bad_request"
-            if event in ["profit_loss", "pl", "profit", "loss", "position_profit_loss"]:
-                event = "position_pl"
-
-            elif event not in [e.value for e in Event]:
-                raise ValueError(
-                    f'Invalid event "{event}", must be one of [ {", ".join([e.value for e in Event])}, error]'
-                )
-            event = Event(event)
+        event = self.__parse_event(event)
 
         # if event == Event.CONNECT:
         #     self.__client._set_on_connect(handler)
@@ -107,7 +358,14 @@ class WebSocketService:
                     f"Handler for {event} must not take any arguments, got {handler.__code__.co_argcount} arguments"
                 )
 
-        elif event in [Event.MARKET, Event.SUMMARY, Event.ERROR, Event.POSITION_PL]:
+        elif event in [
+            Event.MARKET,
+            Event.BAR,
+            Event.SUMMARY,
+            Event.ERROR,
+            Event.POSITION_PL,
+            Event.RECONNECT,
+        ]:
             if handler.__code__.co_argcount != 1:
                 raise ValueError(
                     f"Handler for {event} must have exactly one argument, got {handler.__code__.co_argcount} arguments"
@@ -118,62 +376,353 @@ class WebSocketService:
                     f"Handler for {event} must have exactly two arguments, got {handler.__code__.co_argcount} arguments"
                 )
 
-        self.__message_handlers[event.value] = handler
+        if symbols is not None:
+            if event not in _SYMBOL_EVENTS:
+                raise ValueError(f"{event} can't be filtered by symbol")
+            symbols = self.__symbol_ids(symbols)
+        if status is not None:
+            if event not in _STATUS_EVENTS:
+                raise ValueError(f"{event} can't be filtered by status")
+            if isinstance(status, (Status, str)):
+                status = [status]
+            status = frozenset(Status(s) for s in status)
+
+        callback = handler
+        dispatch = Dispatch(dispatch)
+        if dispatch != Dispatch.INLINE:
+            callback = Dispatcher(self.__config, handler, dispatch, key)
 
-    def start_market_feed(self):
-        """Start the market feed, this will start receiving ticks from the server, called only after the connection is established"""
-        self.__send_event(_WS_Event.START_MARKET_FEED, {})
+        self.__handlers.add(event, _Subscription(handler, callback, symbols, status))
+
+    def unsubscribe(self, event: Union[Event, str], handler: Callable = None) -> int:
+        """Remove a handler registered for an event
+
+        Args:
+            event (Event): the event the handler was registered for
+            handler (Callable, optional): the handler to remove. Defaults to None for all the handlers of the event.
+
+        Returns:
+            int: the number of handlers removed
+        """
+        return self.__handlers.remove(self.__parse_event(event), handler)
+
+    def __parse_event(self, event: Union[Event, str]) -> Event:
+        """Get the event named by a string, the aliases of the error and the profit and loss events are accepted
+
+        Args:
+            event (Event | str): the event or its name
+
+        Raises:
+            ValueError: if the event is invalid
+
+        Returns:
+            Event: the event
+        """
+        if isinstance(event, Event):
+            return event
+        if not isinstance(event, str):
+            raise ValueError("Event must be an instance of Event Enum or a string")
+
+        event = event.lower()
+        # check if event is valid
+        if event == "error":
+            event = "bad_request"
+        if event in ["profit_loss", "pl", "profit", "loss", "position_profit_loss"]:
+            event = "position_pl"
+
+        elif event not in [e.value for e in Event]:
+            raise ValueError(
+                f'Invalid event "{event}", must be one of [ {", ".join([e.value for e in Event])}, error]'
+            )
+        return Event(event)
+
+    def _add_listener(self, event: Event, listener: Callable):
+        """Add an internal listener for a specific event, listeners are called synchronously with the same
+        arguments as the handlers before them, they don't replace the handler registered by the user,
+        market listeners always receive every tick as a RawTick
+
+        Args:
+            event (Event): the event to listen to
+            listener (Callable): the function to call when the event is received
+        """
+        self.__listeners.setdefault(event, []).append(listener)
+
+    def _remove_listener(self, event: Event, listener: Callable):
+        """Remove an internal listener added with _add_listener
+
+        Args:
+            event (Event): the event the listener was added for
+            listener (Callable): the listener to remove
+        """
+        listeners = self.__listeners.get(event)
+        if listeners and listener in listeners:
+            listeners.remove(listener)
+            if not listeners:
+                del self.__listeners[event]
+
+    def track_ticks(self, capacity: int = None) -> TickWindow:
+        """Keep a rolling window of the last ticks of every symbol received from the market feed,
+        in compact arrays instead of Tick models, the market feed has to be started to fill it
+
+        Args:
+            capacity (int, optional): the number of ticks kept per symbol. Defaults to config.tick_window_capacity.
+
+        Returns:
+            TickWindow: the window, the same one is returned on every call
+        """
+        if self.__tick_window is None:
+            self.__tick_window = TickWindow(
+                capacity or self.__config.tick_window_capacity
+            )
+            self._add_listener(Event.MARKET, self.__tick_window.on_tick)
+        return self.__tick_window
+
+    def track_bars(
+        self,
+        resolutions: List[Union[Resolution, str]] = None,
+        type: Union[MarketType, str] = MarketType.BID,
+        history: int = 500,
+    ) -> CandleAggregator:
+        """Build OHLCV bars from the market feed, every bar closed is passed to the Event.BAR handler,
+        seed the aggregator with get_market_history to start without a gap
+
+        Args:
+            resolutions (List[Resolution], optional): the resolutions to build. Defaults to all of them.
+            type (MarketType, optional): the price the bars are built from. Defaults to MarketType.BID.
+            history (int, optional): the number of closed bars kept per symbol and resolution. Defaults to 500.
+
+        Returns:
+            CandleAggregator: the aggregator, the same one is returned on every call
+        """
+        if self.__candles is None:
+            self.__candles = CandleAggregator(
+                resolutions, type, history, on_close=self.__on_bar_closed
+            )
+            self._add_listener(Event.MARKET, self.__candles.on_tick)
+        return self.__candles
+
+    def start_market_feed(self, symbols: List[Union[int, Symbol]] = None):
+        """Start the market feed, this will start receiving ticks from the server, called only after the connection is established
+
+        Args:
+            symbols (List[int | Symbol], optional): only receive the ticks of these symbols. Defaults to None for all of them.
+        """
+        self.__set_feed_symbols(None if symbols is None else self.__symbol_ids(symbols))
+        self.__start_feed()
+
+    def subscribe_market(self, symbols: List[Union[int, Symbol]]):
+        """Add symbols to the market feed, a feed receiving every symbol is limited to these ones,
+        the feed is started if it's not running, or on the next connection if not connected
+
+        Args:
+            symbols (List[int | Symbol]): the symbols to receive the ticks of
+        """
+        current = self.__feed_symbols or frozenset()
+        self.__set_feed_symbols(current | self.__symbol_ids(symbols))
+        self.__update_feed()
+
+    def unsubscribe_market(self, symbols: List[Union[int, Symbol]]):
+        """Remove symbols from the market feed, a feed receiving every symbol keeps all the other known symbols
+
+        Args:
+            symbols (List[int | Symbol]): the symbols to stop receiving the ticks of
+        """
+        current = self.__feed_symbols
+        if current is None:
+            current = frozenset(self.__config.symbols)
+        self.__set_feed_symbols(current - self.__symbol_ids(symbols))
+        self.__update_feed()
+
+    def get_market_symbols(self) -> Union[List[int], None]:
+        """get the symbols of the market feed
+
+        Returns:
+            List[int] | None: the ids of the symbols, None if the feed receives every symbol
+        """
+        if self.__feed_symbols is None:
+            return None
+        return sorted(self.__feed_symbols)
 
     def stop_market_feed(self):
         """Stop the market feed, this will stop receiving ticks from the server, called only after the connection is established"""
         self.__send_event(_WS_Event.STOP_MARKET_FEED, {})
+        self.__market_feed = False
+
+    def __start_feed(self):
+        """Send the start of the market feed, with its symbols if the server filters them"""
+        payload = {}
+        if self.__config.server_feed_filter and self.__feed_symbols is not None:
+            payload = {"symbols": sorted(self.__feed_symbols)}
+        self.__send_event(_WS_Event.START_MARKET_FEED, payload)
+        self.__market_feed = True
+
+    def __update_feed(self):
+        """Apply a change of the symbols of the market feed, the server is only told if it filters the symbols
+        or if the feed isn't running yet, the other ticks are dropped when received
+        """
+        if not self.__config.is_connected:
+            self.__market_feed = True
+        elif self.__config.server_feed_filter or not self.__market_feed:
+            self.__start_feed()
+
+    def __set_feed_symbols(self, symbols: Union[FrozenSet[int], None]):
+        self.__feed_symbols = symbols
+        self.__feed_prefixes = (
+            None if symbols is None else frozenset(str(s).encode() for s in symbols)
+        )
+
+    def __symbol_ids(self, symbols: List[Union[int, Symbol]]) -> FrozenSet[int]:
+        return frozenset(s.id if isinstance(s, Symbol) else int(s) for s in symbols)
 
-    def create_order(self, order: CrtOrder):
+    def create_order(self, order: CrtOrder, timeout: float = None) -> asyncio.Future:
         """Send a new order to the server, called only after the connection is established
 
         Args:
             order (CrtOrder): Order to send to the server
+            timeout (float, optional): seconds to wait for the server to answer. Defaults to the config timeout.
+
+        Returns:
+            asyncio.Future: resolved with the created Order, or an Error if the server rejected it
         """
-        self.__send_event(_WS_Event.ORDER_CREATE, order)
+        key = (self.__get_field(order, "symbol_id"), self.__get_field(order, "side"))
+        return self.__send_request(_WS_Event.ORDER_CREATE, order, key, timeout)
 
-    def update_order(self, order: UpdOrder):
+    def update_order(self, order: UpdOrder, timeout: float = None) -> asyncio.Future:
         """Update an existing order, called only after the connection is established
 
         Args:
             order (UpdOrder): Data to update the order
+            timeout (float, optional): seconds to wait for the server to answer. Defaults to the config timeout.
+
+        Returns:
+            asyncio.Future: resolved with the updated Order, or an Error if the server rejected it
         """
-        self.__send_event(_WS_Event.ORDER_UPDATE, order)
+        key = self.__get_field(order, "order_id")
+        return self.__send_request(_WS_Event.ORDER_UPDATE, order, key, timeout)
 
-    def cancel_order(self, id: int):
+    def cancel_order(self, id: int, timeout: float = None) -> asyncio.Future:
         """Cancel an existing order, called only after the connection is established
 
         Args:
-            order (CancelOrder): the order to cancel
+            id (int): the id of the order to cancel
+            timeout (float, optional): seconds to wait for the server to answer. Defaults to the config timeout.
+
+        Returns:
+            asyncio.Future: resolved with the canceled Order, or an Error if the server rejected it
         """
         order = CnlOrder(order_id=id)
-        self.__send_event(_WS_Event.ORDER_CANCEL, order)
+        return self.__send_request(_WS_Event.ORDER_CANCEL, order, id, timeout)
 
-    def close_position(self, position: ClsPosition):
+    def close_position(
+        self, position: ClsPosition, timeout: float = None
+    ) -> asyncio.Future:
         """Close an existing position, called only after the connection is established
 
         Args:
             position (ClsPosition): the position to close
+            timeout (float, optional): seconds to wait for the server to answer. Defaults to the config timeout.
+
+        Returns:
+            asyncio.Future: resolved with the closed Position (updated one for a partial close),
+            or an Error if the server rejected it
         """
-        self.__send_event(_WS_Event.POSITION_CLOSE, position)
+        key = self.__get_field(position, "position_id")
+        return self.__send_request(_WS_Event.POSITION_CLOSE, position, key, timeout)
 
-    def update_position(self, position: UpdPosition):
+    def update_position(
+        self, position: UpdPosition, timeout: float = None
+    ) -> asyncio.Future:
         """Update an existing position, called only after the connection is established
 
         Args:
             position (UptPosition): the position to update
+            timeout (float, optional): seconds to wait for the server to answer. Defaults to the config timeout.
+
+        Returns:
+            asyncio.Future: resolved with the updated Position, or an Error if the server rejected it
+        """
+        key = self.__get_field(position, "position_id")
+        return self.__send_request(_WS_Event.POSITION_UPDATE, position, key, timeout)
+
+    def record(self, path: str) -> FrameRecorder:
+        """Write every frame received from the server to a log, with the time it was received at,
+        to replay it later through the same handlers with replay
+
+        Args:
+            path (str): the file of the log, the frames are appended if it exists
+
+        Raises:
+            ValueError: if the frames are already recorded to another file
+
+        Returns:
+            FrameRecorder: the recorder, the same one is returned until stop_recording is called
+        """
+        if self.__recorder is None:
+            self.__recorder = FrameRecorder(path)
+            self.__client._set_recorder(self.__recorder)
+        elif os.path.abspath(path) != os.path.abspath(self.__recorder.path):
+            raise ValueError(
+                f"The frames are already recorded to {self.__recorder.path}, call stop_recording first"
+            )
+        return self.__recorder
+
+    def stop_recording(self):
+        """Stop writing the frames received and close the log"""
+        recorder, self.__recorder = self.__recorder, None
+        self.__client._set_recorder(None)
+        if recorder is not None:
+            recorder.close()
+
+    async def replay_async(self, path: str, speed: float = None) -> int:
+        """Pass the frames of a log written by record to the handlers as if they were received from the server,
+        the symbols of the ticks must be in the config to adjust their prices
+
+        Args:
+            path (str): the file of the log
+            speed (float, optional): how fast the frames are replayed, 1 keeps the time between the frames as recorded,
+                10 replays them 10 times faster. Defaults to None to replay them as fast as possible.
+
+        Raises:
+            ValueError: if the file is not a log of frames or the speed is not positive
+
+        Returns:
+            int: the number of frames replayed
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be greater than 0")
+        count = 0
+        first, started = None, time.monotonic()
+        for frame in read_frames(path):
+            if speed is not None:
+                if first is None:
+                    first = frame.time
+                delay = (frame.time - first) / speed - (time.monotonic() - started)
+                # the tasks started by the handlers run while waiting for the next frame
+                await asyncio.sleep(max(delay, 0))
+            elif count % 256 == 0:
+                await asyncio.sleep(0)
+            await self.__on_message(frame.data)
+            count += 1
+        return count
+
+    def replay(self, path: str, speed: float = None) -> int:
+        """Pass the frames of a log written by record to the handlers, blocking the current thread until they are all passed,
+        see replay_async
+
+        Args:
+            path (str): the file of the log
+            speed (float, optional): how fast the frames are replayed. Defaults to None to replay them as fast as possible.
+
+        Returns:
+            int: the number of frames replayed
         """
-        self.__send_event(_WS_Event.POSITION_UPDATE, position)
+        return self.__client._run_until_complete(self.replay_async(path, speed))
 
     async def start_async(self):
         """Start the websocket connection asynchronously"""
         try:
             return await self.__client.start_async()
-        except Exception:
+        except Exception as e:
             raise ConnectionAbortedError(
                 "The connection was closed unexpectedly: " + e.__str__()
             ) from None
@@ -201,38 +750,61 @@ class WebSocketService:
 
         try:
 
-            # Get the type and status of the message (status is None if the message is not an order or position or deal)
-            typ, status = self.__get_message_type(message)
-            if typ is None:
+            # Get the event, status and model of the message (status is None if the message is not an order or position or deal)
+            route, body = self.__route(message)
+            if route is None:
                 return
+            typ, status, model = route
 
-            # Get the handler for the message type
-            handler = self.__get_handler(typ)
-            # An edge case where the pl event received from the server is not handled
-            if (
-                handler is None
-                and typ == Event.SUMMARY
-                and self.__get_handler(Event.POSITION_PL) is not None
-            ):
-                handler = self.__get_handler(Event.POSITION_PL)
-            # If the handler is found, parse the payload and run the handler
-            if handler:
-                if typ == Event.MARKET:
-                    self.__handle_market(self.__unpack_payload(typ, message))
-                elif typ == Event.SUMMARY:
-                    summary, pl = self.__unpack_payload(typ, message)
+            # Symbol changes are always applied to the config since the prices depend on them
+            if typ == Event.SYMBOL:
+                self.__handle_symbol(self.__unpack_payload(typ, model, body), status)
+                return
+
+            # Check if a handler is registered for the message type
+            subscribed = typ in self.__handlers
+            listeners = self.__listeners.get(typ)
+            if typ == Event.MARKET:
+                prefixes = self.__feed_prefixes
+                # the ticks of the symbols out of the feed are dropped on their leading id, before being decoded
+                if prefixes is not None and message[: message.find(b",")] not in prefixes:
+                    return
+                if subscribed or listeners:
+                    self.__handle_market(message)
+                return
+            # The summary carries the profit and loss of the positions, it's parsed for the pl handlers too
+            if typ == Event.SUMMARY:
+                if (
+                    subscribed
+                    or Event.POSITION_PL in self.__handlers
+                    or Event.POSITION_PL in self.__listeners
+                ):
+                    summary, pl = self.__unpack_payload(typ, model, body)
                     self.__handle_summary(summary, pl)
-                else:
-                    self.__run_callback(
-                        handler, self.__unpack_payload(typ, message), status
-                    )
+                return
+            # Answers to pending requests are parsed even if no handler is registered
+            pending = len(self.__pending) > 0 and (
+                typ == Event.ERROR or (typ, status) in _acknowledgements
+            )
+            # If a handler is found, parse the payload and run the handlers, the errors are logged when nobody handles them
+            if subscribed or listeners or pending or typ == Event.ERROR:
+                payload = self.__unpack_payload(typ, model, body)
+                if pending:
+                    self.__resolve_request(typ, status, payload)
+                self.__notify(typ, payload, status)
+                if subscribed:
+                    self.__run_handlers(typ, payload, status)
+                elif typ == Event.ERROR:
+                    self.__bad_request(payload)
 
         except Exception as e:
             raise Exception(
                 f"An error occurred while processing the message { message.__str__()}"
             ) from e
 
-    def __send_event(self, event: Event, payload: Union[BaseModel, dict]):
+    def __send_event(
+        self, event: Event, payload: Union[BaseModel, dict]
+    ) -> asyncio.Task:
         """Send an event to the server
 
         Args:
@@ -241,21 +813,115 @@ class WebSocketService:
 
         Raises:
             ValueError: if the connection is not established
+
+        Returns:
+            asyncio.Task: the task sending the event
         """
 
         if not self.__config.is_connected:
             raise ValueError("Not connected to the server")
-        try:
-            pload = payload
-            if isinstance(payload, BaseModel):
-                pload = payload.model_dump()
 
-            data = WsMessage(type=event.value, payload=pload).model_dump()
-            marshalled = json.dumps(data)
+        pload = payload
+        if isinstance(payload, BaseModel):
+            pload = payload.model_dump()
+
+        data = WsMessage(type=event.value, payload=pload).model_dump()
+        marshalled = json.dumps(data)
+
+        return self.__client._send_message(
+            marshalled, _priorities.get(event, Priority.NORMAL)
+        )
+
+    def __send_request(
+        self,
+        event: _WS_Event,
+        payload: Union[BaseModel, dict],
+        key: any,
+        timeout: float = None,
+    ) -> asyncio.Future:
+        """Send an event to the server and return a future resolved by the answer of the server
 
-            self.__client._send_message(marshalled)
+        Args:
+            event (_WS_Event): the event to send
+            payload (BaseModel | dict): the payload to send with the event
+            key (any): the key identifying the answer of the server
+            timeout (float, optional): seconds to wait for the answer. Defaults to the config timeout.
+
+        Raises:
+            ValueError: if the connection is not established
+
+        Returns:
+            asyncio.Future: the future resolved with the answer of the server
+        """
+        future = self.__client._create_future()
+        self.__pending.add(event, key, future)
+        try:
+            task = self.__send_event(event, payload)
         except Exception:
-            pass
+            future.cancel()
+            raise
+
+        def on_sent(task: asyncio.Task):
+            if not task.cancelled() and task.exception() and not future.done():
+                future.set_exception(task.exception())
+
+        task.add_done_callback(on_sent)
+
+        timeout = self.__config.timeout if timeout is None else timeout
+        if timeout:
+
+            def on_timeout():
+                if not future.done():
+                    future.set_exception(
+                        asyncio.TimeoutError(
+                            f"No answer from the server for {event.value} after {timeout} seconds"
+                        )
+                    )
+
+            timer = self.__client._call_later(timeout, on_timeout)
+            future.add_done_callback(lambda _: timer.cancel())
+
+        return future
+
+    def __resolve_request(self, typ: Event, status: Status, payload: BaseModel):
+        """Resolve the pending request answered by the event received from the server
+
+        Args:
+            typ (Event): the event received from the server
+            status (Status): the status of the event
+            payload (BaseModel): the deserialized payload of the event
+        """
+        if payload is None:
+            return
+        if typ == Event.ERROR:
+            self.__pending.resolve_oldest(payload)
+            return
+
+        event = _acknowledgements[(typ, status)]
+        if event == _WS_Event.ORDER_CREATE:
+            key = (payload.symbol_id, payload.side)
+        else:
+            key = payload.id
+
+        if self.__pending.resolve(event, key, payload):
+            return
+        # a partially closed position is received as an update
+        if event == _WS_Event.POSITION_UPDATE:
+            self.__pending.resolve(_WS_Event.POSITION_CLOSE, key, payload)
+
+    def __get_field(self, payload: Union[BaseModel, dict], name: str) -> any:
+        """Get a field from a payload whether it's a model or a dict
+
+        Args:
+            payload (BaseModel | dict): the payload
+            name (str): the name of the field
+
+        Returns:
+            any: the value of the field
+        """
+        if isinstance(payload, dict):
+            return payload.get(name)
+        return getattr(payload, name, None)
 
     def __run_callback(self, f: Callable, data: any, status: Status):
         """Run a callback function
@@ -273,13 +939,48 @@ class WebSocketService:
         else:
             return self.__client._run(f, data, status)
 
-    def __unpack_payload(self, event: Event, message: Union[str, bytes]) -> any:
+    def __run_handlers(self, event: Event, data: any, status: Status = None):
+        """Run the handlers of an event matching the symbol and the status of the data
+
+        Args:
+            event (Event): the event received
+            data (any): the data to pass to the handlers
+            status (Status, optional): the status of the event if any. Defaults to None.
+        """
+        symbol_id = None
+        if event == Event.SYMBOL:
+            symbol_id = self.__get_field(data, "id")
+        elif event in _SYMBOL_EVENTS:
+            symbol_id = self.__get_field(data, "symbol_id")
+        for handler in self.__handlers.get(event, symbol_id, status):
+            self.__run_callback(handler, data, status)
+
+    def __notify(self, event: Event, data: any, status: Status = None):
+        """Call the internal listeners of an event, a failing listener doesn't stop the others
+
+        Args:
+            event (Event): the event received
+            data (any): the data to pass to the listeners
+            status (Status, optional): the status of the event if any. Defaults to None.
+        """
+        for listener in self.__listeners.get(event, ()):
+            try:
+                if status is None:
+                    listener(data)
+                else:
+                    listener(data, status)
+            except Exception as e:
+                if not self.__config.disable_logging:
+                    logging.error(f"Listener of {event.value} failed: {e}")
+
+    def __unpack_payload(self, event: Event, model: type, body: any) -> any:
         """Unpack the payload received from the server, this will deserialize the message to the appropriate model
 
 
         Args:
             event (Event): the event of the message
-            message (str | bytes): the message received from the server
+            model (type): the model of the payload, None if the event has none
+            body (any): the message parsed by __route, the raw message for the market and summary events
 
         Returns:
             any: the unpacked payload
@@ -288,52 +989,44 @@ class WebSocketService:
         try:
 
             if event == Event.MARKET:
-                return deserialize_tick(message)
+                return deserialize_tick(body)
             elif event == Event.SUMMARY:
-                return deserialize_summary(message)
-            else:
-                model = events_deserializer.get(event)
-                if model:
-                    return deserialize_model(model, message)
-                return None
+                return deserialize_summary(body)
+            elif model:
+                if self.__config.trusted_payloads:
+                    return construct(model, body.get("payload"))
+                return model(**body.get("payload"))
+            return None
         except Exception as e:
             pass
         return None
 
-    def __get_message_type(
+    def __route(
         self, message: Union[str, bytes]
-    ) -> (Event, Union[Status, None]):
-        """return the message type and status if any where:
-        - message: the message received from the server
+    ) -> Tuple[Union[Tuple[Event, Union[Status, None], type], None], any]:
+        """find the route of a message, the json messages are parsed once here and the result is reused to unpack the payload
 
         Args:
-            self (_type_): _description_
-            message (_type_): _description_
+            message (str | bytes): the message received from the server
 
         Returns:
-            _Event_: the event type whether it was a market, summary, order or any other event
-            _Status_: the status of the event whether it was created, updated or deleted
+            Tuple[Event, Status | None, type] | None: the event, the status and the payload model of the message,
+                None if the message is unknown
+            any: the parsed message, the raw message for the market and summary events
         """
         try:
 
             if isinstance(message, bytes):
-                return Event.MARKET, None
+                return _MARKET_ROUTE, message
             if isinstance(message, str):
                 if message.startswith(Event.SUMMARY.value):
-                    return Event.SUMMARY, None
-                else:
-                    unmarshalled = json.loads(message)
-                    typ = unmarshalled.get("type")
-
-                    if typ == Event.ERROR.value:
-                        return Event.ERROR, None
-
-                    splitted = typ.split("_")
-                    return Event(splitted[0]), Status(splitted[1])
+                    return _SUMMARY_ROUTE, message
+                body = json_loads(message)
+                return _routes.get(body.get("type")), body
 
         except Exception as e:
             logging.debug(e)
-            return None, None
+        return None, None
 
     def __get_url(self) -> str:
         """Get the websocket url to connect to
@@ -349,7 +1042,8 @@ class WebSocketService:
                 "You need to login first to connect to the websocket service."
             )
 
-        return f"wss://{self.__config.get_url()}/ws/v1?session_id={self.__config.session_id}"
+        scheme = "wss" if self.__config.secure else "ws"
+        return f"{scheme}://{self.__config.get_url()}/ws/v1?session_id={self.__config.session_id}"
 
     def __bad_request(self, message: str):
         """Handle a bad request received from the server
@@ -360,59 +1054,143 @@ class WebSocketService:
         if not self.__config.disable_logging:
             logging.error(f"Bad request: {message}")
 
-    def __handle_market(self, tick: Tick):
+    def __handle_market(self, message: bytes):
         """Handle a market event received from the server, this will add the spread to the bid and ask prices
 
         Args:
-            tick (Tick): the tick received from the server
+            message (bytes): the tick received from the server
         """
+        try:
+            tick = deserialize_raw_tick(message)
+        except Exception:
+            return
 
-        symbol = self.__config.get_symbol(tick.symbol_id)
-        if symbol is None:
+        adjuster = get_price_adjuster(self.__config, tick.symbol_id)
+        if adjuster is None:
             return
-        bid_spread, ask_spread = calculate_spread(symbol)
-        tick.bid = truncate_float(tick.bid + bid_spread, symbol.digits)
-        if symbol.spread is not None:
-            tick.ask = truncate_float(tick.bid + symbol.spread, symbol.digits)
+        bid, ask = adjuster.adjust_tick(tick.bid, tick.ask)
+
+        tick = tick._replace(bid=bid, ask=ask)
+        self.__notify(Event.MARKET, tick)
+
+        handlers = self.__handlers.get(Event.MARKET, tick.symbol_id)
+        if not handlers:
+            return
+        if self.__config.tick_delivery == TickDelivery.ALL:
+            self.__deliver_tick(handlers, tick)
         else:
-            tick.ask = truncate_float(tick.ask + ask_spread, symbol.digits)
+            self.__enqueue_tick(tick)
 
-        self.__run_callback(self.__get_handler(Event.MARKET), tick, None)
+    def __deliver_tick(self, handlers: Tuple[Callable, ...], tick: RawTick) -> List[any]:
+        """Pass a tick to the market handlers of its symbol, as a Tick model unless raw ticks are enabled
 
-    def __handle_summary(self, summary: Summary, pl: List[PositionPL]):
-        """Handle a summary event received from the server
+        Args:
+            handlers (Tuple[Callable, ...]): the market handlers
+            tick (RawTick): the adjusted tick
+
+        Returns:
+            List[any]: whatever the handlers return, a task for a coroutine function
+        """
+        if not self.__config.raw_ticks:
+            tick = raw_tick_to_tick(tick)
+        return [self.__run_callback(handler, tick, None) for handler in handlers]
+
+    def __enqueue_tick(self, tick: RawTick):
+        """Keep a tick until the market handler is free to take it, the ticks are passed to the handler
+        by a task running next to the receive loop so a slow handler doesn't delay the messages
 
         Args:
-            summary (Summary): the summary received from the server
+            tick (RawTick): the adjusted tick
         """
+        if self.__ticks is None:
+            if self.__config.tick_delivery == TickDelivery.CONFLATE:
+                self.__ticks = ConflatingQueue()
+            else:
+                self.__ticks = BoundedQueue(
+                    self.__config.tick_queue_size, self.__config.tick_overflow
+                )
+        self.__ticks.put(tick.symbol_id, tick)
+        if self.__tick_drainer is None or self.__tick_drainer.done():
+            self.__tick_drainer = self.__client._create_task(self.__drain_ticks)
+
+    async def __drain_ticks(self):
+        """Pass the pending ticks to the market handler one at a time, waiting for it to finish with each of them"""
+        while True:
+            tick, dropped = await self.__ticks.get()
+            handlers = self.__handlers.get(Event.MARKET, tick.symbol_id)
+            if not handlers:
+                continue
+            if dropped:
+                tick = tick._replace(dropped=dropped)
+            try:
+                for result in self.__deliver_tick(handlers, tick):
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception as e:
+                if not self.__config.disable_logging:
+                    logging.error(f"Market handler failed: {e}")
+            # let the receive loop run between two ticks
+            await asyncio.sleep(0)
+
+    def __on_bar_closed(self, bar: Bar):
+        """Pass a bar closed by the aggregator to the listeners and the handlers of Event.BAR
 
-        summary_handler = self.__get_handler(Event.SUMMARY)
-        if summary_handler:
-            self.__run_callback(summary_handler, summary, None)
+        Args:
+            bar (Bar): the bar closed
+        """
+        self.__notify(Event.BAR, bar)
+        self.__run_handlers(Event.BAR, bar)
 
-        pl_handler = self.__get_handler(Event.POSITION_PL)
-        if pl_handler:
-            for pl in pl:
-                self.__run_callback(pl_handler, pl, None)
+    def __stop_tick_drainer(self):
+        """Stop passing the pending ticks to the handler, the ticks received before a disconnection are discarded"""
+        if self.__tick_drainer is not None:
+            self.__tick_drainer.cancel()
+            self.__tick_drainer = None
+        if self.__ticks is not None:
+            self.__ticks.clear()
 
-    def __get_handler(self, event: Union[Event, str]) -> Callable:
-        """Get the callback function for a specific event
+    def __handle_symbol(self, symbol: Symbol, status: Status):
+        """Handle a symbol event received from the server, this will replace the symbol in the config
+        so the next prices are adjusted with its new spread and digits
 
         Args:
-            event (Event): the event to get the callback for
+            symbol (Symbol): the symbol received from the server
+            status (Status): whether the symbol was created or updated
         """
-        if isinstance(event, str):
-            return self.__message_handlers.get(event)
-        return self.__message_handlers.get(event.value)
+        if symbol is None:
+            return
+        symbol = apply_spread(symbol)
+        self.__config.set_symbol(symbol)
+
+        self.__run_handlers(Event.SYMBOL, symbol, status)
+
+    def __handle_summary(self, summary: Summary, pl: List[PositionPL]):
+        """Handle a summary event received from the server
+
+        Args:
+            summary (Summary): the summary received from the server
+        """
+
+        self.__run_handlers(Event.SUMMARY, summary)
+
+        pl_handlers = self.__handlers.get(Event.POSITION_PL)
+        for position_pl in pl:
+            self.__notify(Event.POSITION_PL, position_pl)
+            for handler in pl_handlers:
+                self.__run_callback(handler, position_pl, None)
 
     def __get_on_connect_callback(self):
         """Handle the connection event"""
 
         def on_connect():
-            if Event.MARKET.value in self.__message_handlers:
-                self.start_market_feed()
-            handler = self.__get_handler(Event.CONNECT)
-            if handler:
+            # the feed is started again after a reconnection if it was running before
+            if (
+                self.__market_feed
+                or Event.MARKET in self.__handlers
+                or Event.MARKET in self.__listeners
+            ):
+                self.__start_feed()
+            for handler in self.__handlers.get(Event.CONNECT):
                 self.__client._run(handler)
 
         return on_connect
@@ -420,8 +1198,41 @@ class WebSocketService:
     def __get_on_disconnect_callback(self):
 
         def on_disconnect():
-            handler = self.__get_handler(Event.DISCONNECT)
-            if handler:
+            self.__stop_tick_drainer()
+            self.__pending.fail_all(
+                ConnectionError("The connection was closed before the server answered")
+            )
+            for handler in self.__handlers.get(Event.DISCONNECT):
                 self.__client._run(handler)
 
         return on_disconnect
+
+    def __get_on_reconnect_callback(self):
+
+        def on_reconnect(disconnected_at: float, attempts: int):
+            if (
+                Event.RECONNECT in self.__handlers
+                or Event.RECONNECT in self.__listeners
+            ):
+                gap = Gap(
+                    disconnected_at=dt.datetime.fromtimestamp(
+                        disconnected_at, dt.timezone.utc
+                    ),
+                    reconnected_at=dt.datetime.now(dt.timezone.utc),
+                    attempts=attempts,
+                )
+                self.__notify(Event.RECONNECT, gap)
+                for handler in self.__handlers.get(Event.RECONNECT):
+                    self.__client._run(handler, gap)
+
+        return on_reconnect
+
+    async def __before_reconnect(self):
+        """Refresh the credentials before reconnecting, the session id in the url may change with them"""
+        if self.__config.refresh_token:
+            try:
+                await AuthService(self.__config).refresh_token_async()
+            except Exception as e:
+                if not self.__config.disable_logging:
+                    logging.warning(f"Could not refresh the token: {e}")
+        self.__client._set_url(self.__get_url())
@@ -1,11 +1,31 @@
+import atexit
 import pytest
 from hstrader import HsTrader
+from hstrader.mock import MockServer
 import os
 
 CLIENT_ID = os.getenv("TEST_CLIENT_ID")
 CLIENT_SECRET = os.getenv("TEST_CLIENT_SECRET")
 URL = os.getenv("TEST_URL")
 
+# the server the tests run against when TEST_URL is not set, started by the first test needing it
+_mock_server: MockServer = None
+
+
+# the tests relying on the data of the live account
+live_only = pytest.mark.skipif(
+    URL is None, reason="needs the account of the live server, set TEST_URL"
+)
+
+
+def get_mock_server() -> MockServer:
+    """get the mock server shared by the tests of the session, started on the first call"""
+    global _mock_server
+    if _mock_server is None:
+        _mock_server = MockServer().start()
+        atexit.register(_mock_server.stop)
+    return _mock_server
+
 
 def test_vfx12():
     # load the environment variables
@@ -17,11 +37,16 @@ def test_vfx12():
 
 @pytest.fixture
 def unauthenticated_client() -> HsTrader:
+    if URL is None:
+        server = get_mock_server()
+        return HsTrader("", "", server.url, server.config())
     return HsTrader("", "", URL)
 
 
 @pytest.fixture
 def client() -> HsTrader:
+    if URL is None:
+        return get_mock_server().client()
     hstrader = HsTrader(CLIENT_ID, CLIENT_SECRET, URL)
     return hstrader
 
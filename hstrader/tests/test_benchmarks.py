@@ -0,0 +1,46 @@
+from benchmarks.runner import (
+    Benchmark,
+    find_regressions,
+    format_table,
+    read_results,
+    run_benchmark,
+    write_results,
+)
+import pytest
+
+
+def test_run_benchmark():
+    calls = []
+    result = run_benchmark(
+        Benchmark("append", lambda: calls.append([0] * 100), teardown=calls.clear),
+        duration=0.05,
+        warmup=0.01,
+    )
+    assert result.name == "append"
+    assert result.samples >= 100 and result.batch >= 1
+    assert result.timer_overhead_ns >= 0
+    assert result.ops_per_sec > 0
+    assert 0 < result.p50_us <= result.p99_us
+    # the list of 100 items is allocated by each call
+    assert result.alloc_bytes >= 800
+    assert calls == []
+
+
+def test_results_round_trip(tmp_path):
+    fast = run_benchmark(Benchmark("noop", lambda: None), duration=0.02, warmup=0)
+    path = str(tmp_path / "results.json")
+    write_results(path, [fast], "1.0.0")
+    baseline = read_results(path)
+    assert baseline["noop"]["ops_per_sec"] == fast.ops_per_sec
+
+    slower = fast._replace(ops_per_sec=fast.ops_per_sec * 0.5)
+    assert find_regressions([slower], baseline) == ["noop"]
+    assert find_regressions([fast], baseline) == []
+    assert "-50.0%" in format_table([slower], baseline)
+
+
+def test_read_results_rejects_other_files(tmp_path):
+    path = tmp_path / "other.json"
+    path.write_text("[]")
+    with pytest.raises(ValueError):
+        read_results(str(path))
@@ -0,0 +1,51 @@
+from hstrader.helpers import CandleAggregator, bar_start, bar_end
+from hstrader.models import Bar, HistoryTick, RawTick, Resolution
+import datetime as dt
+
+
+def epoch(*args) -> int:
+    return int(dt.datetime(*args, tzinfo=dt.timezone.utc).timestamp())
+
+
+def tick(bid: float, time: int) -> RawTick:
+    return RawTick(1, bid, bid + 0.1, 0, 0, 0, 0, 0, time)
+
+
+def test_bar_boundaries():
+    time = epoch(2021, 3, 10, 13, 47, 12)
+    assert bar_start(Resolution.M15, time) == epoch(2021, 3, 10, 13, 45)
+    assert bar_start(Resolution.H4, time) == epoch(2021, 3, 10, 12)
+    assert bar_start(Resolution.W1, time) == epoch(2021, 3, 8)
+    assert bar_start(Resolution.MN1, time) == epoch(2021, 3, 1)
+    assert bar_end(Resolution.MN1, epoch(2021, 12, 1)) == epoch(2022, 1, 1)
+
+
+def test_aggregator_closes_bars():
+    closed = []
+    candles = CandleAggregator([Resolution.M1, Resolution.M5], on_close=closed.append)
+    start = epoch(2021, 1, 1, 10, 0)
+    for bid, offset in [(1.0, 0), (1.3, 10), (0.9, 20), (1.1, 50), (1.2, 61)]:
+        candles.on_tick(tick(bid, start + offset))
+    assert closed == [Bar(1, Resolution.M1, start, 1.0, 1.3, 0.9, 1.1, 4)]
+    assert candles.current(1, "5m") == Bar(1, Resolution.M5, start, 1.0, 1.3, 0.9, 1.2, 5)
+    assert candles.close_expired(start + 300)[-1].resolution == Resolution.M5
+    assert candles.current(1, Resolution.M5) is None
+
+
+def test_aggregator_seeded_from_history():
+    closed = []
+    candles = CandleAggregator([Resolution.M1], on_close=closed.append)
+    start = epoch(2021, 1, 1, 10, 0)
+    candles.seed(
+        1,
+        Resolution.M1,
+        [
+            HistoryTick(start - 60, 1.0, 1.1, 0.9, 1.0, 7),
+            HistoryTick(start, 1.0, 1.2, 1.0, 1.1, 3),
+        ],
+    )
+    assert len(candles.closed(1, Resolution.M1)) == 1
+    candles.on_tick(tick(1.5, start + 30))
+    candles.on_tick(tick(1.4, start + 60))
+    assert closed == [Bar(1, Resolution.M1, start, 1.0, 1.5, 1.0, 1.5, 4)]
+    assert [b.time for b in candles.closed(1, Resolution.M1)] == [start - 60, start]
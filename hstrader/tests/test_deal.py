@@ -1,6 +1,7 @@
-from . import client
+from . import client, live_only
 from hstrader import HsTrader
 
+@live_only
 def test_get_deals(client: HsTrader):
     deals = client.get_deals()
     assert len(deals) > 0
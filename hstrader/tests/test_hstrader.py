@@ -1,5 +1,107 @@
 from hstrader import __version__
+import asyncio
+import pytest
+import threading
+import time
+from hstrader import HsTrader
+from hstrader.models import ClsPosition, Error, Position, PositionStatus
+from hstrader.services import (
+    AuthService,
+    OrderService,
+    PositionService,
+    SymbolService,
+    WebSocketService,
+)
 
 
 def test_version():
     assert __version__ == '1.0.0'
+
+
+@pytest.fixture
+def offline_client(monkeypatch) -> HsTrader:
+    def login(self, id, secret):
+        self._AuthService__config.session_id = "session"
+        self._AuthService__config.access_token = "token"
+
+    monkeypatch.setattr(AuthService, "login", login)
+    monkeypatch.setattr(SymbolService, "get_symbols", lambda self: [])
+    return HsTrader("id", "secret", "localhost")
+
+
+def test_close_all_reports_each_position(offline_client: HsTrader, monkeypatch):
+    positions = [
+        Position(id=1, symbol_id=1, volume=0.1, status=PositionStatus.OPEN),
+        Position(id=2, symbol_id=1, volume=0.2, status=PositionStatus.OPEN),
+        Position(id=3, symbol_id=2, volume=0.3, status=PositionStatus.OPEN),
+        Position(id=4, symbol_id=1, volume=0.4, status=PositionStatus.CLOSED),
+    ]
+
+    def close_position(self, data: ClsPosition):
+        if data.position_id == 2:
+            raise ValueError("market closed")
+        return data.volume
+
+    monkeypatch.setattr(PositionService, "get_positions", lambda self: positions)
+    monkeypatch.setattr(PositionService, "close_position", close_position)
+
+    results = offline_client.close_all(symbol=1, max_concurrency=2)
+    assert [r.item.position_id for r in results] == [1, 2]
+    assert [r.ok for r in results] == [True, False]
+    assert results[0].result == 0.1
+    assert str(results[1].error) == "market closed"
+
+    results = asyncio.get_event_loop().run_until_complete(
+        offline_client.close_all_async()
+    )
+    assert [r.ok for r in results] == [True, False, True]
+
+
+def test_cancel_orders_submits_max_concurrency_requests_at_once(
+    offline_client: HsTrader, monkeypatch
+):
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def cancel_order(self, order_id: int):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return order_id
+
+    monkeypatch.setattr(OrderService, "cancel_order", cancel_order)
+    results = offline_client.cancel_orders(list(range(10)), max_concurrency=3)
+    assert [r.result for r in results] == list(range(10))
+    assert peak[0] <= 3
+
+
+def test_cancel_orders_async_over_the_websocket(offline_client: HsTrader, monkeypatch):
+    offline_client._HsTrader__config.is_connected = True
+    running, peak = [0], [0]
+
+    async def cancel_order(self, order_id: int):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        # the later orders are answered first
+        await asyncio.sleep(0.001 * (10 - order_id))
+        running[0] -= 1
+        if order_id == 4:
+            return Error(message="order not found", reason="4")
+        return order_id
+
+    def http_cancel_order(self, order_id: int):
+        raise AssertionError("the orders must be sent over the websocket")
+
+    monkeypatch.setattr(WebSocketService, "cancel_order", cancel_order)
+    monkeypatch.setattr(OrderService, "cancel_order", http_cancel_order)
+    results = asyncio.get_event_loop().run_until_complete(
+        offline_client.cancel_orders_async(list(range(10)), max_concurrency=3)
+    )
+    assert [r.item for r in results] == list(range(10))
+    assert [r.result for r in results if r.ok] == [0, 1, 2, 3, 5, 6, 7, 8, 9]
+    assert isinstance(results[4].error, ValueError)
+    assert str(results[4].error) == "order not found: 4"
+    assert peak[0] == 3
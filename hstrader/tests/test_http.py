@@ -0,0 +1,33 @@
+from hstrader import Config
+from hstrader.helpers import get_session, get_executor, run_async, close_session
+import asyncio
+import threading
+
+
+def test_session_is_shared():
+    config = Config(url="localhost")
+    session = get_session(config)
+    assert session is get_session(config)
+    close_session(config)
+    assert get_session(config) is not session
+    close_session(config)
+
+
+def test_session_pool_size():
+    config = Config(url="localhost", pool_maxsize=3, keep_alive=False)
+    adapter = get_session(config).get_adapter("https://localhost")
+    assert adapter._pool_maxsize == 3
+    assert get_session(config).headers["Connection"] == "close"
+    close_session(config)
+
+
+def test_run_async_uses_shared_executor():
+    config = Config(url="localhost", pool_maxsize=2)
+
+    async def run():
+        return await run_async(config, threading.current_thread)
+
+    thread = asyncio.get_event_loop().run_until_complete(run())
+    assert thread is not threading.current_thread()
+    assert get_executor(config)._max_workers == 2
+    close_session(config)
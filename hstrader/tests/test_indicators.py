@@ -0,0 +1,82 @@
+from hstrader.indicators import (
+    SMA,
+    RollingStd,
+    Bollinger,
+    EMA,
+    MACD,
+    RSI,
+    Stochastic,
+    ATR,
+    batch,
+)
+from hstrader.models import Bar, Resolution
+import math
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def series(n: int = 300):
+    random.seed(3)
+    close, bars = 100.0, []
+    for i in range(n):
+        close += random.uniform(-1, 1)
+        high, low = close + random.random(), close - random.random()
+        bars.append(Bar(1, Resolution.M1, 60 * i, close, high, low, close, 1))
+    return bars
+
+
+def same(incremental, vectorized):
+    expected = [math.nan if v is None else v for v in incremental]
+    np.testing.assert_allclose(vectorized, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_single_value_indicators_match_batch():
+    bars = series()
+    closes = [bar.close for bar in bars]
+
+    for indicator, vectorized in [
+        (SMA(20), batch.sma(closes, 20)),
+        (RollingStd(20), batch.rolling_std(closes, 20)),
+        (EMA(10), batch.ema(closes, 10)),
+        (RSI(14), batch.rsi(closes, 14)),
+    ]:
+        same([indicator.on_bar(bar) for bar in bars], vectorized)
+
+    bands = Bollinger(20, 2)
+    values = [bands.on_bar(bar) for bar in bars]
+    for i, band in enumerate(batch.bollinger(closes, 20, 2)):
+        same([v and v[i] for v in values], band)
+
+    macd = MACD()
+    values = [macd.on_bar(bar) for bar in bars]
+    for i, line in enumerate(batch.macd(closes)):
+        same([v[i] for v in values], line)
+
+
+def test_bar_indicators_match_batch():
+    bars = series()
+    columns = [[bar.high for bar in bars], [bar.low for bar in bars], [bar.close for bar in bars]]
+
+    atr = ATR(14)
+    same([atr.on_bar(bar) for bar in bars], batch.atr(*columns, 14))
+
+    stochastic = Stochastic(14, 3)
+    values = [stochastic.on_bar(bar) for bar in bars]
+    k, d = batch.stochastic(*columns, 14, 3)
+    same([v and v[0] for v in values], k)
+    same([v and v[1] for v in values], d)
+
+
+def test_batch_over_many_symbols():
+    closes = np.array([[bar.close for bar in series()]] * 3).T
+    assert batch.rsi(closes).shape == closes.shape
+    np.testing.assert_allclose(batch.ema(closes, 5)[:, 2], batch.ema(closes[:, 0], 5))
+
+
+def test_rolling_std_stays_accurate():
+    std = RollingStd(3)
+    for value in [1e9 + 1, 1e9 + 2, 1e9 + 3, 1e9 + 4]:
+        std.update(value)
+    assert std.value == pytest.approx(1.0)
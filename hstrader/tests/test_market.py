@@ -1,5 +1,7 @@
 from . import client, EURUSD_ID
-from hstrader import HsTrader
+from hstrader import HsTrader, Config
+from hstrader.models import BaseResponse, Resolution
+from hstrader.services import MarketService
 import time
 import datetime as dt
 from datetime import timedelta
@@ -57,3 +59,59 @@ def test_get_market_history_from_to_datetime(client: HsTrader, EURUSD_ID: int):
     assert history[0].low is not None
     assert history[0].close is not None
     assert history[0].volume is not None
+
+
+def test_get_market_history_array(client: HsTrader, EURUSD_ID: int):
+    history = client.get_market_history(EURUSD_ID, count_back=10)
+    arrays = client.get_market_history_array(EURUSD_ID, count_back=10)
+    assert len(arrays["time"]) == len(history)
+    assert arrays["close"].tolist() == [tick.close for tick in history]
+    assert arrays["time"][0] == int(history[0].time.timestamp())
+
+
+def test_get_market_history_range_windows():
+    requested = []
+
+    def request_history(symbol, frm, to, resolution, type, count_back):
+        requested.append((frm, to))
+        # every window returns its boundaries, the shared ones must be merged
+        data = [
+            {"time": t, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}
+            for t in (to, frm)
+        ]
+        return BaseResponse(success=True, code=200, data=data, error="", message="")
+
+    market = MarketService(Config(url="localhost"))
+    market._MarketService__request_history = request_history
+    history = market.get_market_history_range(
+        1, 0 + 60, 60 * 25, resolution=Resolution.M1, chunk_size=10, max_workers=2
+    )
+    assert sorted(requested) == [(60, 660), (660, 1260), (1260, 1500)]
+    assert [int(tick.time.timestamp()) for tick in history] == [60, 660, 1260, 1500]
+
+
+def test_get_cached_market_history(tmp_path):
+    requested = []
+
+    def request_history(symbol, frm, to, resolution, type, count_back):
+        requested.append((frm, to))
+        data = [
+            {"time": t, "open": t, "high": t, "low": t, "close": t, "volume": 1}
+            for t in range(frm - frm % 60, to + 1, 60)
+            if frm <= t
+        ]
+        return BaseResponse(success=True, code=200, data=data, error="", message="")
+
+    market = MarketService(Config(url="localhost", history_cache_path=str(tmp_path)))
+    market._MarketService__request_history = request_history
+
+    history = market.get_cached_market_history(1, 600, 1200, chunk_size=100)
+    assert [int(tick.time.timestamp()) for tick in history] == list(range(600, 1201, 60))
+    assert market.get_cached_market_history(1, 660, 900) == history[1:6]
+    assert market.get_history_cache_stats() == {"hits": 1, "misses": 1}
+
+    requested.clear()
+    history = market.get_cached_market_history(1, 600, 1500, chunk_size=100)
+    assert requested == [(1200, 1500)]
+    assert [int(tick.time.timestamp()) for tick in history] == list(range(600, 1501, 60))
+    assert market.get_history_cache_stats() == {"hits": 1, "misses": 2}
@@ -0,0 +1,158 @@
+from hstrader import HsTrader
+from hstrader.mock import MockServer
+import asyncio
+import pytest
+import requests
+from hstrader.models import (
+    CrtOrder,
+    Event,
+    Order,
+    OrderStatus,
+    PositionStatus,
+    Resolution,
+    Status,
+    Error,
+)
+
+
+@pytest.fixture
+def server() -> MockServer:
+    with MockServer(tick_rate=500, summary_interval=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def mock_client(server: MockServer) -> HsTrader:
+    client = server.client()
+    yield client
+    client.close()
+
+
+def test_mock_login(server: MockServer):
+    client = server.client()
+    assert client.get_account().balance == 100000
+    assert [s.symbol for s in client.get_symbols()][:3] == ["EURUSD", "GBPUSD", "USDJPY"]
+    assert client.get_symbol("XAUUSD").digits == 2
+
+
+def test_mock_rejects_bad_credentials():
+    with MockServer(credentials=("id", "secret")) as server:
+        assert server.client().get_account().id == 1
+        with pytest.raises(ValueError, match="invalid credentials"):
+            HsTrader("id", "wrong", server.url, server.config())
+
+
+def test_mock_answers_malformed_body(server: MockServer):
+    response = requests.post(
+        f"http://{server.url}/auth/v1/oauth2/refresh/token", data=b"{not json"
+    )
+    assert response.status_code == 400
+    body = response.json()
+    assert body["success"] is False and body["message"].startswith("invalid body")
+
+
+def test_mock_market_order_opens_position(mock_client: HsTrader, server: MockServer):
+    mock_client.create_order(
+        CrtOrder(symbol=1, volume=0.5, side="buy", type="market", order_price=0)
+    )
+    positions = mock_client.get_positions()
+    assert len(positions) == 1
+    assert positions[0].open_price == server.price(1)[1]
+    assert mock_client.get_orders() == []
+
+    mock_client.close_position(positions[0].id, 0.2)
+    assert mock_client.get_positions()[0].volume == pytest.approx(0.3)
+    mock_client.close_position(positions[0].id, 0.3)
+    assert mock_client.get_positions() == []
+    assert mock_client.get_position_history()[0].status == PositionStatus.CLOSED
+    assert len(mock_client.get_deals()) == 3
+
+
+def test_mock_pending_order(mock_client: HsTrader, server: MockServer):
+    mock_client.create_order(
+        CrtOrder(symbol=2, volume=1, side="sell", type="sell_limit", order_price=2)
+    )
+    orders = mock_client.get_orders()
+    assert len(orders) == 1 and orders[0].status == OrderStatus.PLACED
+    assert server.positions == {}
+
+
+def test_mock_market_history(mock_client: HsTrader):
+    bars = mock_client.get_market_history(1, resolution=Resolution.H1, count_back=24)
+    assert 24 <= len(bars) <= 25
+    assert all(b.low <= min(b.open, b.close) and b.high >= max(b.open, b.close) for b in bars)
+    # the bars are the same on every call
+    again = mock_client.get_market_history(
+        1, frm=bars[0].time, to=bars[-1].time, resolution=Resolution.H1
+    )
+    assert again[0] == bars[0]
+
+
+def test_mock_websocket(mock_client: HsTrader, server: MockServer):
+    ticks, summaries, orders = [], [], []
+    mock_client.register_handler(Event.MARKET, lambda tick: ticks.append(tick))
+    mock_client.register_handler(Event.SUMMARY, lambda summary: summaries.append(summary))
+    mock_client.register_handler(
+        Event.ORDER, lambda order, status: orders.append((order, status))
+    )
+
+    async def main():
+        started = asyncio.ensure_future(mock_client.start_async())
+        while len(ticks) < 20:
+            await asyncio.sleep(0.01)
+        order = await mock_client.create_order(
+            CrtOrder(symbol=1, volume=0.1, side="buy", type="market", order_price=0)
+        )
+        error = await mock_client.cancel_order(order.id)
+        while not summaries:
+            await asyncio.sleep(0.01)
+        mock_client.stop()
+        await started
+        return order, error
+
+    order, error = asyncio.get_event_loop().run_until_complete(
+        asyncio.wait_for(main(), 5)
+    )
+    assert isinstance(order, Order) and order.status == OrderStatus.FILLED
+    assert isinstance(error, Error)
+    assert orders[0][1] == Status.CREATED
+    assert summaries[-1].balance == 100000
+    assert server.ticks_sent >= len(ticks) >= 20
+
+
+def test_mock_feed_of_unknown_symbols(server: MockServer):
+    client = server.client(server_feed_filter=True)
+    ticks, errors = [], []
+    client.register_handler(Event.MARKET, lambda tick: ticks.append(tick))
+    client.register_handler(Event.ERROR, lambda error: errors.append(error))
+
+    async def main():
+        started = asyncio.ensure_future(client.start_async())
+        while not ticks:
+            await asyncio.sleep(0.01)
+        client.start_market_feed([999])
+        while not errors:
+            await asyncio.sleep(0.01)
+        sent = server.ticks_sent
+        await asyncio.sleep(0.1)
+        unknown_feed_ticks = server.ticks_sent - sent
+        # the server is still answering
+        balance = (await client.get_account_async()).balance
+        ticks.clear()
+        client.start_market_feed([2, 999])
+        while len(ticks) < 10:
+            await asyncio.sleep(0.01)
+        client.stop()
+        await started
+        return unknown_feed_ticks, balance
+
+    try:
+        unknown_feed_ticks, balance = asyncio.get_event_loop().run_until_complete(
+            asyncio.wait_for(main(), 5)
+        )
+    finally:
+        client.close()
+    assert unknown_feed_ticks == 0
+    assert balance == 100000
+    assert "999" in errors[-1].message
+    assert {tick.symbol_id for tick in ticks} == {2}
@@ -0,0 +1,88 @@
+from hstrader.config import Config, Priority
+from hstrader.helpers import RateLimiter, get_rate_limiter
+import asyncio
+import pytest
+import threading
+import time
+
+
+def test_rate_limiter_burst_then_rate():
+    limiter = RateLimiter(rate=50, burst=5)
+    started = time.monotonic()
+    for _ in range(10):
+        limiter.acquire()
+    elapsed = time.monotonic() - started
+    # the burst is free, the next 5 tokens take 1 / 50 s each
+    assert 0.08 <= elapsed < 0.5
+    assert limiter.metrics()[Priority.NORMAL].acquired == 10
+
+
+def test_rate_limiter_serves_higher_priority_first():
+    limiter = RateLimiter(rate=20, burst=1)
+    limiter.acquire()
+    served = []
+
+    async def send(name: str, priority: Priority):
+        await limiter.acquire_async(priority)
+        served.append(name)
+
+    async def main():
+        tasks = [asyncio.ensure_future(send(f"order{i}", Priority.ORDER)) for i in range(3)]
+        tasks.append(asyncio.ensure_future(send("feed", Priority.FEED)))
+        tasks.append(asyncio.ensure_future(send("cancel", Priority.CRITICAL)))
+        await asyncio.sleep(0)
+        assert limiter.depth() == 5
+        assert limiter.depth(Priority.ORDER) == 3
+        await asyncio.gather(*tasks)
+
+    asyncio.get_event_loop().run_until_complete(main())
+    assert served == ["cancel", "order0", "order1", "order2", "feed"]
+    metrics = limiter.metrics()
+    assert metrics[Priority.ORDER].max_waiting == 3
+    assert metrics[Priority.ORDER].waiting == 0
+    assert limiter.depth() == 0
+
+
+def test_rate_limiter_shared_by_threads():
+    limiter = RateLimiter(rate=100, burst=1)
+    limiter.acquire()
+    served = []
+
+    def send(name: str, priority: Priority):
+        limiter.acquire(priority)
+        served.append(name)
+
+    threads = [threading.Thread(target=send, args=("order", Priority.ORDER))]
+    threads[0].start()
+    time.sleep(0.002)
+    threads.append(threading.Thread(target=send, args=("close", Priority.CRITICAL)))
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+    assert sorted(served) == ["close", "order"]
+
+
+def test_get_rate_limiter_from_config():
+    assert get_rate_limiter(Config(url="localhost")) is None
+    config = Config(url="localhost", rate_limit=10)
+    limiter = get_rate_limiter(config)
+    assert limiter is get_rate_limiter(config)
+    assert limiter.rate == 10 and limiter.burst == 10
+
+
+def test_rate_limiter_blocking_acquire_on_the_loop_fails_fast():
+    limiter = RateLimiter(rate=2, burst=1)
+    limiter.acquire()
+
+    async def main():
+        waiting = asyncio.ensure_future(limiter.acquire_async(Priority.CRITICAL))
+        await asyncio.sleep(0)
+        # an inline handler sending a request while a websocket message waits
+        with pytest.raises(RuntimeError):
+            limiter.acquire(Priority.NORMAL)
+        await waiting
+
+    asyncio.get_event_loop().run_until_complete(asyncio.wait_for(main(), 5))
+    assert limiter.depth() == 0
+    # nothing waits on the loop, the blocking call just waits for its token
+    limiter.acquire()
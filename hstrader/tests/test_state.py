@@ -0,0 +1,181 @@
+from hstrader import Config
+import logging
+import time
+from hstrader.services import (
+    DealService,
+    OrderService,
+    PositionService,
+    StateService,
+    StateStore,
+    WebSocketService,
+)
+from hstrader.models import (
+    Deal,
+    Event,
+    Gap,
+    Order,
+    OrderStatus,
+    Position,
+    PositionPL,
+    PositionStatus,
+    Status,
+)
+from .test_ws import ws_service, receive
+
+
+def test_state_seed_and_queries():
+    state = StateStore()
+    state.seed(
+        [
+            Order(id=1, symbol_id=1, status=OrderStatus.PLACED),
+            Order(id=2, symbol_id=2, status=OrderStatus.PLACED),
+        ],
+        [
+            Position(id=10, symbol_id=1, status=PositionStatus.OPEN),
+            Position(id=11, symbol_id=1, status=PositionStatus.CLOSED),
+        ],
+        [],
+    )
+    assert state.get_order(2).symbol_id == 2
+    assert [o.id for o in state.get_orders(status=OrderStatus.PLACED)] == [1, 2]
+    assert [p.id for p in state.get_positions(1, PositionStatus.OPEN)] == [10]
+    assert state.get_positions(2) == []
+
+
+def test_state_follows_events(ws_service: WebSocketService):
+    state = StateStore()
+    state.seed([], [Position(id=10, symbol_id=1, status=PositionStatus.OPEN)], [])
+    ws_service._add_listener(Event.ORDER, state.on_order)
+    ws_service._add_listener(Event.POSITION, state.on_position)
+    ws_service._add_listener(Event.DEAL, state.on_deal)
+    ws_service._add_listener(Event.POSITION_PL, state.on_position_pl)
+
+    receive(
+        ws_service,
+        '{"type":"order_create","payload":{"id":1,"symbol_id":1,"status":1,"volume":0.1}}',
+    )
+    receive(ws_service, '{"type":"order_update","payload":{"id":1,"volume":0.2}}')
+    order = state.get_order(1)
+    assert (order.symbol_id, order.volume) == (1, 0.2)
+
+    receive(ws_service, '{"type":"order_cancel","payload":{"id":1,"symbol_id":1}}')
+    assert state.get_orders(1, OrderStatus.PLACED) == []
+    assert state.get_orders(1, OrderStatus.CANCELED)[0].id == 1
+
+    receive(ws_service, "summary,1,100,0,100,0,100,0%,2.5,10,2.5")
+    assert state.get_position(10).profit == 2.5
+
+    receive(ws_service, '{"type":"position_close","payload":{"id":10,"symbol_id":1}}')
+    assert state.get_positions(1, PositionStatus.OPEN) == []
+
+    receive(ws_service, '{"type":"deal_create","payload":{"id":5,"symbol_id":1}}')
+    assert [d.id for d in state.get_deals(1)] == [5]
+
+
+def test_state_keeps_events_received_during_seed():
+    state = StateStore()
+    state.begin_seed()
+    # the order is filled and the position opened while the snapshot is requested
+    state.on_order(Order(id=1, symbol_id=1, status=OrderStatus.FILLED), Status.UPDATED)
+    state.on_position(
+        Position(id=10, symbol_id=1, status=PositionStatus.OPEN), Status.CREATED
+    )
+    state.seed([Order(id=1, symbol_id=1, status=OrderStatus.PLACED, volume=0.1)], [], [])
+
+    assert state.get_orders(status=OrderStatus.PLACED) == []
+    order = state.get_order(1)
+    assert (order.status, order.volume) == (OrderStatus.FILLED, 0.1)
+    assert [p.id for p in state.get_positions(1)] == [10]
+
+    # the events are no longer kept once the seed is done
+    state.seed([], [], [])
+    assert state.get_order(1) is None
+
+
+def test_state_end_seed_drops_events():
+    state = StateStore()
+    state.begin_seed()
+    state.on_order(Order(id=1, symbol_id=1, status=OrderStatus.PLACED), Status.CREATED)
+    state.end_seed()
+    state.seed([], [], [])
+    assert state.get_order(1) is None
+
+
+class _Client(WebSocketService, StateService):
+    def __init__(self, config: Config):
+        WebSocketService.__init__(self, config)
+        StateService.__init__(self, config)
+
+
+def test_track_state_applies_events_received_during_seed(monkeypatch):
+    client = _Client(Config(url="localhost", session_id="session", access_token="token"))
+
+    def get_orders(self):
+        # the order is filled after the server answered with it
+        receive(
+            client,
+            '{"type":"order_update","payload":{"id":1,"symbol_id":1,"status":3}}',
+        )
+        return [Order(id=1, symbol_id=1, status=OrderStatus.PLACED)]
+
+    monkeypatch.setattr(OrderService, "get_orders", get_orders)
+    monkeypatch.setattr(PositionService, "get_positions", lambda self: [])
+    monkeypatch.setattr(DealService, "get_deals", lambda self: [])
+
+    state = client.track_state()
+    assert state.get_order(1).status == OrderStatus.FILLED
+
+
+def test_track_state_logs_a_failed_seed_after_reconnection(monkeypatch, caplog):
+    client = _Client(Config(url="localhost", session_id="session", access_token="token"))
+    monkeypatch.setattr(OrderService, "get_orders", lambda self: [])
+    monkeypatch.setattr(PositionService, "get_positions", lambda self: [])
+    monkeypatch.setattr(DealService, "get_deals", lambda self: [])
+    state = client.track_state()
+
+    def get_orders(self):
+        raise ValueError("server unavailable")
+
+    monkeypatch.setattr(OrderService, "get_orders", get_orders)
+    on_reconnect = client._StateService__get_on_reconnect_callback(state)
+    with caplog.at_level(logging.WARNING):
+        on_reconnect(Gap(disconnected_at=0, reconnected_at=1, attempts=1))
+        deadline = time.time() + 5
+        while "server unavailable" not in caplog.text and time.time() < deadline:
+            time.sleep(0.01)
+    assert "Could not seed the state again" in caplog.text
+
+    # the next reconnection seeds the mirror again
+    monkeypatch.setattr(
+        OrderService, "get_orders", lambda self: [Order(id=1, symbol_id=1, status=OrderStatus.PLACED)]
+    )
+    on_reconnect(Gap(disconnected_at=0, reconnected_at=1, attempts=1))
+    deadline = time.time() + 5
+    while state.get_order(1) is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert state.get_order(1).status == OrderStatus.PLACED
+
+
+def test_state_keeps_the_last_finished_orders_positions_and_deals():
+    state = StateStore(history_size=2)
+    state.seed(
+        [Order(id=1, symbol_id=1, status=OrderStatus.PLACED)],
+        [Position(id=10, symbol_id=1, status=PositionStatus.OPEN)],
+        [],
+    )
+    for id in (2, 3, 4):
+        state.on_order(Order(id=id, symbol_id=1, status=OrderStatus.PLACED), Status.CREATED)
+        state.on_order(Order(id=id, symbol_id=1), Status.CANCELED)
+    for id in (5, 6, 7):
+        state.on_deal(Deal(id=id, symbol_id=1), Status.CREATED)
+    assert [o.id for o in state.get_orders()] == [1, 3, 4]
+    assert [d.id for d in state.get_deals()] == [6, 7]
+
+    position = state.get_position(10)
+    state.on_position_pl(PositionPL(position_id=10, profit=2.5))
+    # the position returned before is left as it was
+    assert (position.profit, state.get_position(10).profit) == (None, 2.5)
+    state.on_position(Position(id=11, symbol_id=1, status=PositionStatus.CLOSED), Status.CREATED)
+    state.on_position(Position(id=12, symbol_id=1, status=PositionStatus.CLOSED), Status.CREATED)
+    state.on_position(Position(id=10, symbol_id=1), Status.CLOSED)
+    assert [p.id for p in state.get_positions()] == [12, 10]
@@ -1,5 +1,7 @@
-from . import client, unauthenticated_client
-from hstrader import HsTrader
+from . import client, unauthenticated_client, live_only
+from hstrader import HsTrader, Config
+from hstrader.models import Symbol
+from hstrader.services import SymbolService
 import pytest
 
 
@@ -8,9 +10,36 @@ def test_get_symbols(client: HsTrader):
     assert symbols is not None
     assert len(symbols) > 0
 
+@live_only
 def test_get_symbol(client: HsTrader):
     symbols = client.get_symbol("Ripple")
     assert symbols is not None
     assert symbols.id != None or symbols.id != 0
     with pytest.raises(Exception):
         client.get_symbol("DOESNOTEXIST")
+
+
+def test_save_and_load_symbols(tmp_path):
+    path = str(tmp_path / "symbols.json")
+    config = Config(url="localhost", symbols_cache_path=path)
+    config.set_symbols([Symbol(id=1, symbol="EURUSD", digits=5, spread=2.0)])
+    SymbolService(config).save_symbols()
+
+    loaded = Config(url="localhost", symbols_cache_path=path)
+    assert SymbolService(loaded).load_symbols()
+    assert loaded.get_symbol(1) == config.get_symbol(1)
+    assert not SymbolService(Config(url="localhost")).load_symbols()
+
+
+def test_set_symbols_keeps_the_symbols_updated_since_the_request():
+    config = Config(url="localhost")
+    config.set_symbols([Symbol(id=1, digits=5), Symbol(id=2, digits=5)])
+    since = config.get_symbols_sequence()
+    # a websocket update received while the symbols are requested
+    config.set_symbol(Symbol(id=2, digits=3))
+    config.set_symbols([Symbol(id=1, digits=4), Symbol(id=2, digits=5)], since)
+    assert config.get_symbol(1).digits == 4
+    assert config.get_symbol(2).digits == 3
+
+    config.set_symbols([Symbol(id=1, digits=4), Symbol(id=2, digits=5)])
+    assert config.get_symbol(2).digits == 5
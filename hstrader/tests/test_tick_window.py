@@ -0,0 +1,35 @@
+from hstrader.helpers import TickRing, TickWindow, WindowTick
+from hstrader.models import RawTick
+import pytest
+
+
+def test_tick_ring_overwrites_oldest():
+    ring = TickRing(3)
+    for i in range(5):
+        ring.append(1.0 + i, 2.0 + i, i, 1609452000 + i)
+    assert len(ring) == 3
+    assert ring[0] == WindowTick(3.0, 4.0, 2.0, 1609452002)
+    assert ring[-1].time == 1609452004
+    assert list(ring.bids()) == [3.0, 4.0, 5.0]
+    assert list(ring.times()) == [1609452002, 1609452003, 1609452004]
+    assert [t.bid for t in ring.last(2)] == [4.0, 5.0]
+    with pytest.raises(IndexError):
+        ring[3]
+
+
+def test_tick_ring_arrays():
+    pytest.importorskip("numpy")
+    ring = TickRing(4)
+    for i in range(6):
+        ring.append(i, i, 0, i)
+    assert ring.to_arrays()["bid"].tolist() == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_tick_window_per_symbol():
+    window = TickWindow(2)
+    window.on_tick(RawTick(1, 1.1, 1.2, 0, 0, 0, 0, 5, 1609452000))
+    window.on_tick(RawTick(2, 2.1, 2.2, 0, 0, 0, 0, 5, 1609452000))
+    assert window.symbols() == [1, 2]
+    assert window.get(1)[0].ask == 1.2
+    assert window.get(3) is None
+    assert window.memory_usage() == 2 * 2 * 32
@@ -1,4 +1,13 @@
-from hstrader.services.utils import convert_time_to_int
+from hstrader.services.utils import (
+    convert_time_to_int,
+    deserialize_tick,
+    deserialize_raw_tick,
+    truncate_float,
+    PriceAdjuster,
+)
+from hstrader.models import Symbol, BaseResponse, Order, OrderStatus, HistoryTick
+import random
+import pytest
 import datetime as dt
 import time
 
@@ -21,3 +30,79 @@ def test_convert_time_to_int_datetime():
 
 def test_convert_time_to_int_time():
     assert convert_time_to_int(time.time()) == int(time.time())
+
+
+def test_deserialize_raw_tick():
+    message = b"12,1.10235,1.10245,1.1050,1.1010,1.1020,1.1015,350,1609452000"
+    raw = deserialize_raw_tick(message)
+    assert raw == deserialize_raw_tick(memoryview(message))
+    assert raw.symbol_id == 12
+    assert raw.bid == 1.10235
+    assert raw.time == 1609452000
+
+    tick = deserialize_tick(message)
+    assert tick.symbol_id == raw.symbol_id
+    assert tick.ask == raw.ask
+    assert tick.volume == raw.volume
+    assert int(tick.time.timestamp()) == raw.time
+
+
+def test_price_adjuster_truncate():
+    random.seed(0)
+    for digits in range(0, 8):
+        adjuster = PriceAdjuster(Symbol(digits=digits, spread_balance=3))
+        for _ in range(2000):
+            number = random.uniform(-2, 2) * 10 ** random.randint(0, 4)
+            assert adjuster.truncate(number) == truncate_float(number, digits)
+    adjuster = PriceAdjuster(Symbol(digits=2))
+    assert adjuster.truncate(0.29) == 0.29
+    assert adjuster.truncate(1.1 + 0.01) == 1.11
+
+
+def test_price_adjuster_tick():
+    adjuster = PriceAdjuster(Symbol(digits=5, spread_balance=3, spread=None))
+    bid, ask = adjuster.adjust_tick(1.10235, 1.10245)
+    assert bid == truncate_float(1.10235 + 3 * 10**-5, 5)
+    assert ask == truncate_float(1.10245 + 3 * 10**-5, 5)
+
+
+def test_price_adjuster_truncate_array():
+    np = pytest.importorskip("numpy")
+    adjuster = PriceAdjuster(Symbol(digits=5))
+    numbers = np.array([1.102351, 0.29, -1.000019, 0.0, 1.1 + 0.01])
+    expected = [truncate_float(number, 5) for number in numbers]
+    assert adjuster.truncate_array(numbers).tolist() == expected
+
+
+def test_trusted_deserialize_matches_validation():
+    data = [
+        {"id": 1, "symbol_id": 2, "status": 1, "side": 0, "volume": 0.5, "extra": 1},
+        {"id": 2, "symbol_id": 2, "status": 9},
+    ]
+    response = BaseResponse(success=True, code=200, data=data, error="", message="")
+    trusted = response.deserialize_list(Order, trusted=True)
+    assert trusted[0] == Order(**data[0])
+    assert trusted[0].status is OrderStatus.PLACED
+    # unknown values are kept as sent instead of failing
+    assert trusted[1].status == 9
+
+    bar = {"time": 1609452000, "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 3}
+    response = BaseResponse(success=True, code=200, data=[bar], error="", message="")
+    assert response.deserialize_list(HistoryTick, trusted=True) == response.deserialize_list(
+        HistoryTick
+    )
+
+
+def test_trusted_deserialize_leaves_the_data_unchanged():
+    data = [{"id": 1, "symbol_id": 2, "status": 1, "side": 0}]
+    response = BaseResponse(success=True, code=200, data=data, error="", message="")
+    response.deserialize_list(Order, trusted=True)
+    assert response.data == [{"id": 1, "symbol_id": 2, "status": 1, "side": 0}]
+    assert type(response.data[0]["status"]) is int
+
+    bar = {"time": "2021-01-01T00:00:00Z", "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": 3}
+    response = BaseResponse(success=True, code=200, data=[bar], error="", message="")
+    trusted = response.deserialize_list(HistoryTick, trusted=True)
+    assert trusted == response.deserialize_list(HistoryTick)
+    assert isinstance(trusted[0].time, dt.datetime)
+    assert response.data[0]["time"] == "2021-01-01T00:00:00Z"
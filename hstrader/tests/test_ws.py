@@ -1,6 +1,12 @@
 from . import client, unauthenticated_client, EURUSD_ID
-from hstrader import HsTrader
+from hstrader import HsTrader, Config, TickDelivery, Overflow, Priority
+from hstrader.services import WebSocketService
+from hstrader.helpers import Dispatcher, FrameRecorder, read_frames
+import asyncio
+import json
 import pytest
+import threading
+import time
 from hstrader.models import (
     CrtOrder,
     OrderType,
@@ -9,6 +15,9 @@ from hstrader.models import (
     UpdOrder,
     Event,
     Status,
+    Error,
+    Symbol,
+    Dispatch,
 )
 
 
@@ -78,3 +87,425 @@ def test_ws_stop(client: HsTrader):
 
 #     with pytest.raises(ValueError):
 #         client.stop()
+
+
+@pytest.fixture
+def ws_service() -> WebSocketService:
+    config = Config(url="localhost", session_id="session", access_token="token")
+    config.is_connected = True
+    service = WebSocketService(config)
+    sent = []
+    priorities = []
+
+    async def send():
+        pass
+
+    def send_message(message: str, priority: Priority = Priority.NORMAL):
+        sent.append(json.loads(message))
+        priorities.append(priority)
+        return asyncio.get_event_loop().create_task(send())
+
+    service._WebSocketService__client._send_message = send_message
+    service.sent = sent
+    service.priorities = priorities
+    return service
+
+
+def receive(service: WebSocketService, *messages: str):
+    async def run():
+        for message in messages:
+            await service._WebSocketService__on_message(message)
+
+    asyncio.get_event_loop().run_until_complete(run())
+
+
+def test_ws_order_acknowledgement(ws_service: WebSocketService):
+    crt = CrtOrder(
+        symbol=1, type=OrderType.MARKET, side=SideType.BUY, volume=0.1, order_price=0
+    )
+    created = ws_service.create_order(crt)
+    canceled = ws_service.cancel_order(7)
+    assert [m["type"] for m in ws_service.sent] == ["order_create", "order_cancel"]
+    assert ws_service.priorities == [Priority.ORDER, Priority.CRITICAL]
+
+    receive(
+        ws_service,
+        '{"type":"order_cancel","payload":{"id":7,"symbol_id":1,"side":0}}',
+    )
+    receive(
+        ws_service,
+        '{"type":"order_create","payload":{"id":8,"symbol_id":1,"side":0}}',
+    )
+    assert canceled.result().id == 7
+    assert created.result().id == 8
+
+
+def test_ws_order_rejected(ws_service: WebSocketService):
+    upd = UpdOrder(order_id=3, volume=1)
+    updated = ws_service.update_order(upd)
+    receive(
+        ws_service,
+        '{"type":"bad_request","payload":{"message":"invalid","reason":"volume"}}',
+    )
+    assert isinstance(updated.result(), Error)
+
+
+def test_ws_order_timeout(ws_service: WebSocketService):
+    future = ws_service.cancel_order(1, timeout=0.01)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.get_event_loop().run_until_complete(future)
+
+
+def test_ws_symbol_update(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2, spread_balance=0)])
+    ticks = []
+
+    @ws_service.subscribe(Event.MARKET)
+    def on_market(tick):
+        ticks.append(tick)
+
+    receive(ws_service, b"1,1.005,1.015,0,0,0,0,0,1609452000")
+    receive(
+        ws_service,
+        '{"type":"symbol_update","payload":{"id":1,"digits":3,"spread_balance":0}}',
+    )
+    receive(ws_service, b"1,1.005,1.015,0,0,0,0,0,1609452000")
+    assert config.get_symbol(1).digits == 3
+    assert [tick.bid for tick in ticks] == [1.0, 1.005]
+
+
+def test_ws_conflated_ticks(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2), Symbol(id=2, digits=2)])
+    config.tick_delivery = TickDelivery.CONFLATE
+    ticks = []
+
+    @ws_service.subscribe(Event.MARKET)
+    def on_market(tick):
+        ticks.append(tick)
+
+    receive(
+        ws_service,
+        *[
+            message + b",0,0,0,0,0,1609452000"
+            for message in [b"1,1.1,1.2", b"2,2.1,2.2", b"1,1.3,1.4", b"1,1.5,1.6"]
+        ],
+    )
+    asyncio.get_event_loop().run_until_complete(asyncio.sleep(0.01))
+    ws_service._WebSocketService__stop_tick_drainer()
+    assert [(t.symbol_id, t.bid, t.dropped) for t in ticks] == [(1, 1.5, 2), (2, 2.1, 0)]
+
+
+def test_ws_queued_ticks(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2)])
+    config.tick_delivery = TickDelivery.QUEUE
+    config.tick_queue_size = 2
+    config.tick_overflow = Overflow.DROP_NEWEST
+    config.raw_ticks = True
+    ticks = []
+
+    @ws_service.subscribe(Event.MARKET)
+    def on_market(tick):
+        ticks.append(tick)
+
+    receive(
+        ws_service,
+        *[b"1," + bid + b",1.5,0,0,0,0,0,1609452000" for bid in [b"1.1", b"1.2", b"1.3"]],
+    )
+    asyncio.get_event_loop().run_until_complete(asyncio.sleep(0.01))
+    ws_service._WebSocketService__stop_tick_drainer()
+    assert [(t.bid, t.dropped) for t in ticks] == [(1.1, 1), (1.2, 0)]
+
+
+def test_ws_thread_pool_dispatch_keeps_order_per_symbol(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2), Symbol(id=2, digits=2)])
+    config.raw_ticks = True
+    calls = []
+
+    @ws_service.subscribe(Event.MARKET, dispatch=Dispatch.THREAD_POOL)
+    def on_market(tick):
+        # the first tick of each symbol is the slowest one
+        time.sleep(0.05 if tick.bid in (1.1, 2.1) else 0)
+        calls.append((tick.symbol_id, tick.bid, threading.current_thread().name))
+
+    receive(
+        ws_service,
+        *[
+            message + b",9,0,0,0,0,0,1609452000"
+            for message in [b"1,1.1", b"2,2.1", b"1,1.2", b"2,2.2"]
+        ],
+    )
+    asyncio.get_event_loop().run_until_complete(asyncio.sleep(0.2))
+    assert [c[1] for c in calls if c[0] == 1] == [1.1, 1.2]
+    assert [c[1] for c in calls if c[0] == 2] == [2.1, 2.2]
+    assert all(c[2].startswith("hstrader-handler") for c in calls)
+
+
+def test_ws_asyncio_task_dispatch(ws_service: WebSocketService):
+    orders = []
+
+    @ws_service.subscribe("order", dispatch="asyncio_task")
+    def on_order(order, status):
+        orders.append(order.id)
+
+    async def run():
+        await ws_service._WebSocketService__on_message(
+            '{"type":"order_create","payload":{"id":4,"symbol_id":1}}'
+        )
+        # the handler runs after the message is processed
+        assert orders == []
+        await asyncio.sleep(0)
+
+    asyncio.get_event_loop().run_until_complete(run())
+    assert orders == [4]
+
+
+def test_ws_dispatch_bounds_the_calls_waiting_per_key(ws_service: WebSocketService):
+    ws_service._WebSocketService__config.handler_queue_size = 2
+    orders = []
+    released = []
+
+    async def on_order(order, status):
+        while not released:
+            await asyncio.sleep(0.001)
+        orders.append(order.id)
+
+    dispatcher = Dispatcher(
+        ws_service._WebSocketService__config, on_order, Dispatch.ASYNCIO_TASK, key=lambda order: None
+    )
+
+    async def run():
+        tasks = [dispatcher(Order(id=0), Status.CREATED)]
+        await asyncio.sleep(0)
+        # the first call runs, the calls 1 and 2 are dropped for the last ones
+        tasks += [dispatcher(Order(id=i), Status.CREATED) for i in range(1, 5)]
+        released.append(True)
+        await tasks[0]
+        return tasks
+
+    tasks = asyncio.get_event_loop().run_until_complete(run())
+    assert orders == [0, 3, 4]
+    assert dispatcher.dropped == 2
+    assert all(task is tasks[0] for task in tasks)
+
+
+def test_ws_routes_parse_once(ws_service: WebSocketService, monkeypatch):
+    from hstrader.services import ws, utils
+
+    parsed = []
+
+    def loads(data):
+        parsed.append(data)
+        return utils.json.loads(data)
+
+    monkeypatch.setattr(ws, "json_loads", loads)
+    positions = []
+
+    @ws_service.subscribe(Event.POSITION)
+    def on_position(position, status):
+        positions.append((position.id, status))
+
+    receive(
+        ws_service,
+        '{"type":"position_close","payload":{"id":3,"symbol_id":1}}',
+        '{"type":"watchlist_create","payload":{"id":1}}',
+    )
+    assert positions == [(3, Status.CLOSED)]
+    assert len(parsed) == 2
+    assert ws._routes["order_update"] == (Event.ORDER, Status.UPDATED, Order)
+
+
+def test_ws_track_ticks(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2)])
+    window = ws_service.track_ticks(capacity=2)
+    receive(
+        ws_service,
+        *[b"1," + bid + b",1.5,0,0,0,0,0,1609452000" for bid in [b"1.1", b"1.2", b"1.3"]],
+    )
+    assert ws_service.track_ticks() is window
+    assert list(window.get(1).bids()) == [1.2, 1.3]
+
+
+def test_ws_bar_closed_event(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2)])
+    ws_service.track_bars(["1m"])
+    bars = []
+
+    @ws_service.subscribe("bar")
+    def on_bar(bar):
+        bars.append(bar)
+
+    receive(
+        ws_service,
+        b"1,1.1,1.2,0,0,0,0,0,1609452000",
+        b"1,1.3,1.4,0,0,0,0,0,1609452030",
+        b"1,1.2,1.3,0,0,0,0,0,1609452060",
+    )
+    assert [(b.time, b.open, b.high, b.close) for b in bars] == [
+        (1609452000, 1.1, 1.3, 1.3)
+    ]
+
+
+def test_ws_several_handlers_with_filters(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2), Symbol(id=2, digits=2)])
+    calls = []
+
+    @ws_service.subscribe(Event.MARKET)
+    def on_every_tick(tick):
+        calls.append(("all", tick.symbol_id))
+
+    @ws_service.subscribe(Event.MARKET, symbols=[2])
+    def on_second_symbol(tick):
+        calls.append(("second", tick.symbol_id))
+
+    @ws_service.subscribe(Event.ORDER, status=Status.CREATED)
+    def on_created(order, status):
+        calls.append(("created", order.id))
+
+    @ws_service.subscribe(Event.ORDER, symbols=[Symbol(id=1)], status=[Status.CANCELED])
+    def on_canceled(order, status):
+        calls.append(("canceled", order.id))
+
+    receive(
+        ws_service,
+        b"1,1.1,1.2,0,0,0,0,0,1609452000",
+        b"2,2.1,2.2,0,0,0,0,0,1609452000",
+        '{"type":"order_create","payload":{"id":4,"symbol_id":2}}',
+        '{"type":"order_cancel","payload":{"id":5,"symbol_id":2}}',
+        '{"type":"order_cancel","payload":{"id":6,"symbol_id":1}}',
+    )
+    assert calls == [
+        ("all", 1),
+        ("all", 2),
+        ("second", 2),
+        ("created", 4),
+        ("canceled", 6),
+    ]
+
+    assert ws_service.unsubscribe(Event.MARKET, on_every_tick) == 1
+    calls.clear()
+    receive(ws_service, b"1,1.1,1.2,0,0,0,0,0,1609452000", b"2,2.1,2.2,0,0,0,0,0,1609452000")
+    assert calls == [("second", 2)]
+    assert ws_service.unsubscribe("order") == 2
+
+    with pytest.raises(ValueError):
+        ws_service.register_handler(Event.SUMMARY, lambda s: None, symbols=[1])
+    with pytest.raises(ValueError):
+        ws_service.register_handler(Event.MARKET, lambda t: None, status=Status.CREATED)
+
+
+def test_ws_market_feed_symbols_dropped_before_decode(ws_service: WebSocketService, monkeypatch):
+    from hstrader.services import ws
+
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2), Symbol(id=12, digits=2)])
+    decoded = []
+
+    def deserialize(message):
+        decoded.append(message)
+        return utils_deserialize(message)
+
+    utils_deserialize = ws.deserialize_raw_tick
+    monkeypatch.setattr(ws, "deserialize_raw_tick", deserialize)
+    ticks = []
+
+    @ws_service.subscribe(Event.MARKET)
+    def on_market(tick):
+        ticks.append(tick.symbol_id)
+
+    ws_service.start_market_feed(symbols=[12])
+    assert ws_service.sent[-1] == {"type": "start_market_feed", "payload": {}}
+    receive(
+        ws_service,
+        b"1,1.1,1.2,0,0,0,0,0,1609452000",
+        b"12,1.1,1.2,0,0,0,0,0,1609452000",
+    )
+    assert ticks == [12]
+    assert len(decoded) == 1
+
+    ws_service.unsubscribe_market([12])
+    ws_service.subscribe_market([Symbol(id=1)])
+    assert ws_service.get_market_symbols() == [1]
+    # the server doesn't filter the feed, it's only started once
+    assert len(ws_service.sent) == 1
+    receive(ws_service, b"12,1.1,1.2,0,0,0,0,0,1609452000", b"1,1.1,1.2,0,0,0,0,0,1609452000")
+    assert ticks == [12, 1]
+
+
+def test_ws_market_feed_symbols_sent_to_server(ws_service: WebSocketService):
+    config = ws_service._WebSocketService__config
+    config.server_feed_filter = True
+    ws_service.subscribe_market([3, 1])
+    ws_service.subscribe_market([2])
+    ws_service.unsubscribe_market([3])
+    assert [m["payload"] for m in ws_service.sent] == [
+        {"symbols": [1, 3]},
+        {"symbols": [1, 2, 3]},
+        {"symbols": [1, 2]},
+    ]
+    ws_service.start_market_feed()
+    assert ws_service.sent[-1]["payload"] == {}
+    assert ws_service.get_market_symbols() is None
+
+
+def test_ws_record_and_replay(ws_service: WebSocketService, tmp_path):
+    config = ws_service._WebSocketService__config
+    config.set_symbols([Symbol(id=1, digits=2)])
+    path = str(tmp_path / "frames.bin")
+    frames = [
+        b"1,1.1,1.2,0,0,0,0,0,1609452000",
+        '{"type":"order_create","payload":{"id":4,"symbol_id":1}}',
+        "summary,1000,0,1000,0,0,0",
+    ]
+    with FrameRecorder(path) as recorder:
+        for i, frame in enumerate(frames):
+            recorder.write(frame, received_at=100 + i * 0.05)
+    assert [f.data for f in read_frames(path)] == frames
+
+    received = []
+
+    @ws_service.subscribe(Event.MARKET)
+    def on_market(tick):
+        received.append(tick.bid)
+
+    @ws_service.subscribe(Event.ORDER)
+    def on_order(order, status):
+        received.append(order.id)
+
+    assert ws_service.replay(path) == 3
+    assert received == [1.1, 4]
+
+    started = time.monotonic()
+    assert ws_service.replay(path, speed=2) == 3
+    # the 0.1 s between the first and the last frame are replayed in 0.05 s
+    assert 0.04 <= time.monotonic() - started < 0.5
+    assert received == [1.1, 4, 1.1, 4]
+
+
+def test_ws_record_to_another_file(ws_service: WebSocketService, tmp_path):
+    first, second = str(tmp_path / "first.bin"), str(tmp_path / "second.bin")
+    recorder = ws_service.record(first)
+    assert ws_service.record(first) is recorder
+    with pytest.raises(ValueError):
+        ws_service.record(second)
+    ws_service.stop_recording()
+    assert ws_service.record(second).path == second
+    ws_service.stop_recording()
+
+
+def test_frame_recorder_drops_frames_once_closed(tmp_path):
+    path = str(tmp_path / "frames.bin")
+    recorder = FrameRecorder(path)
+    recorder.write(b"1,1.1,1.2,0,0,0,0,0,1609452000")
+    recorder.close()
+    # the receive loop may still write after another thread stopped the recording
+    recorder.write("summary,1000,0,1000,0,0,0")
+    recorder.flush()
+    assert recorder.frames == 1
+    assert len(list(read_frames(path))) == 1